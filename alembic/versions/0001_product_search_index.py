@@ -0,0 +1,53 @@
+"""Full-text search index for products
+
+Adds a GIN index over the tsvector searched by GET /products/search on
+products and featured_products (Postgres), or an FTS5 table kept in sync by
+triggers (SQLite).
+
+Revision ID: 0001_product_search_index
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.search_index import SQLITE_SEARCH_DDL
+
+revision = "0001_product_search_index"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Must match app.db.repositories.crud_product.SEARCH_DOCUMENT
+SEARCH_DOCUMENT = "to_tsvector('english', coalesce(product_name, '') || ' ' || coalesce(category, '') || ' ' || coalesce(description, ''))"
+
+def _tables(bind):
+    inspector = sa.inspect(bind)
+    schema = "public" if bind.dialect.name == "postgresql" else None
+    return [t for t in ("products", "featured_products") if inspector.has_table(t, schema=schema)]
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        tables = _tables(bind)
+        # CONCURRENTLY keeps the catalog writable while the index builds; it
+        # cannot run inside the migration transaction.
+        with op.get_context().autocommit_block():
+            for table in tables:
+                op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_search ON public.{table} USING GIN ({SEARCH_DOCUMENT})")
+    elif bind.dialect.name == "sqlite":
+        for stmt in SQLITE_SEARCH_DDL:
+            op.execute(stmt)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for table in ("products", "featured_products"):
+                op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS public.ix_{table}_search")
+    elif bind.dialect.name == "sqlite":
+        for trigger in ("products_fts_ai", "products_fts_ad", "products_fts_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS products_fts")
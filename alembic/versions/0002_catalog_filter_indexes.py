@@ -0,0 +1,54 @@
+"""Composite indexes for filtered catalog browsing
+
+Backs the category/price and rating filters and sorts on GET /products for
+both catalog tables.
+
+Revision ID: 0002_catalog_filter_indexes
+Revises: 0001_product_search_index
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002_catalog_filter_indexes"
+down_revision = "0001_product_search_index"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("category_current_price", ["category", "current_price"]),
+    ("rating_people_rated_count", ["rating", "people_rated_count"]),
+]
+
+
+def _tables(bind):
+    inspector = sa.inspect(bind)
+    schema = "public" if bind.dialect.name == "postgresql" else None
+    return [t for t in ("products", "featured_products") if inspector.has_table(t, schema=schema)]
+
+
+def upgrade():
+    bind = op.get_bind()
+    tables = _tables(bind)
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for table in tables:
+                for suffix, columns in INDEXES:
+                    op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_{suffix} ON public.{table} ({', '.join(columns)})")
+    else:
+        for table in tables:
+            for suffix, columns in INDEXES:
+                op.create_index(f"ix_{table}_{suffix}", table, columns, if_not_exists=True)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for table in ("products", "featured_products"):
+                for suffix, _ in INDEXES:
+                    op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS public.ix_{table}_{suffix}")
+    else:
+        for table in _tables(bind):
+            for suffix, _ in INDEXES:
+                op.drop_index(f"ix_{table}_{suffix}", table_name=table, if_exists=True)
@@ -0,0 +1,54 @@
+"""Index for wishlist membership lookups
+
+Backs GET /wishlist/contains and the with_wishlist flag on GET /products,
+which look up many product ids within one wishlist. Skipped when a unique
+constraint on (wishlist_id, product_id) already provides that index.
+
+Revision ID: 0003_wishlist_item_lookup_index
+Revises: 0002_catalog_filter_indexes
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_wishlist_item_lookup_index"
+down_revision = "0002_catalog_filter_indexes"
+branch_labels = None
+depends_on = None
+
+INDEX = "ix_wishlist_items_wishlist_id_product_id"
+
+
+def _has_wishlist_items(bind):
+    schema = "public" if bind.dialect.name == "postgresql" else None
+    return sa.inspect(bind).has_table("wishlist_items", schema=schema)
+
+
+def _has_unique_lookup(bind):
+    # a unique constraint/index leading with (wishlist_id, product_id) already
+    # serves these lookups
+    schema = "public" if bind.dialect.name == "postgresql" else None
+    inspector = sa.inspect(bind)
+    uniques = [c["column_names"] for c in inspector.get_unique_constraints("wishlist_items", schema=schema)]
+    uniques += [i["column_names"] for i in inspector.get_indexes("wishlist_items", schema=schema) if i["unique"]]
+    return any(cols[:2] == ["wishlist_id", "product_id"] for cols in uniques)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if not _has_wishlist_items(bind) or _has_unique_lookup(bind):
+        return
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX} ON public.wishlist_items (wishlist_id, product_id)")
+    else:
+        op.create_index(INDEX, "wishlist_items", ["wishlist_id", "product_id"], if_not_exists=True)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS public.{INDEX}")
+    elif _has_wishlist_items(bind):
+        op.drop_index(INDEX, table_name="wishlist_items", if_exists=True)
@@ -0,0 +1,43 @@
+"""Index for newest-first wishlist pages
+
+Backs the keyset pagination of GET /wishlist on (added_at, id) within one
+wishlist.
+
+Revision ID: 0004_wishlist_items_recent_index
+Revises: 0003_wishlist_item_lookup_index
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_wishlist_items_recent_index"
+down_revision = "0003_wishlist_item_lookup_index"
+branch_labels = None
+depends_on = None
+
+INDEX = "ix_wishlist_items_wishlist_id_added_at_id"
+
+
+def _has_wishlist_items(bind):
+    schema = "public" if bind.dialect.name == "postgresql" else None
+    return sa.inspect(bind).has_table("wishlist_items", schema=schema)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if not _has_wishlist_items(bind):
+        return
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX} ON public.wishlist_items (wishlist_id, added_at DESC, id DESC)")
+    else:
+        op.create_index(INDEX, "wishlist_items", ["wishlist_id", sa.text("added_at DESC"), sa.text("id DESC")], if_not_exists=True)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS public.{INDEX}")
+    elif _has_wishlist_items(bind):
+        op.drop_index(INDEX, table_name="wishlist_items", if_exists=True)
@@ -0,0 +1,35 @@
+"""Order line items
+
+Creates order_items so orders keep their lines and the unit price each
+product had when the order was placed.
+
+Revision ID: 0005_order_items
+Revises: 0004_wishlist_items_recent_index
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_order_items"
+down_revision = "0004_wishlist_items_recent_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("order_items"):
+        return
+    op.create_table(
+        "order_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("order_id", sa.Integer(), sa.ForeignKey("orders.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id"), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("unit_price", sa.Float(), nullable=False),
+    )
+    op.create_index("ix_order_items_id", "order_items", ["id"])
+    op.create_index("ix_order_items_order_id", "order_items", ["order_id"])
+
+
+def downgrade():
+    op.drop_table("order_items")
@@ -0,0 +1,30 @@
+"""Product stock for checkout
+
+Adds a nullable products.stock column; NULL means the product's stock is
+not tracked and checkout never blocks on it.
+
+Revision ID: 0006_product_stock
+Revises: 0005_order_items
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_product_stock"
+down_revision = "0005_order_items"
+branch_labels = None
+depends_on = None
+
+
+def _has_stock(bind):
+    return any(c["name"] == "stock" for c in sa.inspect(bind).get_columns("products"))
+
+
+def upgrade():
+    if not _has_stock(op.get_bind()):
+        op.add_column("products", sa.Column("stock", sa.Integer(), nullable=True))
+
+
+def downgrade():
+    if _has_stock(op.get_bind()):
+        op.drop_column("products", "stock")
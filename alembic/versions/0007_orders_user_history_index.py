@@ -0,0 +1,37 @@
+"""Covering index for order history
+
+Backs the keyset pagination of GET /orders on (user_id, created_at, id);
+the order total is carried in the index so a page never reads the table.
+
+Revision ID: 0007_orders_user_history_index
+Revises: 0006_product_stock
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_orders_user_history_index"
+down_revision = "0006_product_stock"
+branch_labels = None
+depends_on = None
+
+INDEX = "ix_orders_user_id_created_at_id"
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX} ON orders (user_id, created_at DESC, id DESC) INCLUDE (total_amount)")
+    else:
+        # no INCLUDE outside Postgres; a trailing key column covers the same
+        op.create_index(INDEX, "orders", ["user_id", sa.text("created_at DESC"), sa.text("id DESC"), "total_amount"], if_not_exists=True)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX}")
+    else:
+        op.drop_index(INDEX, table_name="orders", if_exists=True)
@@ -0,0 +1,49 @@
+"""Catalog version counter
+
+Creates catalog_version and the triggers that bump it on every catalog
+write, so catalog ETags / Last-Modified come from one primary-key lookup
+instead of scanning the catalog tables.
+
+Revision ID: 0009_catalog_version
+Revises: 0008_idempotency_keys
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.catalog_version import CATALOG_TABLES, postgres_catalog_version_ddl, sqlite_catalog_version_ddl
+
+revision = "0009_catalog_version"
+down_revision = "0008_idempotency_keys"
+branch_labels = None
+depends_on = None
+
+
+def _tables(bind):
+    inspector = sa.inspect(bind)
+    schema = "public" if bind.dialect.name == "postgresql" else None
+    return [t for t in CATALOG_TABLES if inspector.has_table(t, schema=schema)]
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        ddl = postgres_catalog_version_ddl(_tables(bind))
+    else:
+        ddl = sqlite_catalog_version_ddl(_tables(bind))
+    for stmt in ddl:
+        op.execute(stmt)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        for table in _tables(bind):
+            op.execute(f"DROP TRIGGER IF EXISTS catalog_version_bump ON public.{table}")
+        op.execute("DROP FUNCTION IF EXISTS public.bump_catalog_version()")
+        op.execute("DROP TABLE IF EXISTS public.catalog_version")
+    else:
+        for table in CATALOG_TABLES:
+            for suffix in ("ai", "ad", "au"):
+                op.execute(f"DROP TRIGGER IF EXISTS {table}_catalog_version_{suffix}")
+        op.execute("DROP TABLE IF EXISTS catalog_version")
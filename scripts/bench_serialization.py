@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+bench_serialization.py
+Compare the per-item cost of serializing a catalog page through FastAPI's
+default path (response_model validation + stdlib JSON) against the trusted
+fast path used when FAST_JSON_RESPONSES is enabled.
+
+Usage: python scripts/bench_serialization.py [--items 100] [--rounds 200]
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.core import responses  # noqa: E402
+from app.models.schemas.product import ProductRead  # noqa: E402
+
+
+def make_rows(n):
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    return [
+        {
+            "id": i,
+            "product_name": f"Product {i}",
+            "category": "shoes",
+            "rating": 4.5,
+            "people_rated_count": 120 + i,
+            "description": "Lightweight everyday sneaker with a breathable mesh upper.",
+            "img_url": f"https://cdn.example.com/products/{i}.jpg",
+            "real_price": 79.99,
+            "current_price": 59.99,
+            "created_at": now,
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def default_path(rows, adapter):
+    # What FastAPI does for `response_model=List[ProductRead]` + JSONResponse
+    validated = adapter.validate_python(rows)
+    content = adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(rows):
+    return responses.FastJSONResponse(rows).body
+
+
+def bench(fn, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100, help="Rows per page")
+    parser.add_argument("--rounds", type=int, default=200, help="Pages serialized per measurement")
+    args = parser.parse_args()
+
+    rows = make_rows(args.items)
+    adapter = TypeAdapter(List[ProductRead])
+    # warm up both paths
+    default_path(rows, adapter)
+    fast_path(rows)
+
+    default_s = bench(lambda: default_path(rows, adapter), args.rounds)
+    fast_s = bench(lambda: fast_path(rows), args.rounds)
+    total_items = args.items * args.rounds
+    encoder = "orjson" if responses.orjson is not None else "json (orjson not installed)"
+
+    print(f"[bench_serialization] {args.items} items/page x {args.rounds} pages, fast encoder: {encoder}")
+    print(f"  default (validate + stdlib json): {default_s / total_items * 1e6:8.2f} us/item")
+    print(f"  fast (trusted rows + {encoder.split()[0]}):    {fast_s / total_items * 1e6:8.2f} us/item")
+    print(f"  speedup: {default_s / fast_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+manage.py
+Operational commands that run against the configured DATABASE_URL.
+
+Usage:
+  python scripts/manage.py import-products catalog.csv
+  python scripts/manage.py import-products catalog.ndjson --format ndjson
+  python scripts/manage.py reprice-carts [--product-ids 1,2,3] [--batch-size 1000]
+  python scripts/manage.py sweep-idempotency-keys [--batch-size 1000]
+  python scripts/manage.py set-user-active user@example.com --inactive
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from app.db.session import SessionLocal  # noqa: E402
+
+
+def import_products_cmd(args):
+    from app.db.repositories.product_io import IMPORT_FORMATS, import_products
+
+    path = Path(args.path)
+    fmt = args.format or ("csv" if path.suffix.lower() == ".csv" else "ndjson")
+    if fmt not in IMPORT_FORMATS:
+        print(f"[manage] unsupported format: {fmt}", file=sys.stderr)
+        return 2
+    db = SessionLocal()
+    try:
+        with path.open("r", encoding="utf-8-sig", newline="") as stream:
+            report = import_products(db, stream, fmt, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    print(json.dumps(report, indent=2))
+    return 0 if report["failed"] == 0 else 1
+
+
+def reprice_carts_cmd(args):
+    from app.core.cache import InMemoryBackend
+    from app.db.repositories.crud_cart import cart_cache, reprice_carts
+
+    if isinstance(cart_cache.backend, InMemoryBackend):
+        # the bumps would only reach this process, not the web workers
+        print("[manage] CACHE_BACKEND=memory is process-local; use redis (or local, which disables the cart cache) so workers see repriced carts", file=sys.stderr)
+        return 2
+
+    product_ids = [int(p) for p in args.product_ids.split(",") if p.strip()] if args.product_ids else None
+    db = SessionLocal()
+    try:
+        report = reprice_carts(db, product_ids=product_ids, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+def sweep_idempotency_keys_cmd(args):
+    from app.db.repositories.crud_idempotency import sweep_expired
+
+    db = SessionLocal()
+    try:
+        removed = sweep_expired(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(json.dumps({"removed": removed}, indent=2))
+    return 0
+
+
+def set_user_active_cmd(args):
+    from app.db.repositories.crud_user import get_user_by_email, set_user_active
+
+    db = SessionLocal()
+    try:
+        user = get_user_by_email(db, args.email)
+        if user is None:
+            print(f"[manage] no such user: {args.email}", file=sys.stderr)
+            return 1
+        user = set_user_active(db, user, not args.inactive)
+        print(json.dumps({"id": user.id, "email": user.email, "is_active": user.is_active}, indent=2))
+    finally:
+        db.close()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DripHub backend management commands")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import-products", help="Bulk import products from a CSV or NDJSON file")
+    p.add_argument("path", help="Input file (.csv or .ndjson)")
+    p.add_argument("--format", choices=["csv", "ndjson"], help="Input format (default: from the file extension)")
+    p.add_argument("--chunk-size", type=int, default=1000, help="Rows written per batch")
+    p.set_defaults(func=import_products_cmd)
+
+    p = sub.add_parser("reprice-carts", help="Update price_at_add of active cart lines to current product prices")
+    p.add_argument("--product-ids", help="Comma-separated product ids to limit the run to (default: all)")
+    p.add_argument("--batch-size", type=int, default=1000, help="Cart lines updated per transaction")
+    p.set_defaults(func=reprice_carts_cmd)
+
+    p = sub.add_parser("sweep-idempotency-keys", help="Delete expired Idempotency-Key records (run periodically, e.g. from cron)")
+    p.add_argument("--batch-size", type=int, default=1000, help="Records deleted per transaction")
+    p.set_defaults(func=sweep_idempotency_keys_cmd)
+
+    p = sub.add_parser("set-user-active", help="Activate or deactivate a local user")
+    p.add_argument("email", help="User email")
+    p.add_argument("--inactive", action="store_true", help="Deactivate instead of activate")
+    p.set_defaults(func=set_user_active_cmd)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
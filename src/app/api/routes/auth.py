@@ -4,29 +4,43 @@ from app.core.exceptions import HTTPException
 from sqlalchemy.orm import Session
 from app import schemas
 from app.db.session import get_db
-from app.core.security import create_access_token
+from app.core.security import PasswordHasherBusy, create_access_token, get_password_hash_async, verify_password_async
 from datetime import timedelta
 from app.core.config import settings
-from app.db.repositories.crud_user import authenticate_user, create_user, get_user_by_email
+from app.db.repositories.crud_user import create_user, get_user_by_email
 import logging
 from sqlalchemy.exc import SQLAlchemyError, OperationalError
+from starlette.concurrency import run_in_threadpool
 
 router = APIRouter()
 
 
+def _hasher_busy():
+    return HTTPException(status_code=503, message="Too many authentication requests, please retry shortly", headers={"Retry-After": "1"})
+
+
+# Login and register are async: DB calls go to the default threadpool while
+# bcrypt runs on the dedicated password hashing pool, so a burst of logins
+# cannot tie up the workers that serve every other sync route.
 @router.post("/login", response_model=schemas.user.Token)
-def login(login_data: schemas.user.UserLogin, db: Session = Depends(get_db)):
-    user = authenticate_user(db, login_data.username, login_data.password)
-    if not user:
+async def login(login_data: schemas.user.UserLogin, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(get_user_by_email, db, login_data.username)
+    try:
+        valid = user is not None and await verify_password_async(login_data.password, user.hashed_password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+    if not valid:
         raise HTTPException(status_code=400, message="Incorrect email or password")
+    if not user.is_active:
+        raise HTTPException(status_code=403, message="Inactive user")
     access_token = create_access_token(subject=user.email, expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.post("/register", response_model=schemas.user.UserWithToken)
-def register(user_in: schemas.user.UserCreate, db: Session = Depends(get_db)):
+async def register(user_in: schemas.user.UserCreate, db: Session = Depends(get_db)):
     try:
-        existing = get_user_by_email(db, user_in.email)
+        existing = await run_in_threadpool(get_user_by_email, db, user_in.email)
     except OperationalError:
         logging.exception("Database connection failed when checking existing user")
         raise HTTPException(status_code=503, message="Database unavailable, please try again later")
@@ -36,7 +50,11 @@ def register(user_in: schemas.user.UserCreate, db: Session = Depends(get_db)):
     if existing:
         raise HTTPException(status_code=400, message="Email already registered")
     try:
-        user = create_user(db, user_in)
+        hashed = await get_password_hash_async(user_in.password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+    try:
+        user = await run_in_threadpool(create_user, db, user_in, hashed)
     except SQLAlchemyError as e:
         logging.exception("Failed to create user due to database error")
         raise HTTPException(status_code=503, message="Database unavailable, please try again later")
@@ -1,77 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from typing import Optional
 from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.models.schemas import cart as cart_schemas
+from app.core.responses import trusted_response
+from app.db.repositories import crud_cart
+from app.core.idempotency import IDEMPOTENCY_HEADER, idempotent
+from app.core.supabase_auth import get_current_user
 
 router = APIRouter()
 
 
-def _get_user_id_from_dep():
-    # placeholder dependency - adapt to your auth dependency
-    # for now assume user_id=1 for testing; replace with real auth dependency
-    return 1
+def _get_user_id_from_dep(current_user = Depends(get_current_user)):
+    # carts (and their Idempotency-Key records) belong to the caller; this is
+    # also the user POST /orders/checkout converts the cart for
+    return current_user.id
 
 
 @router.get("/", response_model=cart_schemas.Cart)
 def get_cart(db: Session = Depends(get_db), user_id: int = Depends(_get_user_id_from_dep)):
-    # load or create cart for user
-    row = db.execute("SELECT id FROM public.carts WHERE owner_user_id = %s AND status='active' LIMIT 1", (user_id,)).fetchone()
-    if not row:
+    cart = crud_cart.cached_get_active_cart(db, user_id)
+    if cart is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="cart not found")
-    cart_id = row[0]
-    items = db.execute(
-        """
-     SELECT ci.id, ci.product_id, ci.quantity, ci.price_at_add, ci.metadata,
-         p.id AS p_id, p.product_name AS p_title, p.description AS p_description, p.current_price AS p_price, p.real_price AS p_real_price
-        FROM public.cart_items ci
-        LEFT JOIN public.products p ON p.id = ci.product_id
-        WHERE ci.cart_id = %s
-        """,
-        (cart_id,)
-    ).fetchall()
-    cart_items = []
-    for it in items:
-        product = None
-        if it[5] is not None:
-            # ProductRead schema expects product_name/real_price/current_price; cart uses ProductRead for nested product.
-            # We populate product_name from p_title and current_price from p_price (fallback to real_price if needed).
-            product = cart_schemas.ProductRead(
-                id=it[5],
-                product_name=it[6],
-                description=it[7],
-                current_price=float(it[8]) if it[8] is not None else (float(it[9]) if it[9] is not None else None),
-                real_price=(float(it[9]) if it[9] is not None else None),
-            )
-        cart_items.append(cart_schemas.CartItemResponse(item_id=it[0], product_id=it[1], quantity=it[2], price_at_add=float(it[3]), metadata=it[4] or {}, product=product))
-    return cart_schemas.Cart(cart_id=cart_id, owner_user_id=user_id, items=cart_items)
+    return trusted_response(cart)
 
 
 @router.post("/items", response_model=cart_schemas.CartItemResponse, status_code=201)
-def add_cart_item(payload: cart_schemas.CartItemCreate, db: Session = Depends(get_db), user_id: int = Depends(_get_user_id_from_dep)):
-    # ensure cart
-    row = db.execute("SELECT id FROM public.carts WHERE owner_user_id = %s AND status='active' LIMIT 1", (user_id,)).fetchone()
-    if not row:
-        db.execute("INSERT INTO public.carts (owner_user_id) VALUES (%s)", (user_id,))
-        cart_id = db.execute("SELECT id FROM public.carts WHERE owner_user_id = %s AND status='active' LIMIT 1", (user_id,)).fetchone()[0]
-    else:
-        cart_id = row[0]
-    # get current price
-    prod = db.execute("SELECT id, product_name, description, current_price, real_price FROM public.products WHERE id=%s", (payload.product_id,)).fetchone()
-    if not prod:
-        raise HTTPException(status_code=404, detail="product not found")
-    # prefer current_price for cart price, fallback to real_price
-    price = prod[3] if prod[3] is not None else prod[4]
-    # upsert into cart_items
-    db.execute("INSERT INTO public.cart_items (cart_id,product_id,quantity,price_at_add,metadata) VALUES (%s,%s,%s,%s,%s) ON CONFLICT (cart_id,product_id) DO UPDATE SET quantity = public.cart_items.quantity + EXCLUDED.quantity", (cart_id,payload.product_id,payload.quantity,price, payload.metadata))
-    db.commit()
-    it = db.execute("SELECT id,product_id,quantity,price_at_add,metadata FROM public.cart_items WHERE cart_id=%s AND product_id=%s", (cart_id,payload.product_id)).fetchone()
-    product = cart_schemas.ProductRead(
-        id=prod[0],
-        product_name=prod[1],
-        description=prod[2],
-        current_price=float(prod[3]) if prod[3] is not None else (float(prod[4]) if prod[4] is not None else None),
-        real_price=(float(prod[4]) if prod[4] is not None else None),
+def add_cart_item(payload: cart_schemas.CartItemCreate, db: Session = Depends(get_db), user_id: int = Depends(_get_user_id_from_dep), idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER)):
+    def add(commit: bool = True):
+        # one statement: ensure cart, price lookup, upsert, joined result
+        item = crud_cart.add_cart_item(db, user_id, payload.product_id, payload.quantity, payload.metadata, commit=commit)
+        if item is None:
+            raise HTTPException(status_code=404, detail="product not found")
+        return item
+    if idempotency_key is None:
+        return trusted_response(add(), status_code=201)
+    # a retried add must not increment the quantity again; the line and the
+    # stored response commit together
+    return idempotent(
+        db, idempotency_key, user_id, "POST /cart/items", payload, lambda: add(commit=False), cart_schemas.CartItemResponse,
+        status_code=201, after_commit=lambda: crud_cart.cart_cache.bump(user_id),
     )
-    return cart_schemas.CartItemResponse(item_id=it[0], product_id=it[1], quantity=it[2], price_at_add=float(it[3]), metadata=it[4] or {}, product=product)
+
+
+@router.patch("/items", response_model=cart_schemas.Cart)
+def update_cart_items(payload: cart_schemas.CartBatchUpdate, db: Session = Depends(get_db), user_id: int = Depends(_get_user_id_from_dep)):
+    """Apply a batch of add / set / remove operations in one transaction."""
+    cart = crud_cart.apply_cart_operations(db, user_id, payload.operations)
+    if cart is None:
+        raise HTTPException(status_code=404, detail="product not found")
+    return trusted_response(cart)
 # Note: keep the router defined above; no adapter rebind necessary after migration
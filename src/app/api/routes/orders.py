@@ -1,27 +1,62 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Query, Response
 from app.core.exceptions import HTTPException
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.db.session import get_db
 from app.models.schemas.order import OrderCreate, OrderRead
-from app.db.repositories.crud_order import create_order as crud_create_order, get_order as crud_get_order
+from app.db.repositories.crud_order import CheckoutBusy, EmptyCart, OutOfStock, UnknownProducts, checkout_cart, create_order as crud_create_order, get_order as crud_get_order, list_orders_page
+from app.api.routes.products import NEXT_CURSOR_HEADER
 from app.core.supabase_auth import get_current_user
+from app.core.idempotency import IDEMPOTENCY_HEADER, idempotent
 
 router = APIRouter()
 
+@router.get("/", response_model=List[OrderRead], response_model_exclude_unset=True)
+def list_orders(response: Response, limit: int = Query(20, ge=1, le=100), cursor: Optional[str] = None, include_items: bool = False, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+	"""The current user's orders, newest first; the next page's cursor is
+	returned in the X-Next-Cursor header."""
+	try:
+		orders, next_cursor = list_orders_page(db, current_user.id, limit=limit, cursor=cursor, include_items=include_items)
+	except ValueError:
+		raise HTTPException(status_code=400, message="Invalid cursor")
+	if next_cursor:
+		response.headers[NEXT_CURSOR_HEADER] = next_cursor
+	return orders
+
 @router.post("/", response_model=OrderRead)
-def create_order(order_in: OrderCreate, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-	# naive total calculation for demo
-	total = sum([1.0 * item.quantity for item in order_in.items])
-	# use the authenticated local user's id
-	user_id = current_user.id
-	db_order = crud_create_order(db, user_id=user_id, total=total)
+def create_order(order_in: OrderCreate, db: Session = Depends(get_db), current_user = Depends(get_current_user), idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER)):
+	def place_order():
+		# prices and the total come from the products table, never the client
+		try:
+			# with a key, idempotent() commits the order together with its stored response
+			return crud_create_order(db, user_id=current_user.id, items=order_in.items, commit=idempotency_key is None)
+		except UnknownProducts as e:
+			raise HTTPException(status_code=404, message=f"Products not found: {e.product_ids}")
+	# retries with the same key replay the first response instead of ordering again
+	return idempotent(db, idempotency_key, current_user.id, "POST /orders", order_in, place_order, OrderRead)
+
+@router.post("/checkout", response_model=OrderRead)
+def checkout(db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+	"""Convert the active cart into an order, reserving stock atomically."""
+	try:
+		db_order = checkout_cart(db, current_user.id)
+	except EmptyCart:
+		raise HTTPException(status_code=400, message="Cart is empty")
+	except UnknownProducts as e:
+		raise HTTPException(status_code=409, message=f"Products unavailable: {e.product_ids}")
+	except OutOfStock as e:
+		raise HTTPException(status_code=409, message=f"Insufficient stock for products: {e.product_ids}")
+	except CheckoutBusy:
+		raise HTTPException(status_code=503, message="Checkout is busy, please retry shortly", headers={"Retry-After": "1"})
+	if db_order is None:
+		raise HTTPException(status_code=404, message="Cart not found")
 	return db_order
 
 @router.get("/{order_id}", response_model=OrderRead)
 def read_order(order_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
 	db_order = crud_get_order(db, order_id)
-	if not db_order:
-		raise HTTPException(status_code=404, detail="Order not found")
+	# other users' orders are reported as missing rather than forbidden
+	if not db_order or (db_order.user_id != current_user.id and not current_user.is_superuser):
+		raise HTTPException(status_code=404, message="Order not found")
 	return db_order
@@ -1,42 +1,181 @@
-from fastapi import APIRouter, Depends
+import io
+import tempfile
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from app.core.exceptions import HTTPException
 from sqlalchemy.orm import Session
-from typing import List
-from app.db.session import get_db
-from app.models.schemas.product import ProductCreate, ProductRead
+from typing import List, Literal, Optional
+from app.db.session import SessionLocal, get_db
+from app.models.schemas.product import CatalogProduct, ProductCreate, ProductRead, ProductFacets, ProductImportReport
 from app.schemas.featured_product import FeaturedProduct
 from app.core.supabase_auth import get_current_user
-from app.db.repositories.crud_product import create_product, list_products as repo_list_products
-from app.db.repositories.crud_product import list_featured_products
+from app.core.responses import trusted_response
+from app.core.http_cache import is_not_modified, make_etag, not_modified_response, set_validators
+from app.db.repositories.crud_product import create_product
+from app.db.repositories.crud_product import cached_list_products, cached_list_products_page
+from app.db.repositories.crud_product import cached_list_featured_products, cached_list_featured_products_page
+from app.db.repositories.crud_product import cached_catalog_version, cached_get_catalog_product, cached_search_products
+from app.db.repositories.crud_product import cached_product_facets
+from app.db.repositories.crud_wishlist import wishlist_contains
+from app.db.repositories.product_io import export_csv, export_ndjson, import_products
 
 router = APIRouter()
 
+# Keyset pages hand the opaque cursor for the following page back in this
+# header so the list response body keeps its original shape.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class ProductFilters:
+    """Catalog filters shared by the listing and facet endpoints."""
+
+    def __init__(
+        self,
+        category: Optional[str] = None,
+        min_price: Optional[float] = Query(None, ge=0),
+        max_price: Optional[float] = Query(None, ge=0),
+        min_rating: Optional[float] = Query(None, ge=0, le=5),
+    ):
+        self.category = category
+        self.min_price = min_price
+        self.max_price = max_price
+        self.min_rating = min_rating
+
+    def as_dict(self):
+        return {"category": self.category, "min_price": self.min_price, "max_price": self.max_price, "min_rating": self.min_rating}
+
 @router.post("/", response_model=ProductRead)
 def create(product_in: ProductCreate, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
     return create_product(db, product_in)
 
-@router.get("/", response_model=List[ProductRead])
-def list_products(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    return repo_list_products(db, skip=skip, limit=limit)
+
+@router.post("/import", response_model=ProductImportReport)
+async def import_catalog(request: Request, format: Optional[Literal["csv", "ndjson"]] = None, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    """Bulk import products from a CSV (with header row) or NDJSON body.
+
+    The body is spooled to a temporary file as it arrives and imported in
+    chunks off the event loop, so memory stays flat for large catalogs.
+    """
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    with tempfile.TemporaryFile() as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        stream = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+        try:
+            return await run_in_threadpool(import_products, db, stream, fmt)
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, message="Import body must be UTF-8")
+        finally:
+            stream.detach()
+
+@router.get("/", response_model=List[CatalogProduct], response_model_exclude_unset=True)
+def list_products(request: Request, response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, sort: Optional[Literal["price", "rating", "newest"]] = None, with_wishlist: bool = False, filters: ProductFilters = Depends(), db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    filters = filters.as_dict()
+    # Answer conditional requests from the catalog version alone, before any
+    # rows are fetched, converted or validated. With with_wishlist the body
+    # depends on the caller's wishlist too, so no validators are issued.
+    if not with_wishlist:
+        version = cached_catalog_version(db)
+        etag = make_etag("products", version.tag, skip, limit, cursor, sort, sorted(filters.items()))
+        if is_not_modified(request, etag, version.last_modified):
+            return not_modified_response(etag, version.last_modified)
+        set_validators(response, etag, version.last_modified)
+    # Legacy clients paging with skip keep the offset behaviour; everything
+    # else (first page or an explicit cursor) uses keyset pagination and
+    # receives the next page's cursor in the X-Next-Cursor header.
+    if skip and not cursor:
+        results = cached_list_products(db, skip=skip, limit=limit, filters=filters, sort=sort)
+    else:
+        try:
+            results, next_cursor = cached_list_products_page(db, limit=limit, cursor=cursor, filters=filters, sort=sort)
+        except ValueError:
+            raise HTTPException(status_code=400, message="Invalid cursor")
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if with_wishlist:
+        # one indexed membership lookup for the whole page; cached rows are
+        # shared, so annotate copies
+        wished = set(wishlist_contains(db, current_user.id, [r["id"] for r in results]))
+        results = [dict(r, in_wishlist=r["id"] in wished) for r in results]
+    return trusted_response(results, response)
 
 
 @router.get("/features", response_model=List[FeaturedProduct])
-def list_featured(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    rows = list_featured_products(db, skip=skip, limit=limit)
-    # rows are SQLAlchemy Row objects; convert to dict-like mappings that
-    # Pydantic can parse via from_attributes=True
-    results = []
-    for r in rows:
-        results.append({
-            "id": r[0],
-            "product_name": r[1],
-            "category": r[2],
-            "rating": float(r[3]) if r[3] is not None else None,
-            "people_rated_count": int(r[4]) if r[4] is not None else None,
-            "description": r[5],
-            "img_url": r[6],
-            "real_price": float(r[7]) if r[7] is not None else None,
-            "current_price": float(r[8]) if r[8] is not None else None,
-            "created_at": r[9],
-        })
-    return results
+def list_featured(request: Request, response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    version = cached_catalog_version(db)
+    etag = make_etag("features", version.tag, skip, limit, cursor)
+    if is_not_modified(request, etag, version.last_modified):
+        return not_modified_response(etag, version.last_modified)
+    set_validators(response, etag, version.last_modified)
+    if skip and not cursor:
+        results = cached_list_featured_products(db, skip=skip, limit=limit)
+    else:
+        try:
+            results, next_cursor = cached_list_featured_products_page(db, limit=limit, cursor=cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, message="Invalid cursor")
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return trusted_response(results, response)
+
+
+@router.get("/facets", response_model=ProductFacets)
+def facets(request: Request, response: Response, filters: ProductFilters = Depends(), db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    filters = filters.as_dict()
+    version = cached_catalog_version(db)
+    etag = make_etag("facets", version.tag, sorted(filters.items()))
+    if is_not_modified(request, etag, version.last_modified):
+        return not_modified_response(etag, version.last_modified)
+    set_validators(response, etag, version.last_modified)
+    return trusted_response(cached_product_facets(db, filters=filters), response)
+
+
+@router.get("/search", response_model=List[ProductRead])
+def search(request: Request, response: Response, q: str = Query(..., min_length=1, max_length=200), limit: int = Query(20, ge=1, le=100), cursor: Optional[str] = None, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    version = cached_catalog_version(db)
+    etag = make_etag("search", version.tag, q, limit, cursor)
+    if is_not_modified(request, etag, version.last_modified):
+        return not_modified_response(etag, version.last_modified)
+    set_validators(response, etag, version.last_modified)
+    try:
+        results, next_cursor = cached_search_products(db, q, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, message="Invalid cursor")
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return trusted_response(results, response)
+
+
+@router.get("/export")
+def export_catalog(format: Literal["ndjson", "csv"] = "ndjson", current_user = Depends(get_current_user)):
+    """Stream the full merged catalog as NDJSON (default) or CSV."""
+    encode = export_csv if format == "csv" else export_ndjson
+
+    # The request-scoped session is closed before the body is streamed, so
+    # the generator owns its own session for the lifetime of the cursor.
+    def body():
+        db = SessionLocal()
+        try:
+            yield from encode(db)
+        finally:
+            db.close()
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="products.{format}"'}
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
+
+
+@router.get("/{product_id}", response_model=ProductRead)
+def read_product(product_id: int, request: Request, response: Response, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    version = cached_catalog_version(db)
+    etag = make_etag("product", version.tag, product_id)
+    if is_not_modified(request, etag, version.last_modified):
+        return not_modified_response(etag, version.last_modified)
+    product = cached_get_catalog_product(db, product_id)
+    if product is None:
+        raise HTTPException(status_code=404, message="Product not found")
+    set_validators(response, etag, version.last_modified)
+    return trusted_response(product, response)
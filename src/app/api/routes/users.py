@@ -10,5 +10,5 @@ router = APIRouter()
 
 @router.get("/me")
 def read_users_me(current_user = Depends(get_current_user)):
-    # current_user is the local DB user model
+    # current_user is a UserSnapshot of the local DB user
     return {"id": current_user.id, "email": current_user.email, "is_active": current_user.is_active}
@@ -1,36 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import List, Optional
 from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.models.schemas import wishlist as wl_schemas
+from app.core.responses import trusted_response
+from app.db.repositories import crud_wishlist
+from app.db.repositories.crud_wishlist import wishlist_contains
+from app.api.routes.products import NEXT_CURSOR_HEADER
+from app.core.supabase_auth import get_current_user
 
 router = APIRouter()
 
 
-def _get_user_id_from_dep():
-    # placeholder dependency - adapt to your auth dependency
-    return 1
+def _get_user_id_from_dep(current_user = Depends(get_current_user)):
+    # the same id products.py uses for `with_wishlist`, so both agree
+    return current_user.id
+
+
+# Upper bound on ids per membership lookup (a full product grid page)
+MAX_CONTAINS_IDS = 200
+
+
+def parse_product_ids(product_ids: str = Query(..., description="Comma-separated product ids")) -> List[int]:
+    try:
+        ids = sorted({int(p) for p in product_ids.split(",") if p.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="product_ids must be comma-separated integers")
+    if len(ids) > MAX_CONTAINS_IDS:
+        raise HTTPException(status_code=400, detail=f"at most {MAX_CONTAINS_IDS} product ids per request")
+    return ids
+
+
+@router.get("/contains", response_model=wl_schemas.WishlistContains)
+def contains(product_ids: List[int] = Depends(parse_product_ids), db: Session = Depends(get_db), user_id: int = Depends(_get_user_id_from_dep)):
+    """Which of the given products are on the wishlist (one indexed lookup)."""
+    return trusted_response({"product_ids": wishlist_contains(db, user_id, product_ids)})
 
 
 @router.get("/", response_model=List[wl_schemas.WishlistItemResponse])
-def get_wishlist(db: Session = Depends(get_db), user_id: int = Depends(_get_user_id_from_dep)):
-    row = db.execute("SELECT id FROM public.wishlists WHERE user_id=%s LIMIT 1", (user_id,)).fetchone()
-    if not row:
+def get_wishlist(response: Response, limit: int = Query(50, ge=1, le=200), cursor: Optional[str] = None, db: Session = Depends(get_db), user_id: int = Depends(_get_user_id_from_dep)):
+    """Newest-first wishlist page with product data; the next page's cursor
+    is returned in the X-Next-Cursor header."""
+    try:
+        items, next_cursor = crud_wishlist.list_wishlist_page(db, user_id, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not items and cursor is None and crud_wishlist.get_wishlist_id(db, user_id) is None:
         raise HTTPException(status_code=404, detail="wishlist not found")
-    wishlist_id = row[0]
-    items = db.execute("SELECT id,product_id,added_at,note FROM public.wishlist_items WHERE wishlist_id=%s ORDER BY added_at DESC", (wishlist_id,)).fetchall()
-    return [wl_schemas.WishlistItemResponse(item_id=i[0], product_id=i[1], added_at=i[2], note=i[3]) for i in items]
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return trusted_response(items, response)
 
 
 @router.post("/items", response_model=wl_schemas.WishlistItemResponse, status_code=201)
 def add_wishlist_item(payload: wl_schemas.WishlistItemCreate, db: Session = Depends(get_db), user_id: int = Depends(_get_user_id_from_dep)):
-    row = db.execute("SELECT id FROM public.wishlists WHERE user_id=%s LIMIT 1", (user_id,)).fetchone()
-    if not row:
-        db.execute("INSERT INTO public.wishlists (user_id,name) VALUES (%s,%s)", (user_id, 'Default'))
-        wishlist_id = db.execute("SELECT id FROM public.wishlists WHERE user_id=%s LIMIT 1", (user_id,)).fetchone()[0]
-    else:
-        wishlist_id = row[0]
-    db.execute("INSERT INTO public.wishlist_items (wishlist_id,product_id,note) VALUES (%s,%s,%s) ON CONFLICT DO NOTHING", (wishlist_id, payload.product_id, payload.note))
-    db.commit()
-    it = db.execute("SELECT id,product_id,added_at,note FROM public.wishlist_items WHERE wishlist_id=%s AND product_id=%s", (wishlist_id, payload.product_id)).fetchone()
-    return wl_schemas.WishlistItemResponse(item_id=it[0], product_id=it[1], added_at=it[2], note=it[3])
+    item = crud_wishlist.add_wishlist_item(db, user_id, payload.product_id, payload.note)
+    return trusted_response(item, status_code=201)
+
+
+@router.post("/items/batch", response_model=wl_schemas.WishlistBatchResult)
+def update_wishlist_items(payload: wl_schemas.WishlistBatchUpdate, db: Session = Depends(get_db), user_id: int = Depends(_get_user_id_from_dep)):
+    """Add and remove many products with one multi-row INSERT and one DELETE."""
+    result = crud_wishlist.update_wishlist_items(db, user_id, [(i.product_id, i.note) for i in payload.add], payload.remove)
+    return trusted_response(result)
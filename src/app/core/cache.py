@@ -0,0 +1,426 @@
+"""In-process and shared caching primitives.
+
+`TieredCache` combines a per-process LRU+TTL tier with an optional shared
+tier (Redis in production, an in-memory stand-in for local runs/tests) and
+coalesces concurrent misses for the same key into a single load. Entries are
+namespaced by a generation counter kept in the shared tier, so invalidating
+in one worker makes every worker stop serving the old entries.
+"""
+import asyncio
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from app.core.config import settings
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_MISSING = object()
+
+
+class CacheStats:
+    """Thread-safe named counters, reported via `snapshot()`."""
+
+    def __init__(self, *names: str):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {name: 0 for name in names}
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+
+class LRUTTLCache:
+    """Bounded LRU mapping whose entries also expire after a TTL."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0, stats: Optional[CacheStats] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = stats or CacheStats("evictions", "expirations")
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.stats.incr("expirations")
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats.incr("evictions")
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class InMemoryBackend:
+    """Shared-tier stand-in with the same surface as `RedisBackend`.
+
+    Only shared within one process; used for local runs and tests.
+    """
+
+    def __init__(self):
+        self._cache = LRUTTLCache(maxsize=10_000, ttl=3600)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._cache.set(key, value, ttl=ttl)
+
+    def delete(self, key: str) -> None:
+        self._cache.delete(key)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = int(self._cache.get(key) or 0) + 1
+            self._cache.set(key, str(value).encode(), ttl=10 * 365 * 24 * 3600)
+            return value
+
+
+class RedisBackend:
+    """Shared tier backed by Redis (requires the optional `redis` package)."""
+
+    def __init__(self, url: str):
+        import redis  # optional dependency
+
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._client.set(key, value, px=max(1, int(ttl * 1000)))
+
+    def delete(self, key: str) -> None:
+        self._client.delete(key)
+
+    def incr(self, key: str) -> int:
+        return int(self._client.incr(key))
+
+
+_shared_backend = _MISSING
+
+
+def get_shared_backend():
+    """Return the process-wide shared tier configured by CACHE_BACKEND.
+
+    Returns None when only the in-process tier is enabled (the default) or
+    when the Redis backend cannot be created.
+    """
+    global _shared_backend
+    if _shared_backend is not _MISSING:
+        return _shared_backend
+    backend = None
+    kind = settings.CACHE_BACKEND
+    if kind == "memory":
+        backend = InMemoryBackend()
+    elif kind == "redis":
+        if not settings.CACHE_REDIS_URL:
+            logger.warning("cache.redis_url_missing")
+        else:
+            try:
+                backend = RedisBackend(settings.CACHE_REDIS_URL)
+            except ImportError:
+                logger.warning("cache.redis_not_installed")
+    _shared_backend = backend
+    return backend
+
+
+class _Call:
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one execution.
+
+    The first caller for a key runs `fn`; callers arriving while it is in
+    flight block and receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]):
+        """Return (value, shared) where shared is True for coalesced callers."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+        try:
+            call.value = fn()
+            return call.value, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+
+class AsyncSingleFlight:
+    """`SingleFlight` for coroutines running on one event loop.
+
+    The first caller for a key starts `fn()` as its own task; every caller,
+    the first included, awaits that task through `asyncio.shield`, so a
+    cancelled caller (say, a disconnected client) stops waiting without
+    cancelling the call the others are waiting for. `fn` must therefore not
+    depend on resources owned by the first caller's request.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]):
+        """Return (value, shared) where shared is True for coalesced callers."""
+        call = self._calls.get(key)
+        shared = call is not None
+        if not shared:
+            call = self._calls[key] = asyncio.ensure_future(fn())
+            call.add_done_callback(lambda task: self._done(key, task))
+        return await asyncio.shield(call), shared
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # mark retrieved so a call whose waiters all left does not log a warning
+            task.exception()
+
+
+class TieredCache:
+    """Read-through cache: in-process LRU+TTL tier, then an optional shared tier.
+
+    `invalidate()` bumps a generation counter that is part of every key. With a
+    shared backend the counter lives there, and other workers notice the bump
+    within `generation_check_interval` seconds; without one only the calling
+    process is invalidated and others serve their entries until the TTL.
+    """
+
+    def __init__(self, namespace: str, maxsize: int = 1024, ttl: float = 60.0, backend=None, generation_check_interval: float = 1.0):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.backend = backend
+        self.generation_check_interval = generation_check_interval
+        self._stats = CacheStats("hits", "shared_hits", "misses", "coalesced", "loads", "load_errors", "invalidations", "shared_errors")
+        self._local = LRUTTLCache(maxsize=maxsize, ttl=ttl)
+        self._flight = SingleFlight()
+        self._generation = 0
+        self._generation_checked_at = 0.0
+        self._generation_key = f"{namespace}:generation"
+
+    def _current_generation(self) -> int:
+        if self.backend is None:
+            return self._generation
+        now = time.monotonic()
+        if now - self._generation_checked_at >= self.generation_check_interval:
+            try:
+                raw = self.backend.get(self._generation_key)
+                self._generation = int(raw) if raw else 0
+            except Exception as e:
+                self._stats.incr("shared_errors")
+                logger.warning("cache.shared_unavailable", namespace=self.namespace, error=str(e))
+            self._generation_checked_at = now
+        return self._generation
+
+    def _shared_key(self, generation: int, key: Hashable) -> str:
+        return f"{self.namespace}:{generation}:{key!r}"
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        generation = self._current_generation()
+        local_key = (generation, key)
+        value = self._local.get(local_key, _MISSING)
+        if value is not _MISSING:
+            self._stats.incr("hits")
+            return value
+
+        def load():
+            if self.backend is not None:
+                try:
+                    raw = self.backend.get(self._shared_key(generation, key))
+                except Exception as e:
+                    raw = None
+                    self._stats.incr("shared_errors")
+                    logger.warning("cache.shared_unavailable", namespace=self.namespace, error=str(e))
+                if raw is not None:
+                    self._stats.incr("shared_hits")
+                    loaded = pickle.loads(raw)
+                    self._local.set(local_key, loaded)
+                    return loaded
+            self._stats.incr("misses")
+            try:
+                loaded = loader()
+            except Exception:
+                self._stats.incr("load_errors")
+                raise
+            self._stats.incr("loads")
+            self._local.set(local_key, loaded)
+            if self.backend is not None:
+                try:
+                    self.backend.set(self._shared_key(generation, key), pickle.dumps(loaded), ttl=self.ttl)
+                except Exception as e:
+                    self._stats.incr("shared_errors")
+                    logger.warning("cache.shared_unavailable", namespace=self.namespace, error=str(e))
+            return loaded
+
+        value, shared = self._flight.do(local_key, load)
+        if shared:
+            self._stats.incr("coalesced")
+        return value
+
+    def invalidate(self) -> None:
+        """Drop every entry in this namespace, in this and all other workers."""
+        if self.backend is not None:
+            try:
+                self._generation = self.backend.incr(self._generation_key)
+                self._generation_checked_at = time.monotonic()
+            except Exception as e:
+                self._stats.incr("shared_errors")
+                logger.warning("cache.shared_unavailable", namespace=self.namespace, error=str(e))
+                self._generation += 1
+        else:
+            self._generation += 1
+        self._local.clear()
+        self._stats.incr("invalidations")
+
+    def stats(self) -> Dict[str, Any]:
+        data = self._stats.snapshot()
+        data.update(self._local.stats.snapshot())
+        data["size"] = len(self._local)
+        data["shared_backend"] = type(self.backend).__name__ if self.backend is not None else None
+        return data
+
+
+class VersionedCache:
+    """Per-key snapshots validated by a per-key version counter.
+
+    Writers call `bump(key)` after committing a change; readers look up the
+    snapshot stored under the key's current version, so a bump makes every
+    older snapshot unreachable at once, without deleting anything. The
+    counters and snapshots live in the shared backend (one backend read per
+    lookup when the local tier already holds the snapshot), so a bump from any
+    worker or CLI process is seen everywhere. Without a backend the cache is
+    disabled and every lookup goes to the loader: per-process counters would
+    let other workers serve stale snapshots.
+    """
+
+    def __init__(self, namespace: str, maxsize: int = 1024, ttl: float = 300.0, backend=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.backend = backend
+        self._stats = CacheStats("hits", "shared_hits", "misses", "bumps", "shared_errors")
+        self._local = LRUTTLCache(maxsize=maxsize, ttl=ttl)
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None and self.ttl > 0
+
+    def _version_key(self, key: Hashable) -> str:
+        return f"{self.namespace}:version:{key!r}"
+
+    def _shared_error(self, e: Exception) -> None:
+        self._stats.incr("shared_errors")
+        logger.warning("cache.shared_unavailable", namespace=self.namespace, error=str(e))
+
+    def version(self, key: Hashable) -> Optional[int]:
+        """Current version of `key`; None when disabled or the shared tier is unreachable."""
+        if not self.enabled:
+            return None
+        try:
+            raw = self.backend.get(self._version_key(key))
+        except Exception as e:
+            self._shared_error(e)
+            return None
+        return int(raw) if raw else 0
+
+    def bump(self, key: Hashable) -> None:
+        if not self.enabled:
+            return
+        self._stats.incr("bumps")
+        try:
+            self.backend.incr(self._version_key(key))
+        except Exception as e:
+            self._shared_error(e)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        if not self.enabled:
+            return loader()
+        version = self.version(key)
+        if version is None:
+            # cannot tell whether a snapshot is current; go to the source
+            self._stats.incr("misses")
+            return loader()
+        local_key = (key, version)
+        value = self._local.get(local_key, _MISSING)
+        if value is not _MISSING:
+            self._stats.incr("hits")
+            return value
+        shared_key = f"{self.namespace}:{version}:{key!r}"
+        try:
+            raw = self.backend.get(shared_key)
+        except Exception as e:
+            raw = None
+            self._shared_error(e)
+        if raw is not None:
+            self._stats.incr("shared_hits")
+            value = pickle.loads(raw)
+            self._local.set(local_key, value)
+            return value
+        self._stats.incr("misses")
+        value = loader()
+        self._local.set(local_key, value)
+        try:
+            self.backend.set(shared_key, pickle.dumps(value), ttl=self.ttl)
+        except Exception as e:
+            self._shared_error(e)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        data = self._stats.snapshot()
+        data.update(self._local.stats.snapshot())
+        data["size"] = len(self._local)
+        data["shared_backend"] = type(self.backend).__name__ if self.backend is not None else None
+        data["enabled"] = self.enabled
+        return data
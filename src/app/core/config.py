@@ -24,5 +24,65 @@ class Settings:
     # When true and SUPABASE_SERVICE_ROLE_KEY is provided, server will use the
     # Supabase Admin API to create users as already-confirmed. Use with caution.
     SUPABASE_AUTO_CONFIRM_SIGNUP: bool = os.getenv("SUPABASE_AUTO_CONFIRM_SIGNUP", "false").lower() in ("1", "true", "yes")
+    # Shared HTTP client used for all Supabase calls (timeouts in seconds).
+    # SUPABASE_HTTP2 needs the optional `h2` package (httpx[http2]).
+    SUPABASE_HTTP_TIMEOUT: float = float(os.getenv("SUPABASE_HTTP_TIMEOUT", "10"))
+    SUPABASE_HTTP_CONNECT_TIMEOUT: float = float(os.getenv("SUPABASE_HTTP_CONNECT_TIMEOUT", "5"))
+    SUPABASE_HTTP_MAX_CONNECTIONS: int = int(os.getenv("SUPABASE_HTTP_MAX_CONNECTIONS", "100"))
+    SUPABASE_HTTP_MAX_KEEPALIVE: int = int(os.getenv("SUPABASE_HTTP_MAX_KEEPALIVE", "20"))
+    SUPABASE_HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("SUPABASE_HTTP_KEEPALIVE_EXPIRY", "30"))
+    SUPABASE_HTTP2: bool = os.getenv("SUPABASE_HTTP2", "false").lower() in ("1", "true", "yes")
+    # How get_current_user_from_supabase validates tokens: "remote" calls
+    # /auth/v1/user per request; "local" verifies the signature against the
+    # project's cached JWKS and only calls Supabase for unknown key ids.
+    SUPABASE_JWT_VERIFY_MODE: str = os.getenv("SUPABASE_JWT_VERIFY_MODE", "remote").lower()
+    SUPABASE_JWT_AUDIENCE: str = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+    SUPABASE_JWKS_REFRESH_SECONDS: float = float(os.getenv("SUPABASE_JWKS_REFRESH_SECONDS", "600"))
+    # Per-process cache of resolved Supabase users keyed by token hash
+    # (capped at the token's exp) and of rejected tokens.
+    SUPABASE_TOKEN_CACHE_TTL_SECONDS: float = float(os.getenv("SUPABASE_TOKEN_CACHE_TTL_SECONDS", "60"))
+    SUPABASE_TOKEN_CACHE_MAXSIZE: int = int(os.getenv("SUPABASE_TOKEN_CACHE_MAXSIZE", "10000"))
+    SUPABASE_TOKEN_NEGATIVE_TTL_SECONDS: float = float(os.getenv("SUPABASE_TOKEN_NEGATIVE_TTL_SECONDS", "30"))
+    # Caching. CACHE_BACKEND selects the shared tier used next to the
+    # in-process LRU: "local" (in-process only), "memory" (in-process
+    # stand-in for the shared tier) or "redis" (requires CACHE_REDIS_URL).
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "local").lower()
+    CACHE_REDIS_URL: str = os.getenv("CACHE_REDIS_URL", "")
+    # Catalog pages and their ETag version. A catalog write invalidates the
+    # writing worker at once, and other workers only through a shared
+    # CACHE_BACKEND; with "local" or "memory" they keep serving the old pages
+    # and ETags for up to CATALOG_CACHE_TTL_SECONDS.
+    CATALOG_CACHE_TTL_SECONDS: float = float(os.getenv("CATALOG_CACHE_TTL_SECONDS", "60"))
+    CATALOG_CACHE_MAXSIZE: int = int(os.getenv("CATALOG_CACHE_MAXSIZE", "1024"))
+    # Cart snapshots served by GET /cart, keyed by a per-user cart version
+    # that every cart mutation bumps. The versions must be visible to every
+    # process that changes carts, so this cache is only active with a shared
+    # CACHE_BACKEND (redis; "memory" is for single-process runs only).
+    CART_CACHE_TTL_SECONDS: float = float(os.getenv("CART_CACHE_TTL_SECONDS", "300"))
+    CART_CACHE_MAXSIZE: int = int(os.getenv("CART_CACHE_MAXSIZE", "10000"))
+    # Upper bound on how long a checkout waits for stock row locks held by
+    # other checkouts (Postgres lock_timeout); past it the request gets 503.
+    CHECKOUT_LOCK_TIMEOUT_MS: int = int(os.getenv("CHECKOUT_LOCK_TIMEOUT_MS", "2000"))
+    # Idempotency-Key records for POST /orders and POST /cart/items: how long
+    # a stored response is replayed, how many completed responses each worker
+    # also keeps in memory (0 disables that tier), and after how long a request
+    # that never finished stops blocking retries of its key (if it is still
+    # running it then rolls back rather than commit a second write).
+    IDEMPOTENCY_TTL_SECONDS: float = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_CACHE_MAXSIZE: int = int(os.getenv("IDEMPOTENCY_CACHE_MAXSIZE", "10000"))
+    IDEMPOTENCY_PROCESSING_TIMEOUT_SECONDS: float = float(os.getenv("IDEMPOTENCY_PROCESSING_TIMEOUT_SECONDS", "60"))
+    # When true, catalog/cart/wishlist routes serialize repository-built
+    # payloads directly (orjson when installed) instead of re-validating
+    # every row against the response_model.
+    FAST_JSON_RESPONSES: bool = os.getenv("FAST_JSON_RESPONSES", "false").lower() in ("1", "true", "yes")
+    # Per-process token subject -> user snapshot cache used by
+    # get_current_user; entries never outlive the token's exp. 0 disables.
+    USER_CACHE_TTL_SECONDS: float = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+    USER_CACHE_MAXSIZE: int = int(os.getenv("USER_CACHE_MAXSIZE", "10000"))
+    # bcrypt runs on its own thread pool so login bursts cannot starve the
+    # default threadpool; once PASSWORD_HASH_MAX_PENDING calls are queued or
+    # running, further logins/registrations get 503.
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
 
 settings = Settings()
@@ -0,0 +1,143 @@
+"""Idempotency-Key support for POST endpoints that clients retry.
+
+A request carrying an `Idempotency-Key` header runs at most once per
+(user, endpoint, key): its response is stored and every retry gets the stored
+status and body back (marked with `Idempotent-Replayed: true`) without the
+handler running again. Completed responses are also kept in a per-process LRU
+tier, so a retry storm against one worker does not touch the database at all;
+otherwise a replay costs one indexed lookup.
+
+Reusing a key with a different request body is rejected with 422, and a
+retry that arrives while the first request is still running gets 409. Only
+successful responses are stored: if the handler raises, the key is released
+and the request can be retried.
+
+With a key the handler must not commit: its writes and the stored response
+are committed together, so a key is never left unfinished behind a committed
+write. An unfinished key older than `IDEMPOTENCY_PROCESSING_TIMEOUT_SECONDS`
+can therefore be taken over by a retry; its original request, if still
+running, then fails to complete the key and rolls back instead of committing.
+"""
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Callable, Optional, Tuple, Type
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.core.cache import CacheStats, LRUTTLCache
+from app.core.config import settings
+from app.core.exceptions import HTTPException
+from app.core.logging_config import get_logger
+from app.core.responses import dumps
+from app.db.repositories import crud_idempotency
+
+logger = get_logger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+_stats = CacheStats("hits", "misses", "replays", "executions", "conflicts", "evictions", "expirations")
+_cache = LRUTTLCache(maxsize=max(settings.IDEMPOTENCY_CACHE_MAXSIZE, 1), ttl=settings.IDEMPOTENCY_TTL_SECONDS, stats=_stats)
+
+
+def request_fingerprint(payload: Any) -> str:
+    canonical = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _replay(entry: Tuple[str, int, bytes], fingerprint: str) -> Response:
+    request_hash, status_code, body = entry
+    if request_hash != fingerprint:
+        _stats.incr("conflicts")
+        raise HTTPException(status_code=422, message=f"{IDEMPOTENCY_HEADER} was already used for a different request")
+    _stats.incr("replays")
+    return Response(content=body, status_code=status_code, media_type="application/json", headers={REPLAYED_HEADER: "true"})
+
+
+def _remember(cache_key: tuple, entry: Tuple[str, int, bytes], ttl: float) -> None:
+    if settings.IDEMPOTENCY_CACHE_MAXSIZE > 0 and ttl > 0:
+        _cache.set(cache_key, entry, ttl=ttl)
+
+
+def _in_progress() -> HTTPException:
+    _stats.incr("conflicts")
+    return HTTPException(status_code=409, message=f"A request with this {IDEMPOTENCY_HEADER} is still being processed", headers={"Retry-After": "1"})
+
+
+def idempotent(
+    db: Session,
+    key: Optional[str],
+    user_id: int,
+    scope: str,
+    payload: Any,
+    handler: Callable[[], Any],
+    response_model: Type[BaseModel],
+    status_code: int = 200,
+    after_commit: Optional[Callable[[], None]] = None,
+):
+    """Run `handler` once per idempotency key and replay its response.
+
+    Without a key the handler's result is returned as is. With one, the
+    handler writes through `db` without committing, its result is serialized
+    through `response_model`, and the writes are committed with the stored
+    response (then `after_commit` runs). The result is returned as a JSON
+    `Response` with `status_code`, and that exact body is what retries get.
+    """
+    if key is None:
+        return handler()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, message=f"{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters")
+    fingerprint = request_fingerprint(payload)
+    cache_key = (user_id, scope, key)
+    ttl = settings.IDEMPOTENCY_TTL_SECONDS
+
+    if settings.IDEMPOTENCY_CACHE_MAXSIZE > 0:
+        entry = _cache.get(cache_key)
+        _stats.incr("hits" if entry is not None else "misses")
+        if entry is not None:
+            return _replay(entry, fingerprint)
+
+    record = crud_idempotency.get_key(db, user_id, scope, key)
+    if record is not None:
+        remaining = (record.expires_at - datetime.utcnow()).total_seconds()
+        if remaining > 0 and record.status_code is not None:
+            entry = (record.request_hash, record.status_code, record.response_body.encode("utf-8"))
+            _remember(cache_key, entry, remaining)
+            return _replay(entry, fingerprint)
+        claimed_at = crud_idempotency.reclaim_key(db, record.id, fingerprint, ttl, settings.IDEMPOTENCY_PROCESSING_TIMEOUT_SECONDS)
+    else:
+        # None when a concurrent first request with the same key won the insert
+        claimed_at = crud_idempotency.claim_key(db, user_id, scope, key, fingerprint, ttl)
+    if claimed_at is None:
+        raise _in_progress()
+
+    _stats.incr("executions")
+    try:
+        result = handler()
+        body = dumps(response_model.model_validate(result).model_dump(mode="json"))
+        if not crud_idempotency.complete_key(db, user_id, scope, key, claimed_at, status_code, body.decode("utf-8")):
+            # we outlived the processing timeout and a retry took the key over
+            logger.warning("idempotency.claim_lost", scope=scope)
+            raise _in_progress()
+        db.commit()
+    except Exception:
+        db.rollback()
+        crud_idempotency.release_key(db, user_id, scope, key, claimed_at)
+        raise
+    if after_commit is not None:
+        after_commit()
+    _remember(cache_key, (fingerprint, status_code, body), ttl)
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+def stats() -> dict:
+    return dict(_stats.snapshot(), size=len(_cache))
+
+
+def clear() -> None:
+    _cache.clear()
@@ -0,0 +1,57 @@
+"""Fast JSON responses for routes whose payload is already trusted.
+
+Repository functions build plain dicts/lists whose shape matches the route's
+response_model. Re-validating them through Pydantic and serializing with the
+stdlib encoder dominates CPU for large pages, so when FAST_JSON_RESPONSES is
+enabled routes hand their payload to `trusted_response`, which skips
+response_model validation and serializes with orjson (stdlib json fallback).
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Optional
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+
+try:  # optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - depends on environment
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def trusted_response(content: Any, response: Optional[Response] = None, status_code: int = 200):
+    """Return `content` without response_model validation when enabled.
+
+    `content` must already match the route's response_model. Headers set on
+    the injected `response` (ETag, cursors, ...) are carried over. When
+    FAST_JSON_RESPONSES is off, `content` is returned unchanged and FastAPI
+    validates and serializes it as usual.
+    """
+    if not settings.FAST_JSON_RESPONSES:
+        return content
+    headers = None
+    if response is not None:
+        headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
@@ -1,8 +1,15 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
 from app.core.config import settings
-from typing import Optional
+from app.core.logging_config import get_logger
+from typing import Any, Callable, Dict, Optional
+
+logger = get_logger(__name__)
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -14,6 +21,94 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing queue is full."""
+
+
+class PasswordHasher:
+    """Runs bcrypt on a dedicated, bounded thread pool.
+
+    bcrypt releases the GIL, so a small thread pool gives real parallelism
+    while keeping hashing off the default threadpool that serves every sync
+    route. At most `max_pending` calls may be queued or running; beyond that
+    `run` raises `PasswordHasherBusy` instead of letting the queue grow.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = max(1, workers)
+        self.max_pending = max(self.workers, max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stats = {"completed": 0, "rejected": 0, "hash_seconds": 0.0, "wait_seconds": 0.0, "max_hash_seconds": 0.0, "max_wait_seconds": 0.0}
+
+    def _record(self, wait: float, elapsed: float) -> None:
+        with self._lock:
+            self._stats["completed"] += 1
+            self._stats["hash_seconds"] += elapsed
+            self._stats["wait_seconds"] += wait
+            self._stats["max_hash_seconds"] = max(self._stats["max_hash_seconds"], elapsed)
+            self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], wait)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._stats["rejected"] += 1
+                logger.warning("password_hash.rejected", pending=self._pending)
+                raise PasswordHasherBusy()
+            self._pending += 1
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                self._record(started - submitted, time.perf_counter() - started)
+
+        try:
+            future = self._executor.submit(job)
+        except BaseException:
+            self._release()
+            raise
+        # Release the slot when the job itself is done (or cancelled before it
+        # started), not when the awaiting request goes away: a disconnected
+        # client must not free a slot whose hash is still queued or running.
+        future.add_done_callback(lambda _: self._release())
+        return await asyncio.wrap_future(future)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            data = dict(self._stats)
+            data["pending"] = self._pending
+        completed = data["completed"]
+        data["avg_hash_ms"] = round(data.pop("hash_seconds") / completed * 1000, 2) if completed else None
+        data["avg_wait_ms"] = round(data.pop("wait_seconds") / completed * 1000, 2) if completed else None
+        data["max_hash_ms"] = round(data.pop("max_hash_seconds") * 1000, 2)
+        data["max_wait_ms"] = round(data.pop("max_wait_seconds") * 1000, 2)
+        data["workers"] = self.workers
+        data["max_pending"] = self.max_pending
+        return data
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
+
+
+async def verify_password_async(plain_password, hashed_password):
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password):
+    return await password_hasher.run(get_password_hash, password)
+
+
 def create_access_token(subject: str, expires_delta: Optional[timedelta] = None):
     to_encode = {"sub": subject}
     if expires_delta:
@@ -1,18 +1,98 @@
+import hashlib
+import time
 import httpx
 from fastapi import Depends
+from starlette.concurrency import run_in_threadpool
 from app.core.exceptions import HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from app.core.config import settings
 from app.core.supabase_client import supabase_client
-from app.db.session import get_db
+from app.core.supabase_jwks import UnknownSigningKey, jwks_cache, user_from_claims
+from jose import JWTError, jwt
+from app.core.cache import AsyncSingleFlight, CacheStats, LRUTTLCache
+from app.db.session import SessionLocal, get_db
 from sqlalchemy.orm import Session
 from app.db.repositories.crud_user import get_or_create_by_email, get_user_by_email
 from app.core.security import decode_token
+from app.core import user_cache
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
 
-async def get_current_user_from_supabase(creds: HTTPAuthorizationCredentials = Depends(bearer_scheme), db: Session = Depends(get_db)):
+# Remote lookups are cached per token (keyed by its sha256, never the raw
+# token) for at most the token's remaining lifetime; concurrent requests
+# with the same token share one in-flight lookup, and rejected tokens are
+# remembered briefly so repeated invalid tokens do not reach Supabase.
+_INVALID_TOKEN = object()
+_token_stats = CacheStats("hits", "misses", "negative_hits", "coalesced", "evictions", "expirations")
+_token_cache = LRUTTLCache(maxsize=settings.SUPABASE_TOKEN_CACHE_MAXSIZE, ttl=settings.SUPABASE_TOKEN_CACHE_TTL_SECONDS, stats=_token_stats)
+_token_flight = AsyncSingleFlight()
+
+
+def _token_ttl(token: str) -> float:
+    ttl = settings.SUPABASE_TOKEN_CACHE_TTL_SECONDS
+    try:
+        exp = jwt.get_unverified_claims(token).get("exp")
+    except JWTError:
+        exp = None
+    if exp is not None:
+        ttl = min(ttl, float(exp) - time.time())
+    return ttl
+
+
+def _reject(key: str) -> HTTPException:
+    if settings.SUPABASE_TOKEN_NEGATIVE_TTL_SECONDS > 0:
+        _token_cache.set(key, _INVALID_TOKEN, ttl=settings.SUPABASE_TOKEN_NEGATIVE_TTL_SECONDS)
+    return HTTPException(status_code=401, message="Invalid token")
+
+
+def _get_or_create_local_user(email: str):
+    # The lookup may outlive the request that started it (see
+    # AsyncSingleFlight), so it uses its own session, not the request's.
+    db = SessionLocal()
+    try:
+        user = get_or_create_by_email(db, email)
+        return {"id": user.id, "email": user.email, "is_active": bool(user.is_active)}
+    finally:
+        db.close()
+
+
+async def _load_supabase_user(token: str, key: str) -> dict:
+    sb_user = None
+    if settings.SUPABASE_JWT_VERIFY_MODE == "local":
+        try:
+            sb_user = user_from_claims(await jwks_cache.verify(token))
+        except JWTError:
+            raise _reject(key)
+        except UnknownSigningKey:
+            # not signed with a JWKS key (rotated key, legacy HS256 secret)
+            sb_user = None
+    if sb_user is None:
+        try:
+            sb_user = await supabase_client.get_user(token)
+        except httpx.HTTPStatusError as e:
+            # only a definite rejection is cached; 429/5xx are retried
+            if e.response is not None and e.response.status_code in (401, 403):
+                raise _reject(key)
+            raise HTTPException(status_code=401, message="Invalid token")
+        except Exception as e:
+            raise HTTPException(status_code=500, message=f"Supabase error: {e}")
+
+    email = sb_user.get("email")
+    if not email:
+        raise HTTPException(status_code=500, message="Supabase returned user without email")
+    local_user = await run_in_threadpool(_get_or_create_local_user, email)
+    if not local_user["is_active"]:
+        raise HTTPException(status_code=403, message="Inactive user")
+
+    result = {"supabase_user": sb_user, "local_user": {"id": local_user["id"], "email": local_user["email"]}}
+    ttl = _token_ttl(token)
+    if ttl > 0:
+        _token_cache.set(key, result, ttl=ttl)
+    return result
+
+
+async def get_current_user_from_supabase(creds: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
     """Legacy Supabase auth dependency kept for compatibility. Validates Supabase token and
     returns merged supabase/local user object. Not used by default when backend auth is enabled.
     """
@@ -21,25 +101,35 @@ async def get_current_user_from_supabase(creds: HTTPAuthorizationCredentials = D
     token = creds.credentials
     if not settings.SUPABASE_URL:
         raise HTTPException(status_code=500, message="Supabase URL not configured on server")
-    try:
-        sb_user = await supabase_client.get_user(token)
-    except httpx.HTTPStatusError:
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    cached = _token_cache.get(key)
+    if cached is _INVALID_TOKEN:
+        _token_stats.incr("negative_hits")
         raise HTTPException(status_code=401, message="Invalid token")
-    except Exception as e:
-        raise HTTPException(status_code=500, message=f"Supabase error: {e}")
+    if cached is not None:
+        _token_stats.incr("hits")
+        if user_cache.is_denied(cached["local_user"]["email"]):
+            _token_cache.delete(key)
+            raise HTTPException(status_code=403, message="Inactive user")
+        return cached
+    _token_stats.incr("misses")
+    result, shared = await _token_flight.do(key, lambda: _load_supabase_user(token, key))
+    if shared:
+        _token_stats.incr("coalesced")
+    return result
 
-    email = sb_user.get("email")
-    if not email:
-        raise HTTPException(status_code=500, message="Supabase returned user without email")
-    local_user = get_or_create_by_email(db, email)
 
-    return {"supabase_user": sb_user, "local_user": {"id": local_user.id, "email": local_user.email}}
+def token_cache_stats() -> dict:
+    data = _token_stats.snapshot()
+    data["size"] = len(_token_cache)
+    return data
 
 
 def get_current_user(creds: HTTPAuthorizationCredentials = Depends(bearer_scheme), db: Session = Depends(get_db)):
     """Primary auth dependency: accepts local JWTs (issued by this backend).
 
-    Returns the local user model from the database on success.
+    Returns an immutable `UserSnapshot` of the local user on success, served
+    from the per-process user cache when possible.
     """
     if not creds:
         raise HTTPException(status_code=401, message="Not authenticated")
@@ -50,7 +140,17 @@ def get_current_user(creds: HTTPAuthorizationCredentials = Depends(bearer_scheme
     email = payload.get("sub")
     if not email:
         raise HTTPException(status_code=401, message="Token missing subject")
-    user = get_user_by_email(db, email)
-    if not user:
-        raise HTTPException(status_code=401, message="User not found")
-    return user
+    snapshot = user_cache.get_user(email)
+    if snapshot is not None and snapshot.is_active and user_cache.is_denied(email):
+        # deactivated by another process since this snapshot was cached
+        user_cache.invalidate_user(email)
+        snapshot = None
+    if snapshot is None:
+        user = get_user_by_email(db, email)
+        if not user:
+            raise HTTPException(status_code=401, message="User not found")
+        snapshot = user_cache.UserSnapshot.from_user(user)
+        user_cache.put_user(email, snapshot, expires_at=payload.get("exp"))
+    if not snapshot.is_active:
+        raise HTTPException(status_code=403, message="Inactive user")
+    return snapshot
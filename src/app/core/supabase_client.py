@@ -2,13 +2,63 @@ import os
 from typing import Optional
 import httpx
 from app.core.config import settings
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
 
 
 class SupabaseClient:
-    def __init__(self, url: Optional[str] = None, anon_key: Optional[str] = None, service_role: Optional[str] = None):
+    """Thin async wrapper over the Supabase auth REST API.
+
+    All calls share one pooled `httpx.AsyncClient` so connections (and their
+    TLS sessions) are kept alive and reused across requests. The app opens it
+    on startup and closes it on shutdown; outside the app it is created on
+    first use and should be closed with `aclose()`.
+    """
+
+    def __init__(self, url: Optional[str] = None, anon_key: Optional[str] = None, service_role: Optional[str] = None, transport: Optional[httpx.AsyncBaseTransport] = None):
         self.url = url or settings.SUPABASE_URL
         self.anon_key = anon_key or settings.SUPABASE_ANON_KEY
         self.service_role = service_role or settings.SUPABASE_SERVICE_ROLE_KEY
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _build_client(self) -> httpx.AsyncClient:
+        http2 = settings.SUPABASE_HTTP2
+        if http2 and not _http2_available():
+            logger.warning("supabase.http2_unavailable", reason="h2 package not installed")
+            http2 = False
+        return httpx.AsyncClient(
+            http2=http2,
+            transport=self._transport,
+            limits=httpx.Limits(
+                max_connections=settings.SUPABASE_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.SUPABASE_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.SUPABASE_HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(settings.SUPABASE_HTTP_TIMEOUT, connect=settings.SUPABASE_HTTP_CONNECT_TIMEOUT),
+        )
+
+    async def start(self) -> None:
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _http(self) -> httpx.AsyncClient:
+        await self.start()
+        return self._client
 
     async def get_user(self, jwt_token: str) -> dict:
         """Return the user object for a Supabase JWT token or raise an httpx.HTTPError on transport issues.
@@ -22,12 +72,23 @@ class SupabaseClient:
             raise RuntimeError("Supabase API key not configured")
 
         headers = {"Authorization": f"Bearer {jwt_token}", "apikey": apikey}
-        async with httpx.AsyncClient() as client:
-            r = await client.get(f"{self.url}/auth/v1/user", headers=headers, timeout=10.0)
+        client = await self._http()
+        r = await client.get(f"{self.url}/auth/v1/user", headers=headers)
         if r.status_code != 200:
             raise httpx.HTTPStatusError("Invalid token", request=r.request, response=r)
         return r.json()
 
+    async def get_jwks(self) -> dict:
+        """Fetch the project's public signing keys (JWKS) used to verify access tokens."""
+        if not self.url:
+            raise RuntimeError("Supabase URL not configured")
+        apikey = self.anon_key or self.service_role
+        headers = {"apikey": apikey} if apikey else {}
+        client = await self._http()
+        r = await client.get(f"{self.url.rstrip('/')}/auth/v1/.well-known/jwks.json", headers=headers)
+        r.raise_for_status()
+        return r.json()
+
     async def signup(self, email: str, password: str) -> dict:
         """Sign up a user in Supabase and return the response JSON (may include an access token/session).
 
@@ -41,8 +102,8 @@ class SupabaseClient:
 
         headers = {"apikey": apikey, "Content-Type": "application/json"}
         payload = {"email": email, "password": password}
-        async with httpx.AsyncClient() as client:
-            r = await client.post(f"{self.url}/auth/v1/signup", json=payload, headers=headers, timeout=10.0)
+        client = await self._http()
+        r = await client.post(f"{self.url}/auth/v1/signup", json=payload, headers=headers)
         # Return raw JSON so caller can decide how to handle (session, user, etc.).
         return {"status_code": r.status_code, "json": r.json()}
 
@@ -59,8 +120,8 @@ class SupabaseClient:
 
         headers = {"apikey": apikey, "Content-Type": "application/json"}
         payload = {"email": email, "password": password}
-        async with httpx.AsyncClient() as client:
-            r = await client.post(f"{self.url}/auth/v1/token?grant_type=password", json=payload, headers=headers, timeout=10.0)
+        client = await self._http()
+        r = await client.post(f"{self.url}/auth/v1/token?grant_type=password", json=payload, headers=headers)
         return {"status_code": r.status_code, "json": r.json()}
 
     async def admin_create_user(self, email: str, password: str, email_confirm: bool = False) -> dict:
@@ -79,8 +140,8 @@ class SupabaseClient:
         if email_confirm:
             payload["email_confirm"] = True
 
-        async with httpx.AsyncClient() as client:
-            r = await client.post(f"{self.url}/auth/v1/admin/users", json=payload, headers=headers, timeout=10.0)
+        client = await self._http()
+        r = await client.post(f"{self.url}/auth/v1/admin/users", json=payload, headers=headers)
         return {"status_code": r.status_code, "json": r.json()}
 
     async def health_check(self) -> dict:
@@ -93,15 +154,15 @@ class SupabaseClient:
             raise RuntimeError("Supabase URL not configured")
         apikey = self.anon_key or self.service_role
         headers = {"apikey": apikey} if apikey else {}
-        async with httpx.AsyncClient() as client:
-            # Try a known health endpoint, otherwise fall back to root
-            for path in ("/health", "/", ""):
-                try:
-                    r = await client.get(f"{self.url.rstrip('/')}{path}", headers=headers, timeout=5.0)
-                except httpx.RequestError:
-                    # Try next
-                    continue
-                return {"status_code": r.status_code, "ok": r.status_code == 200, "path": path}
+        client = await self._http()
+        # Try a known health endpoint, otherwise fall back to root
+        for path in ("/health", "/", ""):
+            try:
+                r = await client.get(f"{self.url.rstrip('/')}{path}", headers=headers, timeout=5.0)
+            except httpx.RequestError:
+                # Try next
+                continue
+            return {"status_code": r.status_code, "ok": r.status_code == 200, "path": path}
         raise httpx.RequestError("Could not reach Supabase URL")
 
 
@@ -0,0 +1,130 @@
+"""Local verification of Supabase access tokens against the project's JWKS.
+
+The signing keys are fetched once, indexed by `kid` and refreshed in the
+background, so verifying a token is a signature check instead of an HTTP
+round trip to /auth/v1/user. A token signed with a key id we do not know
+triggers one (rate-limited) refresh; if the key is still unknown the caller
+falls back to the remote lookup.
+"""
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from jose import JWTError, jwt
+
+from app.core.config import settings
+from app.core.logging_config import get_logger
+from app.core.supabase_client import SupabaseClient, supabase_client
+
+logger = get_logger(__name__)
+
+# Only asymmetric algorithms: the JWKS is public, so accepting an HMAC
+# algorithm here would let anyone sign tokens with a public key.
+ALLOWED_ALGORITHMS = ("RS256", "ES256")
+_KTY_ALGORITHMS = {"RSA": "RS256", "EC": "ES256"}
+# Minimum spacing between refreshes triggered by unknown key ids.
+MIN_REFRESH_INTERVAL = 30.0
+
+
+class UnknownSigningKey(Exception):
+    """The token's `kid` is not in the (refreshed) key set."""
+
+
+class JWKSCache:
+    def __init__(self, client: SupabaseClient, refresh_interval: float):
+        self.client = client
+        self.refresh_interval = refresh_interval
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self) -> None:
+        jwks = await self.client.get_jwks()
+        keys = {}
+        for k in jwks.get("keys", []):
+            alg = k.get("alg") or _KTY_ALGORITHMS.get(k.get("kty"))
+            if k.get("kid") and alg in ALLOWED_ALGORITHMS:
+                keys[k["kid"]] = dict(k, alg=alg)
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+        logger.info("supabase.jwks_refreshed", keys=len(keys))
+
+    async def get_key(self, kid: str) -> Optional[Dict[str, Any]]:
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+        async with self._lock:
+            # another request may have refreshed while we waited
+            key = self._keys.get(kid)
+            if key is None and time.monotonic() - self._fetched_at >= MIN_REFRESH_INTERVAL:
+                try:
+                    await self.refresh()
+                except Exception as e:
+                    self._fetched_at = time.monotonic()
+                    logger.warning("supabase.jwks_refresh_failed", error=str(e))
+                key = self._keys.get(kid)
+        return key
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning("supabase.jwks_refresh_failed", error=str(e))
+
+    async def start(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as e:
+            # Keep serving; unknown keys fall back to remote verification.
+            logger.warning("supabase.jwks_refresh_failed", error=str(e))
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        """Return the verified claims of `token`.
+
+        Raises `JWTError` for malformed, expired or badly signed tokens and
+        `UnknownSigningKey` when the token is not signed with a key from the
+        JWKS.
+        """
+        header = jwt.get_unverified_header(token)
+        alg = header.get("alg")
+        if alg not in ALLOWED_ALGORITHMS:
+            # e.g. projects still signing with the shared HS256 secret
+            raise UnknownSigningKey(header.get("kid"))
+        key = await self.get_key(header.get("kid") or "")
+        if key is None:
+            raise UnknownSigningKey(header.get("kid"))
+        return jwt.decode(
+            token,
+            key,
+            algorithms=[key["alg"]],
+            audience=settings.SUPABASE_JWT_AUDIENCE or None,
+            options={"verify_aud": bool(settings.SUPABASE_JWT_AUDIENCE)},
+        )
+
+
+def user_from_claims(claims: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape verified claims like the /auth/v1/user response fields we use."""
+    return {
+        "id": claims.get("sub"),
+        "email": claims.get("email"),
+        "role": claims.get("role"),
+        "app_metadata": claims.get("app_metadata", {}),
+        "user_metadata": claims.get("user_metadata", {}),
+    }
+
+
+jwks_cache = JWKSCache(supabase_client, settings.SUPABASE_JWKS_REFRESH_SECONDS)
@@ -0,0 +1,117 @@
+"""Token subject -> user snapshot cache for the auth dependency.
+
+`get_current_user` runs on every authenticated request; caching an immutable
+snapshot of the user per subject saves the lookup query on all but the first
+request of each TTL window. Entries are capped at the token's `exp` and are
+dropped explicitly (`invalidate_user`) when a user is changed or deactivated
+through the repository. The cache is per process, so changes made by another
+process (a web worker or `scripts/manage.py`) become visible after at most
+USER_CACHE_TTL_SECONDS.
+
+Deactivation is the exception when a shared CACHE_BACKEND is configured:
+`set_user_inactive` also stores a deny marker there, and `is_denied` lets
+every worker reject a deactivated user's cached snapshot (or cached
+Supabase lookup) on the next request.
+"""
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from app.core.cache import CacheStats, LRUTTLCache, get_shared_backend
+from app.core.config import settings
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Read-only view of the columns request handlers use from `User`."""
+
+    id: int
+    email: str
+    is_active: bool
+    is_superuser: bool
+
+    @classmethod
+    def from_user(cls, user) -> "UserSnapshot":
+        return cls(id=user.id, email=user.email, is_active=bool(user.is_active), is_superuser=bool(user.is_superuser))
+
+
+_stats = CacheStats("hits", "misses", "invalidations", "denied", "shared_errors", "evictions", "expirations")
+_cache = LRUTTLCache(maxsize=settings.USER_CACHE_MAXSIZE, ttl=settings.USER_CACHE_TTL_SECONDS, stats=_stats)
+
+
+def get_user(subject: str) -> Optional[UserSnapshot]:
+    if settings.USER_CACHE_TTL_SECONDS <= 0:
+        return None
+    snapshot = _cache.get(subject)
+    _stats.incr("hits" if snapshot is not None else "misses")
+    return snapshot
+
+
+def put_user(subject: str, snapshot: UserSnapshot, expires_at: Optional[float] = None) -> None:
+    """Cache `snapshot`; `expires_at` is the token's exp (epoch seconds)."""
+    ttl = settings.USER_CACHE_TTL_SECONDS
+    if expires_at is not None:
+        ttl = min(ttl, expires_at - time.time())
+    if ttl > 0:
+        _cache.set(subject, snapshot, ttl=ttl)
+
+
+def invalidate_user(subject: str) -> None:
+    _cache.delete(subject)
+    _stats.incr("invalidations")
+
+
+def _deny_key(subject: str) -> str:
+    return f"users:inactive:{subject}"
+
+
+def set_user_inactive(subject: str, inactive: bool) -> None:
+    """Drop this process's snapshot and publish (or lift) the shared deny
+    marker. The marker only has to outlive snapshots and token lookups
+    cached before the change; after that the database answer is cached."""
+    invalidate_user(subject)
+    backend = get_shared_backend()
+    if backend is None:
+        return
+    try:
+        if inactive:
+            ttl = max(settings.USER_CACHE_TTL_SECONDS, settings.SUPABASE_TOKEN_CACHE_TTL_SECONDS)
+            backend.set(_deny_key(subject), b"1", ttl=ttl)
+        else:
+            backend.delete(_deny_key(subject))
+    except Exception as e:
+        _stats.incr("shared_errors")
+        logger.warning("user_cache.shared_unavailable", error=str(e))
+
+
+def is_denied(subject: str) -> bool:
+    """Whether `subject` was deactivated after its cached entry was taken.
+
+    False without a shared backend or when it is unreachable (fail open, as
+    before the marker existed)."""
+    backend = get_shared_backend()
+    if backend is None:
+        return False
+    try:
+        denied = backend.get(_deny_key(subject)) is not None
+    except Exception:
+        _stats.incr("shared_errors")
+        return False
+    if denied:
+        _stats.incr("denied")
+    return denied
+
+
+def clear() -> None:
+    _cache.clear()
+
+
+def stats() -> Dict[str, Any]:
+    data = _stats.snapshot()
+    lookups = data["hits"] + data["misses"]
+    data["hit_ratio"] = round(data["hits"] / lookups, 4) if lookups else None
+    data["size"] = len(_cache)
+    return data
@@ -16,7 +16,8 @@ with an empty metadata and no tables would be created.
 try:  # pragma: no cover - defensive import block
 	from app.models.user import User  # noqa: F401
 	from app.models.product import Product  # noqa: F401
-	from app.models.order import Order  # noqa: F401
+	from app.models.order import Order, OrderItem  # noqa: F401
+	from app.models.idempotency import IdempotencyKey  # noqa: F401
 except Exception:
 	# We silently ignore import errors here to avoid breaking ancillary
 	# tooling (like Alembic autogenerate before dependencies are installed).
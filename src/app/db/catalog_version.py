@@ -0,0 +1,70 @@
+"""Catalog version counter behind the ETag / Last-Modified of catalog reads.
+
+`catalog_version` holds a single row whose `version` is bumped, and whose
+`updated_at` is set, by triggers on every insert, delete and catalog-column
+update of products and featured_products. Any write (the API, an import, a
+price edit made straight in the database) changes the validators, and
+reading them is one primary-key lookup. Stock updates from checkout do not
+touch catalog columns and leave the version alone.
+
+Postgres gets the table, function and statement-level triggers from
+migration 0009; SQLite files created with `create_all` get row-level
+triggers at app startup.
+"""
+from typing import List
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+CATALOG_TABLES = ("products", "featured_products")
+# Columns served by catalog reads (must match crud_product.CATALOG_COLUMNS);
+# updates of anything else, like stock, do not change what clients see.
+VERSIONED_COLUMNS = "id, product_name, category, rating, people_rated_count, description, img_url, real_price, current_price, created_at"
+
+
+def sqlite_catalog_version_ddl(tables: List[str]) -> List[str]:
+    ddl = [
+        "CREATE TABLE IF NOT EXISTS catalog_version (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL, updated_at DATETIME NOT NULL)",
+        "INSERT OR IGNORE INTO catalog_version (id, version, updated_at) VALUES (1, 0, CURRENT_TIMESTAMP)",
+    ]
+    bump = "BEGIN UPDATE catalog_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1; END"
+    for table in tables:
+        ddl += [
+            f"CREATE TRIGGER IF NOT EXISTS {table}_catalog_version_ai AFTER INSERT ON {table} {bump}",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_catalog_version_ad AFTER DELETE ON {table} {bump}",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_catalog_version_au AFTER UPDATE OF {VERSIONED_COLUMNS} ON {table} {bump}",
+        ]
+    return ddl
+
+
+def postgres_catalog_version_ddl(tables: List[str]) -> List[str]:
+    ddl = [
+        "CREATE TABLE IF NOT EXISTS public.catalog_version (id integer PRIMARY KEY CHECK (id = 1), version bigint NOT NULL, updated_at timestamp NOT NULL)",
+        "INSERT INTO public.catalog_version (id, version, updated_at) VALUES (1, 0, now() AT TIME ZONE 'utc') ON CONFLICT (id) DO NOTHING",
+        """
+        CREATE OR REPLACE FUNCTION public.bump_catalog_version() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE public.catalog_version SET version = version + 1, updated_at = now() AT TIME ZONE 'utc' WHERE id = 1;
+            RETURN NULL;
+        END
+        $$
+        """,
+    ]
+    for table in tables:
+        # once per statement, so a bulk import batch bumps the version once
+        ddl += [
+            f"DROP TRIGGER IF EXISTS catalog_version_bump ON public.{table}",
+            f"CREATE TRIGGER catalog_version_bump AFTER INSERT OR DELETE OR TRUNCATE OR UPDATE OF {VERSIONED_COLUMNS} ON public.{table} FOR EACH STATEMENT EXECUTE FUNCTION public.bump_catalog_version()",
+        ]
+    return ddl
+
+
+def create_sqlite_catalog_version(conn: Connection) -> bool:
+    """Create the counter and its triggers unless they exist; True if created."""
+    inspector = inspect(conn)
+    if inspector.has_table("catalog_version"):
+        return False
+    tables = [t for t in CATALOG_TABLES if inspector.has_table(t)]
+    for stmt in sqlite_catalog_version_ddl(tables):
+        conn.execute(text(stmt))
+    return True
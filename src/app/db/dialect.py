@@ -0,0 +1,55 @@
+"""Small helpers for raw SQL that has to run on both Postgres (production)
+and SQLite (local runs).
+
+Production tables live in the `public` schema and some of them (for example
+`featured_products`) are managed outside of the ORM, so a local SQLite file
+created by `Base.metadata.create_all` may not have them at all.
+"""
+
+from functools import lru_cache
+
+from sqlalchemy import bindparam, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+
+def is_sqlite(db: Session) -> bool:
+    return db.get_bind().dialect.name == "sqlite"
+
+
+def table_name(db: Session, name: str) -> str:
+    """Schema-qualify `name` for Postgres; SQLite has no `public` schema."""
+    return name if is_sqlite(db) else f"public.{name}"
+
+
+def any_of(db: Session, column: str, param: str) -> str:
+    """SQL matching `column` against the list bound to `param`.
+
+    Postgres gets `= ANY(:param)` (one array parameter, so the statement
+    text does not vary with the list length); SQLite gets an expanding
+    `IN`, which requires `expand_lists` on the statement.
+    """
+    return f"{column} IN :{param}" if is_sqlite(db) else f"{column} = ANY(:{param})"
+
+
+def expand_lists(db: Session, stmt, *params: str):
+    """Mark `params` of a textual statement as expanding lists on SQLite."""
+    if is_sqlite(db):
+        stmt = stmt.bindparams(*(bindparam(p, expanding=True) for p in params))
+    return stmt
+
+
+@lru_cache(maxsize=64)
+def _engine_has_table(engine: Engine, name: str) -> bool:
+    schema = None if engine.dialect.name == "sqlite" else "public"
+    return inspect(engine).has_table(name, schema=schema)
+
+
+def has_table(db: Session, name: str) -> bool:
+    """Whether `name` exists, cached per engine for the life of the process."""
+    return _engine_has_table(db.get_bind(), name)
+
+
+def clear_table_cache() -> None:
+    """Forget cached `has_table` answers, e.g. after creating a table."""
+    _engine_has_table.cache_clear()
@@ -0,0 +1,404 @@
+"""Cart queries.
+
+The carts and cart_items tables are managed in Supabase (Postgres) outside
+of the ORM, so everything here is raw SQL. Each operation is a single
+statement on Postgres; SQLite (local runs) gets the equivalent steps inside
+one transaction because it cannot run INSERTs inside a CTE.
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.cache import VersionedCache, get_shared_backend
+from app.core.config import settings
+from app.db.dialect import any_of, expand_lists, is_sqlite, table_name
+
+# Snapshots of GET /cart per user. Every cart mutation must call
+# `cart_cache.bump(user_id)` after committing.
+cart_cache = VersionedCache(
+    "cart",
+    maxsize=settings.CART_CACHE_MAXSIZE,
+    ttl=settings.CART_CACHE_TTL_SECONDS,
+    backend=get_shared_backend(),
+)
+
+
+def _json_param(value: Any) -> Optional[str]:
+    return json.dumps(value) if value is not None else None
+
+
+def _json_value(value: Any) -> Any:
+    # jsonb comes back decoded from psycopg2; SQLite stores the JSON text
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _cart_product(m) -> Optional[Dict[str, Any]]:
+    # Plain dict in the full ProductRead shape so it can be served through
+    # trusted_response without re-validation.
+    if m["p_id"] is None:
+        return None
+    real_price = float(m["p_real_price"]) if m["p_real_price"] is not None else None
+    return {
+        "id": m["p_id"],
+        "product_name": m["p_name"],
+        "category": None,
+        "rating": None,
+        "people_rated_count": None,
+        "description": m["p_description"],
+        "img_url": None,
+        "real_price": real_price,
+        "current_price": float(m["p_current_price"]) if m["p_current_price"] is not None else real_price,
+        "created_at": None,
+    }
+
+
+def _cart_item(m) -> Dict[str, Any]:
+    return {
+        "item_id": m["item_id"],
+        "product_id": m["product_id"],
+        "quantity": m["quantity"],
+        "price_at_add": float(m["price_at_add"]),
+        "metadata": _json_value(m["metadata"]) or {},
+        "product": _cart_product(m),
+    }
+
+
+def get_active_cart(db: Session, user_id: int) -> Optional[Dict[str, Any]]:
+    """Return the user's active cart with its items, or None (one query)."""
+    carts, items, products = table_name(db, "carts"), table_name(db, "cart_items"), table_name(db, "products")
+    rows = db.execute(
+        text(
+            f"""
+            SELECT c.id AS cart_id, ci.id AS item_id, ci.product_id, ci.quantity, ci.price_at_add, ci.metadata,
+                   p.id AS p_id, p.product_name AS p_name, p.description AS p_description,
+                   p.current_price AS p_current_price, p.real_price AS p_real_price
+            FROM {carts} c
+            LEFT JOIN {items} ci ON ci.cart_id = c.id
+            LEFT JOIN {products} p ON p.id = ci.product_id
+            WHERE c.id = (SELECT id FROM {carts} WHERE owner_user_id = :user_id AND status = 'active' ORDER BY id LIMIT 1)
+            ORDER BY ci.id
+            """
+        ),
+        {"user_id": user_id},
+    ).fetchall()
+    if not rows:
+        return None
+    cart_items = [_cart_item(r._mapping) for r in rows if r._mapping["item_id"] is not None]
+    cart = {"cart_id": rows[0]._mapping["cart_id"], "owner_user_id": user_id, "items": cart_items}
+    cart.update(cart_totals(cart_items))
+    return cart
+
+
+def cart_totals(items) -> Dict[str, float]:
+    subtotal = total = 0.0
+    for item in items:
+        product = item["product"]
+        list_price = product["real_price"] if product and product["real_price"] is not None else item["price_at_add"]
+        subtotal += list_price * item["quantity"]
+        total += item["price_at_add"] * item["quantity"]
+    return {"subtotal": round(subtotal, 2), "discount": round(subtotal - total, 2), "total": round(total, 2)}
+
+
+def cached_get_active_cart(db: Session, user_id: int) -> Optional[Dict[str, Any]]:
+    return cart_cache.get_or_load(user_id, lambda: get_active_cart(db, user_id))
+
+
+def add_cart_item(db: Session, user_id: int, product_id: int, quantity: int, metadata: Any = None, commit: bool = True) -> Optional[Dict[str, Any]]:
+    """Add `quantity` of a product to the user's active cart.
+
+    Creates the cart if needed, prices the item at the product's current
+    price (falling back to real_price) and merges with an existing line for
+    the same product. Returns the item in `CartItemResponse` shape, or None
+    (with nothing written) when the product does not exist. With
+    `commit=False` the caller commits and then calls `cart_cache.bump`.
+    """
+    params = {"user_id": user_id, "product_id": product_id, "quantity": quantity, "metadata": _json_param(metadata)}
+    if is_sqlite(db):
+        row = _add_cart_item_sqlite(db, params)
+    else:
+        row = db.execute(text(_ADD_CART_ITEM_SQL), params).fetchone()
+    if row is None or row._mapping["item_id"] is None:
+        db.rollback()
+        return None
+    if commit:
+        db.commit()
+        cart_cache.bump(user_id)
+    return _cart_item(row._mapping)
+
+
+# Ensure the active cart, look up the price, upsert the line and return it
+# joined with the product, in one round trip. When the product does not
+# exist the final SELECT returns no row and the caller rolls back.
+_ADD_CART_ITEM_SQL = """
+WITH existing AS (
+    SELECT id FROM public.carts WHERE owner_user_id = :user_id AND status = 'active' ORDER BY id LIMIT 1
+), created AS (
+    INSERT INTO public.carts (owner_user_id)
+    SELECT :user_id WHERE NOT EXISTS (SELECT 1 FROM existing)
+    RETURNING id
+), cart AS (
+    SELECT id FROM existing UNION ALL SELECT id FROM created
+), product AS (
+    SELECT id, product_name, description, current_price, real_price FROM public.products WHERE id = :product_id
+), item AS (
+    INSERT INTO public.cart_items AS ci (cart_id, product_id, quantity, price_at_add, metadata)
+    SELECT cart.id, product.id, :quantity, COALESCE(product.current_price, product.real_price), CAST(:metadata AS jsonb)
+    FROM cart, product
+    ON CONFLICT (cart_id, product_id) DO UPDATE SET quantity = ci.quantity + EXCLUDED.quantity
+    RETURNING id, product_id, quantity, price_at_add, metadata
+)
+SELECT item.id AS item_id, item.product_id, item.quantity, item.price_at_add, item.metadata,
+       product.id AS p_id, product.product_name AS p_name, product.description AS p_description,
+       product.current_price AS p_current_price, product.real_price AS p_real_price
+FROM product JOIN item ON item.product_id = product.id
+"""
+
+
+def _add_cart_item_sqlite(db: Session, params: Dict[str, Any]):
+    product = db.execute(
+        text("SELECT id, current_price, real_price FROM products WHERE id = :product_id"), params
+    ).fetchone()
+    if product is None:
+        return None
+    cart_id = db.execute(
+        text("SELECT id FROM carts WHERE owner_user_id = :user_id AND status = 'active' ORDER BY id LIMIT 1"), params
+    ).scalar()
+    if cart_id is None:
+        cart_id = db.execute(text("INSERT INTO carts (owner_user_id) VALUES (:user_id) RETURNING id"), params).scalar()
+    item_id = db.execute(
+        text(
+            """
+            INSERT INTO cart_items (cart_id, product_id, quantity, price_at_add, metadata)
+            VALUES (:cart_id, :product_id, :quantity, COALESCE(:current_price, :real_price), :metadata)
+            ON CONFLICT (cart_id, product_id) DO UPDATE SET quantity = cart_items.quantity + excluded.quantity
+            RETURNING id
+            """
+        ),
+        dict(params, cart_id=cart_id, current_price=product[1], real_price=product[2]),
+    ).scalar()
+    return db.execute(
+        text(
+            """
+            SELECT ci.id AS item_id, ci.product_id, ci.quantity, ci.price_at_add, ci.metadata,
+                   p.id AS p_id, p.product_name AS p_name, p.description AS p_description,
+                   p.current_price AS p_current_price, p.real_price AS p_real_price
+            FROM cart_items ci JOIN products p ON p.id = ci.product_id
+            WHERE ci.id = :item_id
+            """
+        ),
+        {"item_id": item_id},
+    ).fetchone()
+
+
+_ENSURE_CART_SQL = """
+WITH existing AS (
+    SELECT id FROM public.carts WHERE owner_user_id = :user_id AND status = 'active' ORDER BY id LIMIT 1
+), created AS (
+    INSERT INTO public.carts (owner_user_id)
+    SELECT :user_id WHERE NOT EXISTS (SELECT 1 FROM existing)
+    RETURNING id
+)
+SELECT id FROM existing UNION ALL SELECT id FROM created
+"""
+
+
+def _ensure_cart(db: Session, user_id: int) -> int:
+    if not is_sqlite(db):
+        return db.execute(text(_ENSURE_CART_SQL), {"user_id": user_id}).scalar()
+    cart_id = db.execute(
+        text("SELECT id FROM carts WHERE owner_user_id = :user_id AND status = 'active' ORDER BY id LIMIT 1"), {"user_id": user_id}
+    ).scalar()
+    if cart_id is None:
+        cart_id = db.execute(text("INSERT INTO carts (owner_user_id) VALUES (:user_id) RETURNING id"), {"user_id": user_id}).scalar()
+    return cart_id
+
+
+def fold_cart_operations(operations) -> Dict[int, Tuple[str, int, Any]]:
+    """Reduce an ordered list of operations to one change per product.
+
+    Returns product_id -> (mode, quantity, metadata) where mode is "add"
+    (relative to the current line) or "set" (absolute; 0 removes the line).
+    """
+    changes: Dict[int, Tuple[str, int, Any]] = {}
+    for op in operations:
+        mode, quantity, metadata = changes.get(op.product_id, ("add", 0, None))
+        if op.metadata is not None:
+            metadata = op.metadata
+        if op.op == "add":
+            quantity += op.quantity if op.quantity is not None else 1
+        elif op.op == "set":
+            mode, quantity = "set", op.quantity
+        else:  # remove
+            mode, quantity = "set", 0
+        changes[op.product_id] = (mode, quantity, metadata)
+    return changes
+
+
+def _upsert_lines(db: Session, cart_id: int, lines: List[Tuple[int, int, Any, Any]], absolute: bool) -> None:
+    # One multi-row INSERT ... ON CONFLICT for all lines of the same mode.
+    params: Dict[str, Any] = {"cart_id": cart_id}
+    rows = []
+    metadata_sql = "CAST(:m{i} AS jsonb)" if not is_sqlite(db) else ":m{i}"
+    for i, (product_id, quantity, price, metadata) in enumerate(lines):
+        rows.append(f"(:cart_id, :p{i}, :q{i}, :pr{i}, {metadata_sql.format(i=i)})")
+        params.update({f"p{i}": product_id, f"q{i}": quantity, f"pr{i}": price, f"m{i}": _json_param(metadata)})
+    quantity_sql = "EXCLUDED.quantity" if absolute else "ci.quantity + EXCLUDED.quantity"
+    db.execute(
+        text(
+            f"INSERT INTO {table_name(db, 'cart_items')} AS ci (cart_id, product_id, quantity, price_at_add, metadata) "
+            f"VALUES {', '.join(rows)} "
+            f"ON CONFLICT (cart_id, product_id) DO UPDATE SET quantity = {quantity_sql}"
+        ),
+        params,
+    )
+
+
+def apply_cart_operations(db: Session, user_id: int, operations) -> Optional[Dict[str, Any]]:
+    """Apply add / set / remove operations to the user's active cart.
+
+    Operations on the same product are folded in order, then applied with a
+    constant number of statements in one transaction: ensure the cart, one
+    price lookup for all products, one DELETE and up to two multi-row
+    upserts. Returns the resulting cart, or None (nothing written) when an
+    added or set product does not exist.
+    """
+    changes = fold_cart_operations(operations)
+    cart_id = _ensure_cart(db, user_id)
+    removed = [pid for pid, (mode, quantity, _) in changes.items() if mode == "set" and quantity == 0]
+    upserts = {pid: change for pid, change in changes.items() if pid not in removed and change[1] > 0}
+    if upserts:
+        stmt = expand_lists(
+            db,
+            text(f"SELECT id, COALESCE(current_price, real_price) FROM {table_name(db, 'products')} WHERE {any_of(db, 'id', 'ids')}"),
+            "ids",
+        )
+        prices = dict(db.execute(stmt, {"ids": list(upserts)}).fetchall())
+        if len(prices) < len(upserts):
+            db.rollback()
+            return None
+        for absolute in (False, True):
+            lines = [(pid, quantity, prices[pid], metadata) for pid, (mode, quantity, metadata) in upserts.items() if (mode == "set") == absolute]
+            if lines:
+                _upsert_lines(db, cart_id, lines, absolute)
+    if removed:
+        stmt = expand_lists(
+            db,
+            text(f"DELETE FROM {table_name(db, 'cart_items')} WHERE cart_id = :cart_id AND {any_of(db, 'product_id', 'ids')}"),
+            "ids",
+        )
+        db.execute(stmt, {"cart_id": cart_id, "ids": removed})
+    cart = get_active_cart(db, user_id)
+    db.commit()
+    cart_cache.bump(user_id)
+    return cart
+
+
+REPRICE_BATCH_SIZE = 1000
+
+# One batch of repricing: lock (skipping lines a shopper is editing right
+# now) the next lines of active carts whose price_at_add differs from the
+# product's current price, update them and report what changed.
+_REPRICE_BATCH_SQL = """
+WITH batch AS (
+    SELECT ci.id, COALESCE(p.current_price, p.real_price) AS price
+    FROM public.cart_items ci
+    JOIN public.carts c ON c.id = ci.cart_id AND c.status = 'active'
+    JOIN public.products p ON p.id = ci.product_id
+    WHERE ci.id > :after_id
+      AND COALESCE(p.current_price, p.real_price) IS NOT NULL
+      AND ci.price_at_add IS DISTINCT FROM COALESCE(p.current_price, p.real_price)
+      {product_filter}
+    ORDER BY ci.id
+    LIMIT :batch_size
+    FOR UPDATE OF ci SKIP LOCKED
+), changed AS (
+    UPDATE public.cart_items ci SET price_at_add = batch.price
+    FROM batch WHERE ci.id = batch.id
+    RETURNING ci.id, ci.cart_id
+)
+SELECT (SELECT max(id) FROM batch) AS last_id,
+       (SELECT count(*) FROM changed) AS changed,
+       (SELECT array_agg(DISTINCT c.owner_user_id) FROM changed JOIN public.carts c ON c.id = changed.cart_id) AS owners
+"""
+
+
+def _reprice_batch_sqlite(db: Session, params: Dict[str, Any], product_filter: str):
+    rows = db.execute(
+        expand_lists(
+            db,
+            text(
+                f"""
+                UPDATE cart_items SET price_at_add = (
+                    SELECT COALESCE(p.current_price, p.real_price) FROM products p WHERE p.id = cart_items.product_id
+                )
+                WHERE id IN (
+                    SELECT ci.id FROM cart_items ci
+                    JOIN carts c ON c.id = ci.cart_id AND c.status = 'active'
+                    JOIN products p ON p.id = ci.product_id
+                    WHERE ci.id > :after_id
+                      AND COALESCE(p.current_price, p.real_price) IS NOT NULL
+                      AND ci.price_at_add IS NOT COALESCE(p.current_price, p.real_price)
+                      {product_filter}
+                    ORDER BY ci.id
+                    LIMIT :batch_size
+                )
+                RETURNING id, cart_id
+                """
+            ),
+            *(["product_ids"] if product_filter else []),
+        ),
+        params,
+    ).fetchall()
+    if not rows:
+        return None, 0, []
+    owners = db.execute(
+        expand_lists(db, text(f"SELECT DISTINCT owner_user_id FROM carts WHERE {any_of(db, 'id', 'cart_ids')}"), "cart_ids"),
+        {"cart_ids": sorted({r[1] for r in rows})},
+    ).scalars().all()
+    return max(r[0] for r in rows), len(rows), owners
+
+
+def reprice_carts(db: Session, product_ids: Optional[List[int]] = None, batch_size: int = REPRICE_BATCH_SIZE) -> Dict[str, int]:
+    """Bring price_at_add of active cart lines in line with product prices.
+
+    Affected lines are found with one join per batch and updated in batches
+    of `batch_size`, each in its own short transaction, walking cart_items
+    by id. On Postgres lines locked by a concurrent cart edit are skipped
+    (they are picked up by the next run). Pass `product_ids` to limit the
+    run to products whose prices changed. Returns counts of batches,
+    repriced lines and affected carts.
+
+    Prices only change outside the API, so this is run by hand or on a
+    schedule (`scripts/manage.py reprice-carts`), not from a write path.
+    """
+    product_filter = f"AND {any_of(db, 'ci.product_id', 'product_ids')}" if product_ids else ""
+    params: Dict[str, Any] = {"after_id": 0, "batch_size": batch_size}
+    if product_ids:
+        params["product_ids"] = list(product_ids)
+    report = {"batches": 0, "lines_repriced": 0, "carts_affected": 0}
+    owners_seen = set()
+    while True:
+        if is_sqlite(db):
+            last_id, changed, owners = _reprice_batch_sqlite(db, params, product_filter)
+        else:
+            row = db.execute(text(_REPRICE_BATCH_SQL.format(product_filter=product_filter)), params).fetchone()
+            last_id, changed, owners = row.last_id, row.changed, row.owners or []
+        db.commit()
+        if last_id is None:
+            break
+        report["batches"] += 1
+        report["lines_repriced"] += changed
+        for owner in owners:
+            if owner not in owners_seen:
+                owners_seen.add(owner)
+                cart_cache.bump(owner)
+        params["after_id"] = last_id
+    report["carts_affected"] = len(owners_seen)
+    return report
@@ -0,0 +1,125 @@
+"""Idempotency key records.
+
+One row per (user_id, scope, key). A row is claimed and committed before the
+request runs (status_code NULL), then completed with the response inside the
+request's own transaction, so the business write and the stored response
+commit together or not at all. A failed request deletes its claim so the
+client can retry. Expired rows are removed by `sweep_expired` (see
+`scripts/manage.py sweep-idempotency-keys`); until then they are simply
+ignored and can be claimed again.
+
+Each claim is identified by its `created_at`, which every (re)claim sets
+afresh. Completing or releasing a claim only matches that exact value, so a
+request whose claim was taken over can no longer commit its write.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app import models
+
+SWEEP_BATCH_SIZE = 1000
+
+
+def _key_filter(user_id: int, scope: str, key: str):
+    IdempotencyKey = models.idempotency.IdempotencyKey
+    return (IdempotencyKey.user_id == user_id, IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+
+
+def get_key(db: Session, user_id: int, scope: str, key: str):
+    """The record for `key`, via the unique (user_id, scope, key) index."""
+    return db.scalars(select(models.idempotency.IdempotencyKey).where(*_key_filter(user_id, scope, key))).first()
+
+
+def claim_key(db: Session, user_id: int, scope: str, key: str, request_hash: str, ttl: float) -> Optional[datetime]:
+    """Insert an in-progress record and return its claim (`created_at`), or
+    None if the key already has a record."""
+    IdempotencyKey = models.idempotency.IdempotencyKey
+    now = datetime.utcnow()
+    values = {"user_id": user_id, "scope": scope, "key": key, "request_hash": request_hash, "created_at": now, "expires_at": now + timedelta(seconds=ttl)}
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = pg_insert if dialect == "postgresql" else sqlite_insert
+        stmt = (
+            insert(IdempotencyKey)
+            .values(**values)
+            .on_conflict_do_nothing(index_elements=[IdempotencyKey.user_id, IdempotencyKey.scope, IdempotencyKey.key])
+            .returning(IdempotencyKey.id)
+        )
+        claimed = db.execute(stmt).first() is not None
+        db.commit()
+        return now if claimed else None
+    try:
+        db.add(IdempotencyKey(**values))
+        db.commit()
+        return now
+    except IntegrityError:
+        db.rollback()
+        return None
+
+
+def reclaim_key(db: Session, record_id: int, request_hash: str, ttl: float, stale_after: float) -> Optional[datetime]:
+    """Take over an expired record, or an in-progress one older than
+    `stale_after` seconds, and return the new claim; None if neither.
+
+    An in-progress record never has a committed write behind it (completion
+    commits with the write), and taking it over changes its claim, so the
+    original request can no longer complete it."""
+    IdempotencyKey = models.idempotency.IdempotencyKey
+    now = datetime.utcnow()
+    result = db.execute(
+        update(IdempotencyKey)
+        .where(
+            IdempotencyKey.id == record_id,
+            or_(
+                IdempotencyKey.expires_at <= now,
+                (IdempotencyKey.status_code.is_(None)) & (IdempotencyKey.created_at < now - timedelta(seconds=stale_after)),
+            ),
+        )
+        .values(request_hash=request_hash, status_code=None, response_body=None, created_at=now, expires_at=now + timedelta(seconds=ttl))
+    )
+    db.commit()
+    return now if result.rowcount == 1 else None
+
+
+def complete_key(db: Session, user_id: int, scope: str, key: str, claimed_at: datetime, status_code: int, response_body: str) -> bool:
+    """Store the response in the caller's transaction, without committing.
+
+    False if the claim was taken over meanwhile; the caller must then roll
+    back instead of committing its write.
+    """
+    IdempotencyKey = models.idempotency.IdempotencyKey
+    result = db.execute(
+        update(IdempotencyKey)
+        .where(*_key_filter(user_id, scope, key), IdempotencyKey.created_at == claimed_at, IdempotencyKey.status_code.is_(None))
+        .values(status_code=status_code, response_body=response_body)
+    )
+    return result.rowcount == 1
+
+
+def release_key(db: Session, user_id: int, scope: str, key: str, claimed_at: datetime) -> None:
+    """Drop our in-progress record so the request can be retried."""
+    IdempotencyKey = models.idempotency.IdempotencyKey
+    db.execute(
+        delete(IdempotencyKey).where(*_key_filter(user_id, scope, key), IdempotencyKey.created_at == claimed_at, IdempotencyKey.status_code.is_(None))
+    )
+    db.commit()
+
+
+def sweep_expired(db: Session, batch_size: int = SWEEP_BATCH_SIZE, now: Optional[datetime] = None) -> int:
+    """Delete expired records in batches (one short transaction each) and
+    return how many were removed."""
+    IdempotencyKey = models.idempotency.IdempotencyKey
+    now = now or datetime.utcnow()
+    removed = 0
+    while True:
+        batch = select(IdempotencyKey.id).where(IdempotencyKey.expires_at <= now).limit(batch_size)
+        result = db.execute(delete(IdempotencyKey).where(IdempotencyKey.id.in_(batch)))
+        db.commit()
+        removed += result.rowcount
+        if result.rowcount < batch_size:
+            return removed
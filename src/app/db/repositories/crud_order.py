@@ -1,12 +1,275 @@
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, func, insert, or_, select, text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 from app import models, schemas
+from app.core.config import settings
+from app.db.dialect import expand_lists, is_sqlite, table_name
+from app.db.repositories.crud_cart import cart_cache
+from app.db.repositories.pagination import decode_cursor, encode_cursor
+
+
+class UnknownProducts(LookupError):
+    """Some ordered products do not exist or have no price."""
+
+    def __init__(self, product_ids: List[int]):
+        super().__init__(f"unknown products: {product_ids}")
+        self.product_ids = product_ids
+
+
+class OutOfStock(Exception):
+    """Not enough stock left for some products; nothing was reserved."""
+
+    def __init__(self, product_ids: List[int]):
+        super().__init__(f"out of stock: {product_ids}")
+        self.product_ids = product_ids
+
+
+class EmptyCart(Exception):
+    """The active cart has no lines to check out."""
+
+
+class CheckoutBusy(Exception):
+    """Stock rows stayed locked by other checkouts past the lock timeout."""
 
-def create_order(db: Session, user_id: int, total: float):
+
+def fold_order_items(items: Iterable) -> "OrderedDict[int, int]":
+    """Quantity per product, merging repeated lines and keeping first-seen order."""
+    quantities: "OrderedDict[int, int]" = OrderedDict()
+    for item in items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    return quantities
+
+
+def get_prices(db: Session, product_ids: List[int]) -> Dict[int, float]:
+    """Current unit price of each product, in one `WHERE id IN (...)` query."""
+    Product = models.product.Product
+    price = func.coalesce(Product.current_price, Product.real_price)
+    rows = db.execute(select(Product.id, price).where(Product.id.in_(product_ids), price.isnot(None))).all()
+    return {pid: float(p) for pid, p in rows}
+
+
+def price_order_lines(db: Session, items: Iterable) -> Tuple[List[Tuple[int, int, float]], float]:
+    """(product_id, quantity, unit_price) lines and the order total.
+
+    Raises `UnknownProducts` if any product is missing or unpriced.
+    """
+    quantities = fold_order_items(items)
+    prices = get_prices(db, list(quantities))
+    missing = [pid for pid in quantities if pid not in prices]
+    if missing:
+        raise UnknownProducts(missing)
+    lines = [(pid, qty, prices[pid]) for pid, qty in quantities.items()]
+    total = round(sum(qty * price for _, qty, price in lines), 2)
+    return lines, total
+
+
+def _insert_order(db: Session, user_id: int, lines: List[Tuple[int, int, float]], total: float):
     db_obj = models.order.Order(user_id=user_id, total=total)
     db.add(db_obj)
-    db.commit()
+    db.flush()
+    # Core executemany: one batched INSERT, where the ORM would flush row by row
+    db.execute(
+        insert(models.order.OrderItem.__table__),
+        [{"order_id": db_obj.id, "product_id": pid, "quantity": qty, "unit_price": price} for pid, qty, price in lines],
+    )
+    return db_obj
+
+
+def create_order(db: Session, user_id: int, items: Iterable, commit: bool = True):
+    """Create an order and all of its lines in one transaction.
+
+    Prices are resolved with a single query and the lines are flushed as one
+    multi-row INSERT, so the statement count does not grow with the number of
+    lines. With `commit=False` the order is only flushed and the caller
+    commits it along with its own writes.
+    """
+    lines, total = price_order_lines(db, items)
+    db_obj = _insert_order(db, user_id, lines, total)
+    if commit:
+        db.commit()
+    db.refresh(db_obj)
+    return db_obj
+
+
+# Locks the tracked stock rows in product id order (every checkout takes them
+# in the same order, so two checkouts cannot deadlock), then takes stock with
+# one conditional UPDATE. Returns the ids that did not have enough left.
+_RESERVE_STOCK_SQL = """
+WITH wanted AS (
+    SELECT * FROM unnest(CAST(:product_ids AS integer[]), CAST(:quantities AS integer[])) AS w(product_id, quantity)
+),
+locked AS MATERIALIZED (
+    SELECT p.id FROM public.products p
+    JOIN wanted w ON w.product_id = p.id
+    WHERE p.stock IS NOT NULL
+    ORDER BY p.id
+    FOR UPDATE OF p
+),
+reserved AS (
+    UPDATE public.products p
+    SET stock = p.stock - w.quantity
+    FROM wanted w, locked l
+    WHERE p.id = w.product_id AND l.id = p.id AND p.stock >= w.quantity
+    RETURNING p.id
+)
+SELECT id FROM locked WHERE id NOT IN (SELECT id FROM reserved) ORDER BY id
+"""
+
+
+def _reserve_stock_sqlite(db: Session, quantities: Dict[int, int]) -> List[int]:
+    # SQLite holds the database write lock from the first UPDATE until
+    # commit/rollback, so nobody observes a transiently negative stock.
+    db.execute(
+        text("UPDATE products SET stock = stock - :quantity WHERE id = :product_id AND stock IS NOT NULL"),
+        [{"product_id": pid, "quantity": qty} for pid, qty in sorted(quantities.items())],
+    )
+    rows = db.execute(
+        expand_lists(db, text("SELECT id FROM products WHERE id IN :ids AND stock < 0 ORDER BY id"), "ids"),
+        {"ids": list(quantities)},
+    )
+    return [r[0] for r in rows]
+
+
+def reserve_stock(db: Session, quantities: Dict[int, int]) -> None:
+    """Take `quantities` (product id -> units) out of stock in the current
+    transaction. Products with untracked (NULL) stock are not touched.
+
+    Raises `OutOfStock` listing every short product; the caller must roll back.
+    """
+    if is_sqlite(db):
+        short = _reserve_stock_sqlite(db, quantities)
+    else:
+        ids = sorted(quantities)
+        rows = db.execute(
+            text(_RESERVE_STOCK_SQL),
+            {"product_ids": ids, "quantities": [quantities[pid] for pid in ids]},
+        )
+        short = [r[0] for r in rows]
+    if short:
+        raise OutOfStock(short)
+
+
+def _is_lock_timeout(exc: OperationalError) -> bool:
+    # 55P03 lock_not_available (Postgres lock_timeout); SQLite busy timeout
+    return getattr(exc.orig, "pgcode", None) == "55P03" or "database is locked" in str(exc.orig)
+
+
+def checkout_cart(db: Session, user_id: int):
+    """Turn the user's active cart into an order in one transaction.
+
+    The cart is claimed first (status -> 'checked_out', so a double submit
+    finds no active cart), then stock is reserved and the order with its lines
+    is written. Lines are charged at the product's current price, like
+    `create_order`; the cart's price_at_add is only what the cart displayed
+    (kept in sync by `crud_cart.reprice_carts`). Returns None when the user
+    has no active cart; raises
+    `EmptyCart`, `UnknownProducts`, `OutOfStock` or `CheckoutBusy`, in which
+    case nothing is changed.
+    """
+    carts = table_name(db, "carts")
+    cart_items = table_name(db, "cart_items")
+    products = table_name(db, "products")
+    try:
+        if not is_sqlite(db):
+            db.execute(text(f"SET LOCAL lock_timeout = {int(settings.CHECKOUT_LOCK_TIMEOUT_MS)}"))
+        cart_id = db.execute(
+            text(
+                f"""
+                UPDATE {carts} SET status = 'checked_out', updated_at = CURRENT_TIMESTAMP
+                WHERE id = (SELECT id FROM {carts} WHERE owner_user_id = :user_id AND status = 'active' ORDER BY id LIMIT 1)
+                  AND status = 'active'
+                RETURNING id
+                """
+            ),
+            {"user_id": user_id},
+        ).scalar()
+        if cart_id is None:
+            db.rollback()
+            return None
+        rows = db.execute(
+            text(
+                f"""
+                SELECT ci.product_id, ci.quantity, COALESCE(p.current_price, p.real_price)
+                FROM {cart_items} ci
+                LEFT JOIN {products} p ON p.id = ci.product_id
+                WHERE ci.cart_id = :cart_id AND ci.quantity > 0
+                ORDER BY ci.id
+                """
+            ),
+            {"cart_id": cart_id},
+        ).all()
+        if not rows:
+            raise EmptyCart()
+        # deleted (or unpriced) products; the former would also fail the
+        # order_items foreign key
+        unavailable = [pid for pid, _, price in rows if price is None]
+        if unavailable:
+            raise UnknownProducts(unavailable)
+        lines = [(pid, qty, float(price)) for pid, qty, price in rows]
+        reserve_stock(db, {pid: qty for pid, qty, _ in lines})
+        total = round(sum(qty * price for _, qty, price in lines), 2)
+        db_obj = _insert_order(db, user_id, lines, total)
+        db.commit()
+    except OperationalError as e:
+        db.rollback()
+        if _is_lock_timeout(e):
+            raise CheckoutBusy() from e
+        raise
+    except Exception:
+        db.rollback()
+        raise
+    cart_cache.bump(user_id)
     db.refresh(db_obj)
     return db_obj
 
 def get_order(db: Session, order_id: int):
     return db.query(models.order.Order).filter(models.order.Order.id == order_id).first()
+
+
+def get_order_items(db: Session, order_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """Lines of all `order_ids`, fetched in one query."""
+    OrderItem = models.order.OrderItem
+    items: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    if not order_ids:
+        return items
+    rows = db.execute(
+        select(OrderItem.order_id, OrderItem.product_id, OrderItem.quantity, OrderItem.unit_price)
+        .where(OrderItem.order_id.in_(order_ids))
+        .order_by(OrderItem.order_id, OrderItem.id)
+    )
+    for order_id, product_id, quantity, unit_price in rows:
+        items[order_id].append({"product_id": product_id, "quantity": quantity, "unit_price": unit_price})
+    return items
+
+
+def list_orders_page(db: Session, user_id: int, limit: int = 20, cursor: Optional[str] = None, include_items: bool = False) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Newest-first page of the user's orders.
+
+    Keyset-paginated on (created_at, id) descending and answered from the
+    (user_id, created_at, id) covering index; with `include_items` the lines
+    of the whole page come from one extra query. Returns (orders, next_cursor).
+    """
+    Order = models.order.Order
+    stmt = select(Order.id, Order.user_id, Order.total, Order.created_at).where(Order.user_id == user_id)
+    position = decode_cursor(cursor)
+    if position is not None:
+        try:
+            after_created_at = datetime.fromisoformat(position["created_at"])
+            after_id = int(position["id"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError("Invalid cursor") from e
+        stmt = stmt.where(or_(Order.created_at < after_created_at, and_(Order.created_at == after_created_at, Order.id < after_id)))
+    stmt = stmt.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit)
+    orders = [dict(r._mapping) for r in db.execute(stmt)]
+    if include_items:
+        items = get_order_items(db, [o["id"] for o in orders])
+        for o in orders:
+            o["items"] = items.get(o["id"], [])
+    next_cursor = None
+    if orders and len(orders) >= limit:
+        next_cursor = encode_cursor({"created_at": orders[-1]["created_at"].isoformat(), "id": orders[-1]["id"]})
+    return orders, next_cursor
@@ -1,6 +1,27 @@
+import uuid
+from datetime import datetime
+from typing import NamedTuple, Optional
+from sqlalchemy import DateTime, bindparam, text
 from sqlalchemy.orm import Session
 from app import models
 from app.models.schemas.product import ProductCreate
+from app.db.dialect import has_table, is_sqlite, table_name
+from app.db.repositories.pagination import decode_cursor, encode_cursor
+from app.core.cache import TieredCache, get_shared_backend
+from app.core.config import settings
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Read-through cache for catalog listings. Any write to the catalog must call
+# `catalog_cache.invalidate()`: this worker reloads at once, other workers
+# only with a shared backend (otherwise after CATALOG_CACHE_TTL_SECONDS).
+catalog_cache = TieredCache(
+    "catalog",
+    maxsize=settings.CATALOG_CACHE_MAXSIZE,
+    ttl=settings.CATALOG_CACHE_TTL_SECONDS,
+    backend=get_shared_backend(),
+)
 
 
 def create_product(db: Session, product_in: ProductCreate):
@@ -14,82 +35,402 @@ def create_product(db: Session, product_in: ProductCreate):
     db.add(db_obj)
     db.commit()
     db.refresh(db_obj)
+    catalog_cache.invalidate()
     return db_obj
 
 def get_product(db: Session, product_id: int):
     return db.query(models.product.Product).filter(models.product.Product.id == product_id).first()
 
-def list_products(db: Session, skip: int = 0, limit: int = 100):
+CATALOG_COLUMNS = "id, product_name, category, rating, people_rated_count, description, img_url, real_price, current_price, created_at"
+
+
+def catalog_sql(db: Session, featured_after: Optional[str] = None, products_after: Optional[str] = None, include_featured: bool = True, where: Optional[str] = None, extra_columns: str = "", order_by: str = "id", bounded: bool = True) -> str:
+    """Build the merged catalog as one statement.
+
+    Rows from featured_products come first (src = 0), followed by products
+    rows whose id is not featured (src = 1, anti-join). Each branch is
+    sorted by `order_by` (which must match the outer ORDER BY) and capped
+    at :branch_limit so the outer ORDER BY/LIMIT never has to look past a
+    single page. `featured_after` and `products_after` are optional keyset
+    predicates (SQL fragments) for the two branches; `where` is an extra
+    predicate applied to both and `extra_columns` extra select expressions
+    (e.g. ", <expr> AS rank"). With `bounded=False` the branches are left
+    unsorted and unlimited (for aggregates over the whole catalog).
+    """
+    featured = table_name(db, "featured_products")
+    products = table_name(db, "products")
+    product_where = "1 = 1" if products_after is None else f"p.id > {products_after}"
+    if where:
+        product_where += f" AND {where}"
+    branch_tail = f" ORDER BY {order_by} LIMIT :branch_limit" if bounded else ""
+    branches = []
+    # Local SQLite files may not have the externally managed featured table.
+    if has_table(db, "featured_products"):
+        if include_featured:
+            featured_where = "1 = 1" if featured_after is None else f"id > {featured_after}"
+            if where:
+                featured_where += f" AND {where}"
+            branches.append(
+                f"SELECT * FROM (SELECT 0 AS src, {CATALOG_COLUMNS}{extra_columns} FROM {featured} WHERE {featured_where}{branch_tail}) f"
+            )
+        product_where += f" AND NOT EXISTS (SELECT 1 FROM {featured} fp WHERE fp.id = p.id)"
+    product_columns = ", ".join(f"p.{c.strip()}" for c in CATALOG_COLUMNS.split(","))
+    branches.append(
+        f"SELECT * FROM (SELECT 1 AS src, {product_columns}{extra_columns} FROM {products} p WHERE {product_where}{branch_tail}) p"
+    )
+    return " UNION ALL ".join(branches)
+
+
+# Type hints for textual catalog queries so drivers that return DATETIME as
+# text (SQLite) still yield datetime objects.
+CATALOG_TYPES = {"created_at": DateTime}
+
+
+def catalog_row(r):
+    """Plain dict for one merged-catalog row, matching ProductRead."""
+    m = r._mapping
+    return {
+        "id": m["id"],
+        "product_name": m["product_name"],
+        "category": m["category"],
+        "rating": float(m["rating"]) if m["rating"] is not None else None,
+        "people_rated_count": int(m["people_rated_count"]) if m["people_rated_count"] is not None else None,
+        "description": m["description"],
+        "img_url": m["img_url"],
+        "real_price": float(m["real_price"]) if m["real_price"] is not None else None,
+        "current_price": float(m["current_price"]) if m["current_price"] is not None else None,
+        "created_at": m["created_at"],
+    }
+
+
+# sort name -> (column, descending). Rows without a value sort last and ties
+# are broken by id, so (key, id) is a total order usable for keyset paging.
+CATALOG_SORTS = {
+    "price": ("current_price", False),
+    "rating": ("rating", True),
+    "newest": ("created_at", True),
+}
+
+# Upper bounds of the price facet buckets; the last bucket is open-ended.
+PRICE_BUCKETS = [25.0, 50.0, 100.0, 200.0]
+
+
+def _filter_sql(filters: Optional[dict]):
+    """Translate listing filters into a predicate usable in both branches."""
+    clauses = []
+    params = {}
+    filters = filters or {}
+    if filters.get("category") is not None:
+        clauses.append("category = :f_category")
+        params["f_category"] = filters["category"]
+    if filters.get("min_price") is not None:
+        clauses.append("current_price >= :f_min_price")
+        params["f_min_price"] = filters["min_price"]
+    if filters.get("max_price") is not None:
+        clauses.append("current_price <= :f_max_price")
+        params["f_max_price"] = filters["max_price"]
+    if filters.get("min_rating") is not None:
+        clauses.append("rating >= :f_min_rating")
+        params["f_min_rating"] = filters["min_rating"]
+    return (" AND ".join(clauses) or None), params
+
+
+def _sort_sql(sort: Optional[str]) -> str:
+    if sort is None:
+        return "src, id"
+    column, descending = CATALOG_SORTS[sort]
+    return f"{column} {'DESC' if descending else 'ASC'} NULLS LAST, id"
+
+
+def _sorted_keyset_sql(sort: str, key_is_null: bool) -> str:
+    # Rows strictly after (:k, :after) in "<column> ASC|DESC NULLS LAST, id".
+    column, descending = CATALOG_SORTS[sort]
+    if key_is_null:
+        return f"({column} IS NULL AND id > :after)"
+    op = "<" if descending else ">"
+    return f"({column} {op} :k OR ({column} = :k AND id > :after) OR {column} IS NULL)"
+
+
+def list_products(db: Session, skip: int = 0, limit: int = 100, filters: Optional[dict] = None, sort: Optional[str] = None):
     # Return a merged list: first enriched rows from featured_products,
     # then remaining rows from products (mapped into the same shape).
-    from sqlalchemy import text
-    results = []
+    # Merge, dedupe, filtering, ordering and offset all happen in a single
+    # statement.
+    where, params = _filter_sql(filters)
+    order_by = _sort_sql(sort)
+    sql = catalog_sql(db, where=where, order_by="id" if sort is None else order_by)
+    rows = db.execute(
+        text(f"SELECT * FROM ({sql}) catalog ORDER BY {order_by} LIMIT :limit OFFSET :skip").columns(**CATALOG_TYPES),
+        {**params, "limit": limit, "skip": skip, "branch_limit": skip + limit},
+    ).fetchall()
+    return [catalog_row(r) for r in rows]
+
+
+def list_products_page(db: Session, limit: int = 100, cursor: Optional[str] = None, filters: Optional[dict] = None, sort: Optional[str] = None):
+    """Keyset-paginated variant of `list_products`.
+
+    By default the merged catalog is ordered as (src, id) where src 0 is
+    featured_products and 1 is the remaining products rows; with `sort` it
+    is ordered by that column (NULLs last) and id. Each page seeks past the
+    last returned position instead of OFFSET-ing, so every page costs the
+    same regardless of depth. Returns (rows, next_cursor); next_cursor is
+    None on the last page.
+    """
+    where, params = _filter_sql(filters)
+    params.update(limit=limit, branch_limit=limit)
+    position = decode_cursor(cursor)
+    if position is not None and position.get("sort") != sort:
+        raise ValueError("Invalid cursor")
+
+    if sort is None:
+        position = position or {"src": 0, "id": 0}
+        try:
+            src = int(position.get("src", 0))
+            params["after"] = int(position.get("id", 0))
+        except (TypeError, ValueError) as e:
+            raise ValueError("Invalid cursor") from e
+        if src == 0:
+            sql = catalog_sql(db, featured_after=":after", products_after="0", where=where)
+        else:
+            # featured rows are exhausted; seek within products only
+            sql = catalog_sql(db, products_after=":after", include_featured=False, where=where)
+    else:
+        sort_where = where
+        if position is not None:
+            try:
+                key = position["k"]
+                if key is not None and sort == "newest":
+                    key = datetime.fromisoformat(key)
+                elif key is not None:
+                    key = float(key)
+                params["after"] = int(position["id"])
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError("Invalid cursor") from e
+            params["k"] = key
+            keyset = _sorted_keyset_sql(sort, key is None)
+            sort_where = f"{where} AND {keyset}" if where else keyset
+        sql = catalog_sql(db, where=sort_where, order_by=_sort_sql(sort))
+
+    stmt = text(f"SELECT * FROM ({sql}) catalog ORDER BY {_sort_sql(sort)} LIMIT :limit")
+    if sort == "newest" and params.get("k") is not None:
+        stmt = stmt.bindparams(bindparam("k", type_=DateTime))
+    rows = db.execute(stmt.columns(**CATALOG_TYPES), params).fetchall()
+
+    next_cursor = None
+    if rows and len(rows) >= limit:
+        last = rows[-1]._mapping
+        if sort is None:
+            next_cursor = encode_cursor({"sort": None, "src": last["src"], "id": last["id"]})
+        else:
+            next_cursor = encode_cursor({"sort": sort, "k": last[CATALOG_SORTS[sort][0]], "id": last["id"]})
+    return [catalog_row(r) for r in rows], next_cursor
+
+
+def product_facets(db: Session, filters: Optional[dict] = None):
+    """Counts per category and per price bucket for the filtered catalog.
+
+    Both facets come from one statement: the filtered catalog is computed
+    once in a CTE and grouped twice.
+    """
+    where, params = _filter_sql(filters)
+    bucket_cases = " ".join(f"WHEN current_price < {upper} THEN {i}" for i, upper in enumerate(PRICE_BUCKETS))
+    bucket = f"CASE WHEN current_price IS NULL THEN NULL {bucket_cases} ELSE {len(PRICE_BUCKETS)} END"
+    rows = db.execute(
+        text(
+            f"WITH catalog AS ({catalog_sql(db, where=where, bounded=False)}) "
+            "SELECT 'category' AS facet, category, NULL AS bucket, count(*) AS n FROM catalog GROUP BY category "
+            f"UNION ALL SELECT 'price' AS facet, NULL AS category, {bucket} AS bucket, count(*) AS n FROM catalog GROUP BY {bucket}"
+        ),
+        params,
+    ).fetchall()
+
+    categories = []
+    price_buckets = []
+    for facet, category, bucket_index, count in rows:
+        if facet == "category":
+            categories.append({"value": category, "count": int(count)})
+        elif bucket_index is not None:
+            i = int(bucket_index)
+            price_buckets.append({
+                "min": PRICE_BUCKETS[i - 1] if i > 0 else 0.0,
+                "max": PRICE_BUCKETS[i] if i < len(PRICE_BUCKETS) else None,
+                "count": int(count),
+            })
+    categories.sort(key=lambda c: (-c["count"], c["value"] or ""))
+    price_buckets.sort(key=lambda b: b["min"])
+    return {"categories": categories, "price_buckets": price_buckets}
+
+
+def get_catalog_product(db: Session, product_id: int):
+    """Return a single merged-catalog row (featured data wins) or None."""
+    row = db.execute(
+        text(f"SELECT * FROM ({catalog_sql(db, where='id = :product_id')}) catalog ORDER BY src LIMIT 1").columns(**CATALOG_TYPES),
+        {"product_id": product_id, "branch_limit": 1},
+    ).fetchone()
+    return catalog_row(row) if row is not None else None
+
+
+# Document searched by GET /products/search. Must stay identical to the
+# expression indexed by the 0001_product_search_index migration, otherwise Postgres
+# cannot use the GIN index.
+SEARCH_DOCUMENT = "to_tsvector('english', coalesce(product_name, '') || ' ' || coalesce(category, '') || ' ' || coalesce(description, ''))"
+_SEARCH_QUERY = "websearch_to_tsquery('english', :q)"
+# Cast to float8 so the rank survives the cursor round trip exactly.
+_SEARCH_RANK = f"CAST(ts_rank({SEARCH_DOCUMENT}, {_SEARCH_QUERY}) AS double precision)"
+
+
+def _fts5_query(q: str) -> str:
+    # Quote every term so user input can never be parsed as FTS5 syntax;
+    # space-separated quoted terms are AND-ed.
+    return " ".join('"' + term.replace('"', '""') + '"' for term in q.split())
+
+
+def search_products(db: Session, q: str, limit: int = 20, cursor: Optional[str] = None):
+    """Ranked full-text search over product_name, category and description.
+
+    Results are ordered by (rank DESC, id) and keyset-paginated on that
+    pair. Postgres matches against the GIN-indexed tsvector of the merged
+    catalog; SQLite uses the products_fts FTS5 table. Returns
+    (rows, next_cursor).
+    """
+    position = decode_cursor(cursor)
     try:
-        feat_rows = db.execute(
-            text("SELECT id, product_name, category, rating, people_rated_count, description, img_url, real_price, current_price, created_at FROM public.featured_products ORDER BY id LIMIT :limit OFFSET :skip"),
-            {"limit": limit, "skip": skip},
+        after = (float(position["rank"]), int(position["id"])) if position else None
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if is_sqlite(db):
+        rows = _search_products_sqlite(db, q, limit, after)
+    else:
+        where = f"{SEARCH_DOCUMENT} @@ {_SEARCH_QUERY}"
+        params = {"q": q, "limit": limit, "branch_limit": limit}
+        if after is not None:
+            where += f" AND ({_SEARCH_RANK} < :rank OR ({_SEARCH_RANK} = :rank AND id > :after))"
+            params.update(rank=after[0], after=after[1])
+        sql = catalog_sql(db, where=where, extra_columns=f", {_SEARCH_RANK} AS rank", order_by="rank DESC, id")
+        rows = db.execute(
+            text(f"SELECT * FROM ({sql}) catalog ORDER BY rank DESC, id LIMIT :limit").columns(**CATALOG_TYPES),
+            params,
         ).fetchall()
-    except Exception:
-        feat_rows = []
-
-    feat_ids = set()
-    for r in feat_rows:
-        feat_ids.add(r[0])
-        results.append({
-            "id": r[0],
-            "product_name": r[1],
-            "category": r[2],
-            "rating": float(r[3]) if r[3] is not None else None,
-            "people_rated_count": int(r[4]) if r[4] is not None else None,
-            "description": r[5],
-            "img_url": r[6],
-            "real_price": float(r[7]) if r[7] is not None else None,
-            "current_price": float(r[8]) if r[8] is not None else None,
-            "created_at": r[9],
-        })
-
-    # Fill up remaining results from products table (exclude featured ids)
-    # We fetch up to `limit` rows starting from `skip` but since featured
-    # rows were already taken into account we simply query products and
-    # append those not in featured set until we reach `limit`.
-    try:
-        # products table now uses the enriched schema (product_name, real_price, current_price)
-        prod_rows = db.execute(text("SELECT id, product_name, description, real_price, current_price, created_at FROM public.products ORDER BY id"), {}).fetchall()
-    except Exception:
-        prod_rows = []
-
-    for pr in prod_rows:
-        if len(results) >= limit:
-            break
-        pid = pr[0]
-        if pid in feat_ids:
-            continue
-        results.append({
-            "id": pid,
-            "product_name": pr[1],
-            "category": None,
-            "rating": None,
-            "people_rated_count": None,
-            "description": pr[2],
-            "img_url": None,
-            "real_price": float(pr[3]) if pr[3] is not None else None,
-            "current_price": float(pr[3]) if pr[3] is not None else None,
-            "created_at": pr[4],
-        })
-
-    # Apply skip manually: skip was intended to offset the overall list
-    if skip:
-        results = results[skip:]
-    return results[:limit]
+
+    next_cursor = None
+    if rows and len(rows) >= limit:
+        last = rows[-1]._mapping
+        next_cursor = encode_cursor({"rank": last["rank"], "id": last["id"]})
+    return [catalog_row(r) for r in rows], next_cursor
+
+
+def _search_products_sqlite(db: Session, q: str, limit: int, after):
+    terms = _fts5_query(q)
+    if not terms:
+        return []
+    # bm25() is lower-is-better; negate it so both dialects sort rank DESC.
+    rank = "-bm25(products_fts)"
+    where = "products_fts MATCH :q"
+    params = {"q": terms, "limit": limit}
+    if after is not None:
+        where += f" AND ({rank} < :rank OR ({rank} = :rank AND p.id > :after))"
+        params.update(rank=after[0], after=after[1])
+    product_columns = ", ".join(f"p.{c.strip()}" for c in CATALOG_COLUMNS.split(","))
+    return db.execute(
+        text(f"SELECT 1 AS src, {product_columns}, {rank} AS rank FROM products_fts JOIN products p ON p.id = products_fts.rowid WHERE {where} ORDER BY rank DESC, p.id LIMIT :limit").columns(**CATALOG_TYPES),
+        params,
+    ).fetchall()
+
+
+class CatalogVersion(NamedTuple):
+    tag: str
+    last_modified: Optional[datetime]
+
+
+def catalog_version(db: Session) -> CatalogVersion:
+    """Catalog version used to derive HTTP validators: one primary-key read
+    of the trigger-maintained counter (see app.db.catalog_version)."""
+    if not has_table(db, "catalog_version"):
+        # Without the counter nothing tells us when the catalog changed, so
+        # never let a validator match across cache loads.
+        logger.warning("catalog.version_table_missing")
+        return CatalogVersion(tag=f"unversioned:{uuid.uuid4().hex}", last_modified=None)
+    version, updated_at = db.execute(
+        text(f"SELECT version, updated_at FROM {table_name(db, 'catalog_version')} WHERE id = 1").columns(updated_at=DateTime)
+    ).one()
+    return CatalogVersion(tag=str(version), last_modified=updated_at)
 
 
 def list_featured_products(db: Session, skip: int = 0, limit: int = 100):
     # Use raw SQL to read from the featured_products table which may have
     # different column names and is not modeled as an ORM class in this
     # codebase.
-    from sqlalchemy import text
     rows = db.execute(
-        text("SELECT id, product_name, category, rating, people_rated_count, description, img_url, real_price, current_price, created_at FROM public.featured_products ORDER BY id LIMIT :limit OFFSET :skip"),
+        text(f"SELECT {CATALOG_COLUMNS} FROM {table_name(db, 'featured_products')} ORDER BY id LIMIT :limit OFFSET :skip").columns(**CATALOG_TYPES),
         {"limit": limit, "skip": skip},
     ).fetchall()
     return rows
+
+
+def list_featured_products_page(db: Session, limit: int = 100, cursor: Optional[str] = None):
+    """Keyset-paginated variant of `list_featured_products`, seeking by id.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    position = decode_cursor(cursor) or {"id": 0}
+    try:
+        after_id = int(position.get("id", 0))
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    rows = db.execute(
+        text(f"SELECT {CATALOG_COLUMNS} FROM {table_name(db, 'featured_products')} WHERE id > :after ORDER BY id LIMIT :limit").columns(**CATALOG_TYPES),
+        {"after": after_id, "limit": limit},
+    ).fetchall()
+    next_cursor = encode_cursor({"id": rows[-1][0]}) if len(rows) >= limit else None
+    return rows, next_cursor
+
+
+def _filters_key(filters: Optional[dict]):
+    return tuple(sorted((k, v) for k, v in (filters or {}).items() if v is not None))
+
+
+def cached_list_products(db: Session, skip: int = 0, limit: int = 100, filters: Optional[dict] = None, sort: Optional[str] = None):
+    key = ("list_products", skip, limit, _filters_key(filters), sort)
+    return catalog_cache.get_or_load(key, lambda: list_products(db, skip=skip, limit=limit, filters=filters, sort=sort))
+
+
+def cached_list_products_page(db: Session, limit: int = 100, cursor: Optional[str] = None, filters: Optional[dict] = None, sort: Optional[str] = None):
+    # decode up front so malformed cursors fail fast and never occupy a slot
+    decode_cursor(cursor)
+    key = ("list_products_page", limit, cursor, _filters_key(filters), sort)
+    return catalog_cache.get_or_load(key, lambda: list_products_page(db, limit=limit, cursor=cursor, filters=filters, sort=sort))
+
+
+def cached_product_facets(db: Session, filters: Optional[dict] = None):
+    return catalog_cache.get_or_load(("product_facets", _filters_key(filters)), lambda: product_facets(db, filters=filters))
+
+
+# The featured wrappers cache rows already mapped to the response shape, so a
+# cache hit costs neither a query nor a row-to-dict conversion.
+def cached_list_featured_products(db: Session, skip: int = 0, limit: int = 100):
+    def load():
+        return [catalog_row(r) for r in list_featured_products(db, skip=skip, limit=limit)]
+    return catalog_cache.get_or_load(("list_featured_products", skip, limit), load)
+
+
+def cached_list_featured_products_page(db: Session, limit: int = 100, cursor: Optional[str] = None):
+    decode_cursor(cursor)
+
+    def load():
+        rows, next_cursor = list_featured_products_page(db, limit=limit, cursor=cursor)
+        return [catalog_row(r) for r in rows], next_cursor
+    return catalog_cache.get_or_load(("list_featured_products_page", limit, cursor), load)
+
+
+def cached_catalog_version(db: Session) -> CatalogVersion:
+    return catalog_cache.get_or_load(("catalog_version",), lambda: catalog_version(db))
+
+
+def cached_get_catalog_product(db: Session, product_id: int):
+    return catalog_cache.get_or_load(("get_catalog_product", product_id), lambda: get_catalog_product(db, product_id))
+
+
+def cached_search_products(db: Session, q: str, limit: int = 20, cursor: Optional[str] = None):
+    decode_cursor(cursor)
+    return catalog_cache.get_or_load(("search_products", q, limit, cursor), lambda: search_products(db, q, limit=limit, cursor=cursor))
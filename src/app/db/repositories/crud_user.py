@@ -1,12 +1,20 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app import models, schemas
 from app.core.security import get_password_hash, verify_password
+from app.core.user_cache import set_user_inactive
 
 def get_user_by_email(db: Session, email: str):
     return db.query(models.user.User).filter(models.user.User.email == email).first()
 
-def create_user(db: Session, user_in: schemas.user.UserCreate):
-    hashed = get_password_hash(user_in.password)
+def create_user(db: Session, user_in: schemas.user.UserCreate, hashed_password: Optional[str] = None):
+    # Callers that hash off-thread (see security.password_hasher) pass the
+    # precomputed hash in.
+    hashed = hashed_password or get_password_hash(user_in.password)
     db_user = models.user.User(email=user_in.email, hashed_password=hashed)
     db.add(db_user)
     db.commit()
@@ -22,20 +30,52 @@ def authenticate_user(db: Session, email: str, password: str):
     return user
 
 
+def set_user_active(db: Session, user, is_active: bool):
+    """Activate or deactivate a user and drop their cached auth snapshot.
+
+    Other processes' caches only learn of it through the shared
+    CACHE_BACKEND; without one they do after USER_CACHE_TTL_SECONDS (and
+    SUPABASE_TOKEN_CACHE_TTL_SECONDS for cached Supabase lookups).
+    """
+    user.is_active = is_active
+    db.commit()
+    db.refresh(user)
+    set_user_inactive(user.email, not is_active)
+    return user
+
+
 def get_or_create_by_email(db: Session, email: str):
     """Find a local user by email or create a lightweight local record.
 
     Local records created this way will have an empty `hashed_password` because
     authentication is delegated to Supabase. This keeps local relations (orders,
     products) working while Supabase remains the single auth source.
+
+    Existing users (the hot path) cost one SELECT. New users are created with
+    `INSERT ... ON CONFLICT (email) DO NOTHING RETURNING`, so concurrent first
+    logins for the same email never fail on the unique constraint; the loser
+    of the race re-reads the winner's row.
     """
+    User = models.user.User
     user = get_user_by_email(db, email)
     if user:
         return user
-    # Create a minimal local user. hashed_password is set to empty string since
-    # Supabase manages passwords.
-    db_user = models.user.User(email=email, hashed_password="")
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    dialect = db.get_bind().dialect.name
+    # Supabase manages passwords, hence the empty hashed_password
+    values = {"email": email, "hashed_password": "", "is_active": True, "is_superuser": False, "created_at": datetime.utcnow()}
+    if dialect in ("postgresql", "sqlite"):
+        insert = pg_insert if dialect == "postgresql" else sqlite_insert
+        stmt = insert(User).values(**values).on_conflict_do_nothing(index_elements=[User.email]).returning(User)
+        user = db.scalars(stmt).first()
+        db.commit()
+    else:
+        try:
+            user = User(**values)
+            db.add(user)
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            user = None
+    if user is None:
+        user = get_user_by_email(db, email)
+    return user
@@ -0,0 +1,187 @@
+"""Wishlist queries.
+
+Like the cart tables, wishlists and wishlist_items are managed in Supabase
+outside of the ORM, so these are raw SQL against the `public` schema.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import DateTime, bindparam, text
+from sqlalchemy.orm import Session
+
+from app.db.dialect import any_of, expand_lists, is_sqlite, table_name
+from app.db.repositories.pagination import decode_cursor, encode_cursor
+
+
+def wishlist_contains(db: Session, user_id: int, product_ids: List[int]) -> List[int]:
+    """Return which of `product_ids` are on the user's wishlist.
+
+    One query, served by the (wishlist_id, product_id) index.
+    """
+    if not product_ids:
+        return []
+    stmt = expand_lists(
+        db,
+        text(
+            f"SELECT DISTINCT wi.product_id FROM {table_name(db, 'wishlist_items')} wi "
+            f"JOIN {table_name(db, 'wishlists')} w ON w.id = wi.wishlist_id "
+            f"WHERE w.user_id = :user_id AND {any_of(db, 'wi.product_id', 'product_ids')}"
+        ),
+        "product_ids",
+    )
+    return sorted(db.execute(stmt, {"user_id": user_id, "product_ids": list(product_ids)}).scalars().all())
+
+
+WISHLIST_COLUMNS = """
+    wi.id AS item_id, wi.product_id, wi.added_at, wi.note,
+    p.id AS p_id, p.product_name AS p_name, p.category AS p_category, p.rating AS p_rating,
+    p.people_rated_count AS p_people_rated_count, p.description AS p_description, p.img_url AS p_img_url,
+    p.real_price AS p_real_price, p.current_price AS p_current_price, p.created_at AS p_created_at
+"""
+_WISHLIST_TYPES = {"added_at": DateTime, "p_created_at": DateTime}
+
+
+def _wishlist_item(r) -> Dict[str, Any]:
+    m = r._mapping
+    product = None
+    if m["p_id"] is not None:
+        product = {
+            "id": m["p_id"],
+            "product_name": m["p_name"],
+            "category": m["p_category"],
+            "rating": float(m["p_rating"]) if m["p_rating"] is not None else None,
+            "people_rated_count": int(m["p_people_rated_count"]) if m["p_people_rated_count"] is not None else None,
+            "description": m["p_description"],
+            "img_url": m["p_img_url"],
+            "real_price": float(m["p_real_price"]) if m["p_real_price"] is not None else None,
+            "current_price": float(m["p_current_price"]) if m["p_current_price"] is not None else None,
+            "created_at": m["p_created_at"],
+        }
+    return {"item_id": m["item_id"], "product_id": m["product_id"], "added_at": m["added_at"], "note": m["note"], "product": product}
+
+
+def get_wishlist_id(db: Session, user_id: int) -> Optional[int]:
+    return db.execute(
+        text(f"SELECT id FROM {table_name(db, 'wishlists')} WHERE user_id = :user_id ORDER BY id LIMIT 1"), {"user_id": user_id}
+    ).scalar()
+
+
+def list_wishlist_page(db: Session, user_id: int, limit: int = 50, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Newest-first page of the user's wishlist with product data joined in.
+
+    Keyset-paginated on (added_at, id) descending, served by the
+    (wishlist_id, added_at, id) index. Returns (items, next_cursor).
+    """
+    params: Dict[str, Any] = {"user_id": user_id, "limit": limit}
+    keyset = ""
+    position = decode_cursor(cursor)
+    if position is not None:
+        try:
+            params["after_added_at"] = datetime.fromisoformat(position["added_at"])
+            params["after_id"] = int(position["id"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError("Invalid cursor") from e
+        keyset = "AND (wi.added_at < :after_added_at OR (wi.added_at = :after_added_at AND wi.id < :after_id))"
+    stmt = text(
+        f"""
+        SELECT {WISHLIST_COLUMNS}
+        FROM {table_name(db, 'wishlist_items')} wi
+        JOIN {table_name(db, 'wishlists')} w ON w.id = wi.wishlist_id
+        LEFT JOIN {table_name(db, 'products')} p ON p.id = wi.product_id
+        WHERE w.user_id = :user_id {keyset}
+        ORDER BY wi.added_at DESC, wi.id DESC
+        LIMIT :limit
+        """
+    )
+    if position is not None:
+        stmt = stmt.bindparams(bindparam("after_added_at", type_=DateTime))
+    rows = db.execute(stmt.columns(**_WISHLIST_TYPES), params).fetchall()
+    items = [_wishlist_item(r) for r in rows]
+    next_cursor = None
+    if items and len(items) >= limit:
+        next_cursor = encode_cursor({"added_at": items[-1]["added_at"].isoformat(), "id": items[-1]["item_id"]})
+    return items, next_cursor
+
+
+_ENSURE_WISHLIST_SQL = """
+WITH existing AS (
+    SELECT id FROM public.wishlists WHERE user_id = :user_id ORDER BY id LIMIT 1
+), created AS (
+    INSERT INTO public.wishlists (user_id, name)
+    SELECT :user_id, 'Default' WHERE NOT EXISTS (SELECT 1 FROM existing)
+    RETURNING id
+)
+SELECT id FROM existing UNION ALL SELECT id FROM created
+"""
+
+
+def _ensure_wishlist(db: Session, user_id: int) -> int:
+    if not is_sqlite(db):
+        return db.execute(text(_ENSURE_WISHLIST_SQL), {"user_id": user_id}).scalar()
+    wishlist_id = get_wishlist_id(db, user_id)
+    if wishlist_id is None:
+        wishlist_id = db.execute(
+            text("INSERT INTO wishlists (user_id, name) VALUES (:user_id, 'Default') RETURNING id"), {"user_id": user_id}
+        ).scalar()
+    return wishlist_id
+
+
+def _insert_items(db: Session, wishlist_id: int, items: List[Tuple[int, Optional[str]]]) -> int:
+    # One multi-row INSERT; products already on the wishlist are left as is.
+    # Untargeted ON CONFLICT, as before: it relies on whatever unique
+    # constraint the Supabase-managed table has and needs none to exist.
+    params: Dict[str, Any] = {"wishlist_id": wishlist_id}
+    rows = []
+    for i, (product_id, note) in enumerate(items):
+        rows.append(f"(:wishlist_id, :p{i}, :n{i})")
+        params.update({f"p{i}": product_id, f"n{i}": note})
+    result = db.execute(
+        text(
+            f"INSERT INTO {table_name(db, 'wishlist_items')} (wishlist_id, product_id, note) VALUES {', '.join(rows)} "
+            "ON CONFLICT DO NOTHING"
+        ),
+        params,
+    )
+    return result.rowcount
+
+
+def add_wishlist_item(db: Session, user_id: int, product_id: int, note: Optional[str] = None) -> Dict[str, Any]:
+    """Add a product (no-op if already present) and return the item with its product."""
+    wishlist_id = _ensure_wishlist(db, user_id)
+    _insert_items(db, wishlist_id, [(product_id, note)])
+    row = db.execute(
+        text(
+            f"""
+            SELECT {WISHLIST_COLUMNS}
+            FROM {table_name(db, 'wishlist_items')} wi
+            LEFT JOIN {table_name(db, 'products')} p ON p.id = wi.product_id
+            WHERE wi.wishlist_id = :wishlist_id AND wi.product_id = :product_id
+            """
+        ).columns(**_WISHLIST_TYPES),
+        {"wishlist_id": wishlist_id, "product_id": product_id},
+    ).fetchone()
+    db.commit()
+    return _wishlist_item(row)
+
+
+def update_wishlist_items(db: Session, user_id: int, add: List[Tuple[int, Optional[str]]], remove: List[int]) -> Dict[str, int]:
+    """Add and remove many products in one transaction.
+
+    At most one multi-row INSERT and one DELETE; returns how many rows each
+    actually changed.
+    """
+    wishlist_id = _ensure_wishlist(db, user_id)
+    added = removed = 0
+    remove_ids = set(remove)
+    add = [(pid, note) for pid, note in dict(add).items() if pid not in remove_ids]
+    if add:
+        added = _insert_items(db, wishlist_id, add)
+    if remove_ids:
+        stmt = expand_lists(
+            db,
+            text(f"DELETE FROM {table_name(db, 'wishlist_items')} WHERE wishlist_id = :wishlist_id AND {any_of(db, 'product_id', 'ids')}"),
+            "ids",
+        )
+        removed = db.execute(stmt, {"wishlist_id": wishlist_id, "ids": sorted(remove_ids)}).rowcount
+    db.commit()
+    return {"added": added, "removed": removed}
@@ -0,0 +1,27 @@
+import base64
+import json
+from typing import Any, Dict, Optional
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """Encode a keyset position into an opaque, URL-safe cursor string."""
+    raw = json.dumps(position, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Decode a cursor produced by `encode_cursor`.
+
+    Returns None for an empty cursor and raises ValueError when the cursor
+    was tampered with or is not one of ours.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(position, dict):
+        raise ValueError("Invalid cursor")
+    return position
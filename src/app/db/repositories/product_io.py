@@ -0,0 +1,225 @@
+"""Bulk catalog import and export.
+
+Imports stream rows from a CSV or NDJSON text stream, validate them with
+`ProductCreate` and write them in fixed-size chunks, so memory use is bounded
+by the chunk size regardless of the input size. Invalid rows are reported and
+skipped; they never abort the rest of the import.
+
+Exports read the merged catalog through a server-side cursor and yield
+encoded batches, so the full table is never held in memory.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, TextIO, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app import models
+from app.models.schemas.product import ProductCreate
+from app.core.responses import dumps
+from app.db.dialect import has_table, table_name
+from app.db.repositories.crud_product import CATALOG_COLUMNS, CATALOG_TYPES, catalog_row, catalog_sql, catalog_cache
+
+IMPORT_FORMATS = ("csv", "ndjson")
+IMPORT_CHUNK_SIZE = 1000
+# Cap on reported row errors so a completely broken file cannot grow the
+# report without bound.
+MAX_REPORTED_ERRORS = 1000
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FIELDS = [c.strip() for c in CATALOG_COLUMNS.split(",")]
+
+_COPY_COLUMNS = ("product_name", "description", "real_price", "current_price", "created_at")
+
+
+class ImportReport:
+    def __init__(self):
+        self.processed = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.errors_truncated = False
+
+    def add_error(self, line: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+        else:
+            self.errors_truncated = True
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.errors_truncated,
+        }
+
+
+def iter_records(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """Yield (line_number, record) pairs; record is an Exception for rows
+    that could not be parsed."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                yield reader.line_num, e
+                continue
+            if None in row:
+                yield reader.line_num, ValueError("row has more fields than the header")
+                continue
+            # Empty CSV cells mean "not provided"
+            yield reader.line_num, {k: v for k, v in row.items() if v != ""}
+    elif fmt == "ndjson":
+        for line_no, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_no, e
+                continue
+            if not isinstance(record, dict):
+                yield line_no, ValueError("expected a JSON object")
+                continue
+            yield line_no, record
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def _product_values(product_in: ProductCreate, now: datetime) -> Dict[str, Any]:
+    # Same mapping of legacy fields (title, price) as create_product
+    return {
+        "product_name": product_in.title,
+        "description": product_in.description,
+        "real_price": product_in.price,
+        "current_price": product_in.price,
+        "created_at": now,
+    }
+
+
+def _copy_rows(db: Session, rows: List[Dict[str, Any]]) -> None:
+    # COPY is the fastest bulk path on Postgres; the chunk is staged as CSV
+    # in memory (bounded by IMPORT_CHUNK_SIZE).
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow(["" if row[c] is None else row[c] for c in _COPY_COLUMNS])
+    buf.seek(0)
+    dbapi_conn = db.connection().connection
+    with dbapi_conn.cursor() as cur:
+        cur.copy_expert(
+            f"COPY {table_name(db, 'products')} ({', '.join(_COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buf,
+        )
+
+
+def _write_chunk(db: Session, chunk: List[Tuple[int, Dict[str, Any]]], report: ImportReport) -> None:
+    rows = [values for _, values in chunk]
+    try:
+        if db.get_bind().dialect.name == "postgresql":
+            _copy_rows(db, rows)
+        else:
+            # executemany; SQLite and other dialects
+            db.execute(insert(models.product.Product.__table__), rows)
+        db.commit()
+        report.inserted += len(rows)
+        return
+    except Exception:
+        # COPY raises driver errors that SQLAlchemy does not wrap
+        db.rollback()
+    # The chunk was rejected as a whole; retry row by row to find the
+    # offending rows without losing the valid ones.
+    for line_no, values in chunk:
+        try:
+            db.execute(insert(models.product.Product.__table__), values)
+            db.commit()
+            report.inserted += 1
+        except SQLAlchemyError as e:
+            db.rollback()
+            report.add_error(line_no, str(getattr(e, "orig", e)))
+
+
+def import_products(db: Session, stream: TextIO, fmt: str, chunk_size: int = IMPORT_CHUNK_SIZE) -> Dict[str, Any]:
+    """Import products from a CSV (header row) or NDJSON stream.
+
+    Each record must validate as `ProductCreate` (title, price and an
+    optional description). Returns the import report as a dict.
+    """
+    report = ImportReport()
+    chunk: List[Tuple[int, Dict[str, Any]]] = []
+    now = datetime.utcnow()
+    try:
+        for line_no, record in iter_records(stream, fmt):
+            report.processed += 1
+            if isinstance(record, Exception):
+                report.add_error(line_no, str(record))
+                continue
+            try:
+                product_in = ProductCreate.model_validate(record)
+            except ValidationError as e:
+                report.add_error(line_no, "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()))
+                continue
+            chunk.append((line_no, _product_values(product_in, now)))
+            if len(chunk) >= chunk_size:
+                _write_chunk(db, chunk, report)
+                chunk = []
+        if chunk:
+            _write_chunk(db, chunk, report)
+    finally:
+        if report.inserted:
+            catalog_cache.invalidate()
+    return report.as_dict()
+
+
+def iter_catalog(db: Session, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Yield the merged catalog in batches of row dicts.
+
+    Featured rows come first, then the non-featured products, each in id
+    order, matching the listing. Each branch is read with its own streaming
+    query so rows are fetched `batch_size` at a time from a server-side
+    cursor and the first batch is available immediately.
+    """
+    statements = []
+    if has_table(db, "featured_products"):
+        statements.append(f"SELECT {CATALOG_COLUMNS} FROM {table_name(db, 'featured_products')} ORDER BY id")
+    statements.append(f"SELECT * FROM ({catalog_sql(db, include_featured=False, bounded=False)}) c ORDER BY id")
+    for sql in statements:
+        stmt = text(sql).columns(**CATALOG_TYPES).execution_options(stream_results=True, yield_per=batch_size)
+        result = db.execute(stmt)
+        try:
+            for partition in result.partitions():
+                yield [catalog_row(r) for r in partition]
+        finally:
+            result.close()
+
+
+def export_ndjson(db: Session, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    for batch in iter_catalog(db, batch_size):
+        yield b"".join(dumps(row) + b"\n" for row in batch)
+
+
+def export_csv(db: Session, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for batch in iter_catalog(db, batch_size):
+        for row in batch:
+            if row["created_at"] is not None:
+                row["created_at"] = row["created_at"].isoformat()
+            writer.writerow(row)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
@@ -0,0 +1,26 @@
+"""SQLite full-text search index backing GET /products/search locally.
+
+Postgres gets a GIN index from migration 0001. SQLite gets an FTS5 table
+over products kept in sync by triggers; the same DDL is used by that
+migration and by app startup for SQLite files created with `create_all`.
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(product_name, category, description, content='products', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN INSERT INTO products_fts(rowid, product_name, category, description) VALUES (new.id, new.product_name, new.category, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN INSERT INTO products_fts(products_fts, rowid, product_name, category, description) VALUES ('delete', old.id, old.product_name, old.category, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE ON products BEGIN INSERT INTO products_fts(products_fts, rowid, product_name, category, description) VALUES ('delete', old.id, old.product_name, old.category, old.description); INSERT INTO products_fts(rowid, product_name, category, description) VALUES (new.id, new.product_name, new.category, new.description); END",
+    # index rows that existed before the triggers
+    "INSERT INTO products_fts(products_fts) VALUES ('rebuild')",
+]
+
+
+def create_sqlite_search_index(conn: Connection) -> bool:
+    """Create the FTS5 table and triggers unless they exist; True if created."""
+    if inspect(conn).has_table("products_fts"):
+        return False
+    for stmt in SQLITE_SEARCH_DDL:
+        conn.execute(text(stmt))
+    return True
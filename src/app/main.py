@@ -4,13 +4,22 @@ from app.core.exceptions import HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
+from fastapi.encoders import jsonable_encoder
 from app.api.routes.api import api_router
 from app.db import session
 from sqlalchemy import text
 from app.db.base import Base
+from app.db.search_index import create_sqlite_search_index
+from app.db.catalog_version import create_sqlite_catalog_version
 from app.core.config import settings
 from app.core.supabase_client import supabase_client
+from app.core.supabase_jwks import jwks_cache
+from app.core.supabase_auth import token_cache_stats
 from app.core.logging_config import add_app_loggers, get_logger
+from app.db.repositories.crud_product import catalog_cache
+from app.db.repositories.crud_cart import cart_cache
+from app.core import idempotency, user_cache
+from app.core.security import password_hasher
 
 add_app_loggers()
 logger = get_logger()
@@ -22,7 +31,8 @@ app = FastAPI(title="DripHub Backend")
 async def custom_http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(
         status_code=exc.status_code,
-        content={"message": exc.detail}
+        content={"message": exc.detail},
+        headers=getattr(exc, "headers", None),
     )
 
 # Fallback handler for any remaining FastAPI HTTPExceptions
@@ -30,7 +40,8 @@ async def custom_http_exception_handler(request: Request, exc: HTTPException):
 async def fastapi_http_exception_handler(request: Request, exc: FastAPIHTTPException):
     return JSONResponse(
         status_code=exc.status_code,
-        content={"message": exc.detail}
+        content={"message": exc.detail},
+        headers=getattr(exc, "headers", None),
     )
 
 # Custom validation error handler
@@ -38,7 +49,7 @@ async def fastapi_http_exception_handler(request: Request, exc: FastAPIHTTPExcep
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     return JSONResponse(
         status_code=422,
-        content={"message": "Validation error", "errors": exc.errors()}
+        content={"message": "Validation error", "errors": jsonable_encoder(exc.errors())}
     )
 
 # Add CORS middleware - must be added BEFORE other middleware and routes
@@ -46,8 +57,9 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # In production, replace with specific origins
     allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
@@ -61,6 +73,13 @@ async def startup_event():
         engine = session.engine
         try:
             Base.metadata.create_all(bind=engine)
+            if engine.dialect.name == "sqlite":
+                # Postgres gets these from the 0001 and 0009 migrations
+                with engine.begin() as conn:
+                    if create_sqlite_search_index(conn):
+                        logger.info("db.search_index_created")
+                    if create_sqlite_catalog_version(conn):
+                        logger.info("db.catalog_version_created")
         except Exception as e:
             # Log the error but do not prevent the application from
             # starting. In production, prefer running migrations separately.
@@ -70,6 +89,9 @@ async def startup_event():
 
     # Supabase health check (best-effort)
     if settings.SUPABASE_URL:
+        await supabase_client.start()
+        if settings.SUPABASE_JWT_VERIFY_MODE == "local":
+            await jwks_cache.start()
         try:
             info = await supabase_client.health_check()
             logger.info("supabase.health", **info)
@@ -78,6 +100,14 @@ async def startup_event():
     else:
         logger.info("supabase.disabled")
 
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await jwks_cache.stop()
+    await supabase_client.aclose()
+    password_hasher.shutdown()
+
+
 @app.get("/")
 def read_root():
     return {"message": "DripHub backend is running"}
@@ -113,3 +143,15 @@ def health_db():
         if settings.DB_HEALTH_VERBOSE:
             return JSONResponse(status_code=503, content={"status": "unavailable", "db": "unreachable", "error": str(e)})
         return JSONResponse(status_code=503, content={"status": "unavailable", "db": "unreachable"})
+
+
+@app.get("/health/cache")
+def health_cache():
+    """Hit/miss/eviction counters for the in-process and shared cache tiers."""
+    return {"catalog": catalog_cache.stats(), "users": user_cache.stats(), "supabase_tokens": token_cache_stats(), "cart": cart_cache.stats(), "idempotency": idempotency.stats()}
+
+
+@app.get("/health/auth")
+def health_auth():
+    """Password hashing pool: queue depth, rejections, hash time vs queue wait."""
+    return {"password_hashing": password_hasher.stats()}
@@ -1,2 +1,2 @@
 # models package
-from app.models import user, product, order
+from app.models import user, product, order, idempotency
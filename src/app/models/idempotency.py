@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, UniqueConstraint
+from datetime import datetime
+from app.db.base import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False)
+    # endpoint the key belongs to, e.g. "POST /orders"
+    scope = Column(String(64), nullable=False)
+    key = Column(String(255), nullable=False)
+    # sha256 of the request body, to reject a key reused for another request
+    request_hash = Column(String(64), nullable=False)
+    # NULL while the first request is still being processed
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "scope", "key", name="uq_idempotency_keys_user_id_scope_key"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Float
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Float, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.base import Base
@@ -13,3 +13,24 @@ class Order(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("User")
+    # selectin: loading any number of orders costs one extra query for all lines
+    items = relationship("OrderItem", back_populates="order", lazy="selectin", cascade="all, delete-orphan", order_by="OrderItem.id")
+
+    # Serves GET /orders pages without touching the table (see the 0007
+    # migration, which adds the covering column on SQLite too).
+    __table_args__ = (
+        Index("ix_orders_user_id_created_at_id", "user_id", created_at.desc(), id.desc(), postgresql_include=["total_amount"]),
+    )
+
+
+class OrderItem(Base):
+    __tablename__ = "order_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    # price per unit when the order was placed
+    unit_price = Column(Float, nullable=False)
+
+    order = relationship("Order", back_populates="items")
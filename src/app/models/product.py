@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Index
 from datetime import datetime
 from app.db.base import Base
 
@@ -15,8 +15,17 @@ class Product(Base):
     img_url = Column(Text, nullable=True)
     real_price = Column(Float, nullable=True)
     current_price = Column(Float, nullable=True)
+    # units available for checkout; NULL means stock is not tracked
+    stock = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Serve filtered browsing on /products (see the 0002 migration, which
+    # also adds the same indexes to featured_products).
+    __table_args__ = (
+        Index("ix_products_category_current_price", "category", "current_price"),
+        Index("ix_products_rating_people_rated_count", "rating", "people_rated_count"),
+    )
+
     # compatibility alias
     @property
     def title(self):
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional, Any
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional, Any
 from datetime import datetime
 from app.models.schemas.product import ProductRead
 
@@ -23,3 +23,29 @@ class Cart(BaseModel):
     cart_id: int
     owner_user_id: int
     items: List[CartItemResponse]
+    # list price (products.real_price) x quantity, summed
+    subtotal: float = 0.0
+    # subtotal - total
+    discount: float = 0.0
+    # price_at_add x quantity, summed: what the customer pays
+    total: float = 0.0
+
+
+class CartItemOperation(BaseModel):
+    op: Literal["add", "set", "remove"]
+    product_id: int
+    # add: amount to add (default 1); set: new quantity (0 removes the line)
+    quantity: Optional[int] = Field(None, ge=0)
+    metadata: Optional[Any] = None
+
+    @model_validator(mode="after")
+    def _check_quantity(self):
+        if self.op == "set" and self.quantity is None:
+            raise ValueError("quantity is required for set")
+        if self.op == "add" and self.quantity == 0:
+            raise ValueError("quantity must be positive for add")
+        return self
+
+
+class CartBatchUpdate(BaseModel):
+    operations: List[CartItemOperation] = Field(..., min_length=1, max_length=200)
@@ -1,16 +1,27 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
 
 class OrderItem(BaseModel):
     product_id: int
-    quantity: int
+    quantity: int = Field(gt=0)
 
 class OrderCreate(BaseModel):
-    items: List[OrderItem]
+    items: List[OrderItem] = Field(min_length=1, max_length=200)
+
+class OrderItemRead(BaseModel):
+    product_id: int
+    quantity: int
+    unit_price: float
+
+    model_config = {"from_attributes": True}
 
 class OrderRead(BaseModel):
     id: int
     user_id: int
     total: float
+    created_at: Optional[datetime] = None
+    # left out of GET /orders pages unless include_items=true
+    items: List[OrderItemRead] = []
 
     model_config = {"from_attributes": True}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -27,3 +27,37 @@ class ProductRead(BaseModel):
     created_at: Optional[datetime] = None
 
     model_config = {"from_attributes": True}
+
+
+class CatalogProduct(ProductRead):
+    # only present when the listing is requested with with_wishlist=true
+    in_wishlist: Optional[bool] = None
+
+
+class CategoryFacet(BaseModel):
+    value: Optional[str] = None
+    count: int
+
+
+class PriceBucketFacet(BaseModel):
+    min: float
+    max: Optional[float] = None
+    count: int
+
+
+class ProductFacets(BaseModel):
+    categories: List[CategoryFacet]
+    price_buckets: List[PriceBucketFacet]
+
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+
+class ProductImportReport(BaseModel):
+    processed: int
+    inserted: int
+    failed: int
+    errors: List[ImportRowError]
+    errors_truncated: bool = False
@@ -1,6 +1,7 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
+from app.models.schemas.product import ProductRead
 
 
 class WishlistItemCreate(BaseModel):
@@ -13,3 +14,20 @@ class WishlistItemResponse(BaseModel):
     product_id: int
     added_at: datetime
     note: Optional[str]
+    product: Optional[ProductRead] = None
+
+
+class WishlistContains(BaseModel):
+    # the requested product ids that are on the wishlist
+    product_ids: List[int]
+
+
+class WishlistBatchUpdate(BaseModel):
+    add: List[WishlistItemCreate] = Field(default_factory=list, max_length=200)
+    # product ids; a product in both lists ends up removed
+    remove: List[int] = Field(default_factory=list, max_length=200)
+
+
+class WishlistBatchResult(BaseModel):
+    added: int
+    removed: int
@@ -0,0 +1,170 @@
+"""Test configuration.
+
+Tests run against a throwaway SQLite file unless TEST_DATABASE_URL is set;
+DATABASE_URL from the environment or .env is deliberately ignored so the
+suite can never touch a real database. Tests that only make sense on
+Postgres are skipped without TEST_POSTGRES_URL.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+_TMP = tempfile.mkdtemp(prefix="driphub-tests-")
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL") or f"sqlite:///{os.path.join(_TMP, 'test.db')}"
+os.environ.setdefault("LOG_PRETTY", "false")
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def engine():
+    from app.db.base import Base
+    from app.db.catalog_version import create_sqlite_catalog_version
+    from app.db.dialect import clear_table_cache
+    from app.db.search_index import create_sqlite_search_index
+    from app.db.session import engine
+
+    Base.metadata.create_all(bind=engine)
+    if engine.dialect.name == "sqlite":
+        # what app startup adds to a create_all database
+        with engine.begin() as conn:
+            create_sqlite_search_index(conn)
+            create_sqlite_catalog_version(conn)
+        clear_table_cache()
+    return engine
+
+
+@pytest.fixture
+def db(engine):
+    from app.db.session import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+# carts and cart_items are managed in Supabase, outside the ORM
+CART_DDL = {
+    "sqlite": [
+        "CREATE TABLE IF NOT EXISTS carts (id INTEGER PRIMARY KEY, owner_user_id INTEGER, status TEXT DEFAULT 'active', created_at DATETIME DEFAULT CURRENT_TIMESTAMP, updated_at DATETIME DEFAULT CURRENT_TIMESTAMP)",
+        "CREATE TABLE IF NOT EXISTS cart_items (id INTEGER PRIMARY KEY, cart_id INTEGER, product_id INTEGER, quantity INTEGER, price_at_add REAL, metadata TEXT, UNIQUE (cart_id, product_id))",
+    ],
+    "postgresql": [
+        "CREATE TABLE IF NOT EXISTS public.carts (id serial PRIMARY KEY, owner_user_id integer, status text DEFAULT 'active', created_at timestamptz DEFAULT now(), updated_at timestamptz DEFAULT now())",
+        "CREATE TABLE IF NOT EXISTS public.cart_items (id serial PRIMARY KEY, cart_id integer, product_id integer, quantity integer, price_at_add numeric, metadata jsonb, UNIQUE (cart_id, product_id))",
+    ],
+}
+
+
+@pytest.fixture(scope="session")
+def cart_tables(engine):
+    from sqlalchemy import text
+
+    with engine.begin() as conn:
+        for stmt in CART_DDL[engine.dialect.name]:
+            conn.execute(text(stmt))
+    return engine
+
+
+@pytest.fixture
+def make_user(db):
+    """Create an active user; returns (user, Authorization headers)."""
+    import uuid
+
+    from app import models
+    from app.core.security import create_access_token
+
+    def make():
+        user = models.user.User(email=f"user-{uuid.uuid4().hex}@example.com", hashed_password="", is_active=True, is_superuser=False)
+        db.add(user)
+        db.commit()
+        return user, {"Authorization": f"Bearer {create_access_token(user.email)}"}
+
+    return make
+
+
+# featured_products is managed in Supabase, outside the ORM
+FEATURED_DDL = (
+    "CREATE TABLE IF NOT EXISTS featured_products (id INTEGER PRIMARY KEY, product_name TEXT, category TEXT, rating REAL, "
+    "people_rated_count INTEGER, description TEXT, img_url TEXT, real_price REAL, current_price REAL, created_at DATETIME)"
+)
+CATALOG_FIELDS = ("id", "product_name", "category", "rating", "people_rated_count", "description", "img_url", "real_price", "current_price", "created_at")
+
+
+@pytest.fixture(scope="module")
+def catalog_engine(tmp_path_factory):
+    """A private SQLite database with both catalog tables, so listings only
+    see the rows a test module seeds."""
+    from sqlalchemy import create_engine, text
+
+    from app.db.base import Base
+    from app.db.catalog_version import create_sqlite_catalog_version
+    from app.db.search_index import create_sqlite_search_index
+
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('catalog') / 'catalog.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text(FEATURED_DDL))
+        create_sqlite_search_index(conn)
+        create_sqlite_catalog_version(conn)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def catalog_db(catalog_engine):
+    from sqlalchemy.orm import Session
+
+    session = Session(bind=catalog_engine)
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def seed_catalog(catalog_db):
+    """Replace both catalog tables with rows given as dicts of CATALOG_FIELDS."""
+    from sqlalchemy import DateTime, bindparam, text
+
+    columns = ", ".join(CATALOG_FIELDS)
+    values = ", ".join(f":{f}" for f in CATALOG_FIELDS)
+    # bind created_at like the ORM does so SQLite stores the same text format
+    insert = "INSERT INTO {table} (%s) VALUES (%s)" % (columns, values)
+
+    def seed(products=(), featured=()):
+        for table, rows in (("products", products), ("featured_products", featured)):
+            catalog_db.execute(text(f"DELETE FROM {table}"))
+            for row in rows:
+                stmt = text(insert.format(table=table)).bindparams(bindparam("created_at", type_=DateTime))
+                row = {"product_name": f"product {row['id']}", **row}
+                catalog_db.execute(stmt, {f: row.get(f) for f in CATALOG_FIELDS})
+        catalog_db.commit()
+
+    return seed
+
+
+@pytest.fixture
+def catalog_client(catalog_db):
+    """TestClient whose requests read the catalog database as a signed-in user."""
+    from fastapi.testclient import TestClient
+
+    from app.core.supabase_auth import get_current_user
+    from app.db.repositories.crud_product import catalog_cache
+    from app.db.session import get_db
+    from app.main import app
+
+    app.dependency_overrides[get_db] = lambda: catalog_db
+    app.dependency_overrides[get_current_user] = lambda: None
+    catalog_cache.invalidate()
+    yield TestClient(app)
+    catalog_cache.invalidate()
+    app.dependency_overrides.pop(get_db, None)
+    app.dependency_overrides.pop(get_current_user, None)
@@ -0,0 +1,68 @@
+"""AsyncSingleFlight: coalesced callers share one call and survive cancellation."""
+import asyncio
+
+import pytest
+
+from app.core.cache import AsyncSingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    async def run():
+        flight, calls = AsyncSingleFlight(), []
+
+        async def lookup():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "user"
+
+        results = await asyncio.gather(*(flight.do("token", lookup) for _ in range(10)))
+        assert calls == [1]
+        assert [value for value, _ in results] == ["user"] * 10
+        assert sum(shared for _, shared in results) == 9
+
+    asyncio.run(run())
+
+
+def test_cancelled_leader_does_not_fail_followers():
+    async def run():
+        flight, calls = AsyncSingleFlight(), []
+        release = asyncio.Event()
+
+        async def lookup():
+            calls.append(1)
+            await release.wait()
+            return "user"
+
+        leader = asyncio.ensure_future(flight.do("token", lookup))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("token", lookup))
+        await asyncio.sleep(0)
+
+        # the leader's client disconnects mid-lookup
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await follower == ("user", True)
+        assert leader.cancelled()
+        assert calls == [1]
+
+    asyncio.run(run())
+
+
+def test_errors_reach_every_caller_and_are_not_cached():
+    async def run():
+        flight, calls = AsyncSingleFlight(), []
+
+        async def lookup():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("supabase down")
+
+        results = await asyncio.gather(*(flight.do("token", lookup) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        with pytest.raises(RuntimeError):
+            await flight.do("token", lookup)
+        assert calls == [1, 1]
+
+    asyncio.run(run())
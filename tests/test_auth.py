@@ -0,0 +1,63 @@
+"""Inactive users are rejected, including by workers holding a cached snapshot."""
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models
+from app.core import user_cache
+from app.core.cache import InMemoryBackend
+from app.core.security import create_access_token, get_password_hash
+from app.db.repositories.crud_user import set_user_active
+from app.main import app
+
+PASSWORD = "correct horse"
+
+
+@pytest.fixture
+def client():
+    user_cache.clear()
+    yield TestClient(app)
+    user_cache.clear()
+
+
+@pytest.fixture
+def user(db):
+    user = models.user.User(email=f"auth-{uuid.uuid4().hex}@example.com", hashed_password=get_password_hash(PASSWORD), is_active=True, is_superuser=False)
+    db.add(user)
+    db.commit()
+    return user
+
+
+def _me(client, user):
+    return client.get("/api/users/me", headers={"Authorization": f"Bearer {create_access_token(user.email)}"})
+
+
+def test_inactive_user_is_rejected(client, db, user):
+    assert _me(client, user).status_code == 200
+
+    set_user_active(db, user, False)
+
+    assert _me(client, user).status_code == 403
+    response = client.post("/api/auth/login", json={"username": user.email, "password": PASSWORD})
+    assert response.status_code == 403
+
+
+def test_reactivated_user_is_accepted(client, db, user):
+    set_user_active(db, user, False)
+    set_user_active(db, user, True)
+    assert _me(client, user).status_code == 200
+
+
+def test_shared_deny_marker_overrides_a_cached_snapshot(client, db, user, monkeypatch):
+    backend = InMemoryBackend()
+    monkeypatch.setattr(user_cache, "get_shared_backend", lambda: backend)
+    assert _me(client, user).status_code == 200
+    cached = user_cache.get_user(user.email)
+
+    # another process (the CLI) deactivates the user; this worker still
+    # holds the snapshot it cached before
+    set_user_active(db, user, False)
+    user_cache.put_user(user.email, cached)
+
+    assert _me(client, user).status_code == 403
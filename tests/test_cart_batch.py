@@ -0,0 +1,97 @@
+"""Batch PATCH /cart/items: operations fold per product and apply atomically."""
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+from sqlalchemy import text
+
+from app.db.repositories.crud_cart import add_cart_item, apply_cart_operations, fold_cart_operations, get_active_cart
+from app.main import app
+from app.models.schemas.cart import CartBatchUpdate, CartItemOperation
+
+MUG, CUP, PLATE = 7501, 7502, 7503
+MISSING = 7599
+
+
+def ops(*operations):
+    return [CartItemOperation(op=op, product_id=pid, quantity=q, metadata=m) for op, pid, q, m in operations]
+
+
+def test_fold_keeps_one_change_per_product():
+    changes = fold_cart_operations(ops(
+        ("add", MUG, None, None),
+        ("add", MUG, 2, {"gift": True}),
+        ("set", CUP, 5, None),
+        ("add", CUP, 1, None),
+        ("add", PLATE, 3, None),
+        ("remove", PLATE, None, None),
+    ))
+    assert changes == {MUG: ("add", 3, {"gift": True}), CUP: ("set", 6, None), PLATE: ("set", 0, None)}
+
+
+@pytest.mark.parametrize("operation", [{"op": "set", "product_id": MUG}, {"op": "add", "product_id": MUG, "quantity": 0}, {"op": "add", "product_id": MUG, "quantity": -1}])
+def test_invalid_operations_are_rejected(operation):
+    with pytest.raises(ValidationError):
+        CartItemOperation(**operation)
+
+
+def test_empty_batches_are_rejected():
+    with pytest.raises(ValidationError):
+        CartBatchUpdate(operations=[])
+
+
+@pytest.fixture
+def user_id(cart_tables, db, make_user):
+    db.execute(text("DELETE FROM products WHERE id IN (:a, :b, :c)"), {"a": MUG, "b": CUP, "c": PLATE})
+    db.execute(
+        text("INSERT INTO products (id, product_name, current_price) VALUES (:a, 'mug', 8.0), (:b, 'cup', 4.0), (:c, 'plate', 12.0)"),
+        {"a": MUG, "b": CUP, "c": PLATE},
+    )
+    db.commit()
+    user, _ = make_user()
+    return user.id
+
+
+def _lines(cart):
+    return {i["product_id"]: i["quantity"] for i in cart["items"]}
+
+
+def test_batch_adds_sets_and_removes(db, user_id):
+    add_cart_item(db, user_id, MUG, 2)
+    add_cart_item(db, user_id, PLATE, 1)
+
+    cart = apply_cart_operations(db, user_id, ops(
+        ("add", MUG, 1, None),
+        ("set", CUP, 4, {"colour": "blue"}),
+        ("remove", PLATE, None, None),
+    ))
+
+    assert _lines(cart) == {MUG: 3, CUP: 4}
+    assert cart["total"] == 3 * 8.0 + 4 * 4.0
+    assert _lines(get_active_cart(db, user_id)) == {MUG: 3, CUP: 4}
+
+
+def test_set_to_zero_removes_and_missing_lines_are_ignored(db, user_id):
+    add_cart_item(db, user_id, MUG, 2)
+    cart = apply_cart_operations(db, user_id, ops(("set", MUG, 0, None), ("remove", CUP, None, None)))
+    assert cart["items"] == []
+
+
+def test_unknown_product_rolls_back_the_whole_batch(db, user_id):
+    add_cart_item(db, user_id, MUG, 2)
+
+    assert apply_cart_operations(db, user_id, ops(("add", MUG, 5, None), ("remove", MUG, None, None), ("add", MISSING, 1, None))) is None
+    assert _lines(get_active_cart(db, user_id)) == {MUG: 2}
+
+
+def test_route_applies_the_batch_for_the_caller(user_id, db, make_user):
+    user, headers = make_user()
+    client = TestClient(app)
+
+    r = client.patch("/api/cart/items", json={"operations": [{"op": "add", "product_id": MUG, "quantity": 2}, {"op": "set", "product_id": CUP, "quantity": 1}]}, headers=headers)
+    assert r.status_code == 200
+    assert _lines(r.json()) == {MUG: 2, CUP: 1}
+    assert r.json()["owner_user_id"] == user.id
+
+    r = client.patch("/api/cart/items", json={"operations": [{"op": "add", "product_id": MISSING}]}, headers=headers)
+    assert r.status_code == 404
+    assert client.patch("/api/cart/items", json={"operations": []}, headers=headers).status_code == 422
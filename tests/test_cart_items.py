@@ -0,0 +1,63 @@
+"""add_cart_item: one round trip that creates the cart, prices and merges the line."""
+import pytest
+from sqlalchemy import text
+
+from app.db.repositories.crud_cart import add_cart_item, get_active_cart
+
+DISCOUNTED, LIST_PRICE_ONLY = 7401, 7402
+MISSING = 7499
+
+
+@pytest.fixture
+def user_id(cart_tables, db, make_user):
+    db.execute(text("DELETE FROM products WHERE id IN (:a, :b)"), {"a": DISCOUNTED, "b": LIST_PRICE_ONLY})
+    db.execute(
+        text("INSERT INTO products (id, product_name, real_price, current_price) VALUES (:a, 'kettle', 40.0, 30.0), (:b, 'tray', 5.0, NULL)"),
+        {"a": DISCOUNTED, "b": LIST_PRICE_ONLY},
+    )
+    db.commit()
+    user, _ = make_user()
+    return user.id
+
+
+def _carts(db, user_id):
+    return db.execute(text("SELECT count(*) FROM carts WHERE owner_user_id = :u"), {"u": user_id}).scalar()
+
+
+def test_first_item_creates_the_cart(db, user_id):
+    item = add_cart_item(db, user_id, DISCOUNTED, 2, metadata={"gift": True})
+
+    assert item["product_id"] == DISCOUNTED
+    assert item["quantity"] == 2
+    assert item["price_at_add"] == 30.0
+    assert item["metadata"] == {"gift": True}
+    assert item["product"]["product_name"] == "kettle"
+    assert _carts(db, user_id) == 1
+
+
+def test_items_are_priced_at_current_then_real_price(db, user_id):
+    assert add_cart_item(db, user_id, DISCOUNTED, 1)["price_at_add"] == 30.0
+    assert add_cart_item(db, user_id, LIST_PRICE_ONLY, 1)["price_at_add"] == 5.0
+
+
+def test_adding_the_same_product_again_merges_the_line(db, user_id):
+    first = add_cart_item(db, user_id, DISCOUNTED, 1)
+    second = add_cart_item(db, user_id, DISCOUNTED, 3)
+
+    assert second["item_id"] == first["item_id"]
+    assert second["quantity"] == 4
+    cart = get_active_cart(db, user_id)
+    assert [(i["product_id"], i["quantity"]) for i in cart["items"]] == [(DISCOUNTED, 4)]
+    assert (cart["subtotal"], cart["discount"], cart["total"]) == (160.0, 40.0, 120.0)
+    assert _carts(db, user_id) == 1
+
+
+def test_unknown_product_writes_nothing(db, user_id):
+    assert add_cart_item(db, user_id, MISSING, 1) is None
+    assert _carts(db, user_id) == 0
+
+
+def test_uncommitted_add_is_left_to_the_caller(db, user_id):
+    add_cart_item(db, user_id, DISCOUNTED, 1, commit=False)
+    db.rollback()
+    assert get_active_cart(db, user_id) is None
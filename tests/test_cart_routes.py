@@ -0,0 +1,50 @@
+"""Cart routes act on the authenticated user's cart."""
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core import idempotency
+from app.main import app
+
+PRODUCT_ID = 7101
+
+
+@pytest.fixture
+def client(cart_tables, db):
+    db.execute(text("DELETE FROM products WHERE id = :id"), {"id": PRODUCT_ID})
+    db.execute(text("INSERT INTO products (id, product_name, current_price) VALUES (:id, 'mug', 8.0)"), {"id": PRODUCT_ID})
+    db.commit()
+    idempotency.clear()
+    return TestClient(app)
+
+
+def test_cart_requires_authentication(client):
+    assert client.get("/api/cart/").status_code == 401
+
+
+def test_each_user_gets_their_own_cart(client, make_user):
+    (_, alice), (_, bob) = make_user(), make_user()
+
+    assert client.post("/api/cart/items", json={"product_id": PRODUCT_ID, "quantity": 2}, headers=alice).status_code == 201
+
+    assert client.get("/api/cart/", headers=alice).json()["items"][0]["quantity"] == 2
+    assert client.get("/api/cart/", headers=bob).status_code == 404
+
+
+def test_idempotency_keys_are_per_user(client, make_user):
+    (_, alice), (_, bob) = make_user(), make_user()
+    key = {"Idempotency-Key": uuid.uuid4().hex}
+    body = {"product_id": PRODUCT_ID, "quantity": 1}
+
+    first = client.post("/api/cart/items", json=body, headers={**alice, **key})
+    other = client.post("/api/cart/items", json=body, headers={**bob, **key})
+    retry = client.post("/api/cart/items", json=body, headers={**alice, **key})
+
+    assert first.status_code == other.status_code == retry.status_code == 201
+    assert "Idempotent-Replayed" not in other.headers
+    assert other.json()["item_id"] != first.json()["item_id"]
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    assert client.get("/api/cart/", headers=alice).json()["items"][0]["quantity"] == 1
@@ -0,0 +1,60 @@
+"""The merged catalog: featured rows first, then products not already featured."""
+import pytest
+from sqlalchemy import text
+
+from app.db.repositories.crud_product import get_catalog_product, list_products
+
+PRODUCT_ID = 7301
+
+
+@pytest.fixture
+def catalog(catalog_db, seed_catalog):
+    seed_catalog(
+        products=[
+            {"id": i, "product_name": f"plain {i}", "category": "mugs" if i % 2 else "cups", "current_price": float(i)}
+            for i in range(1, 9)
+        ],
+        featured=[
+            {"id": 3, "product_name": "featured 3", "category": "mugs", "current_price": 30.0},
+            {"id": 6, "product_name": "featured 6", "category": "cups", "current_price": 60.0},
+            # featured rows need not exist in products
+            {"id": 20, "product_name": "featured 20", "category": "mugs", "current_price": 200.0},
+        ],
+    )
+    return catalog_db
+
+
+def test_featured_rows_come_first_and_replace_their_products_row(catalog):
+    rows = list_products(catalog, limit=100)
+
+    assert [r["id"] for r in rows] == [3, 6, 20, 1, 2, 4, 5, 7, 8]
+    assert [r["product_name"] for r in rows[:3]] == ["featured 3", "featured 6", "featured 20"]
+    assert "plain 3" not in {r["product_name"] for r in rows}
+
+
+@pytest.mark.parametrize("skip,limit", [(0, 2), (2, 3), (3, 2), (8, 5)])
+def test_offset_windows_slice_the_merged_order(catalog, skip, limit):
+    everything = list_products(catalog, limit=100)
+    assert list_products(catalog, skip=skip, limit=limit) == everything[skip:skip + limit]
+
+
+def test_filters_apply_to_both_branches(catalog):
+    rows = list_products(catalog, filters={"category": "mugs", "max_price": 100.0})
+    assert [(r["id"], r["product_name"]) for r in rows] == [(3, "featured 3"), (1, "plain 1"), (5, "plain 5"), (7, "plain 7")]
+
+
+def test_single_product_prefers_the_featured_row(catalog):
+    assert get_catalog_product(catalog, 3)["product_name"] == "featured 3"
+    assert get_catalog_product(catalog, 4)["product_name"] == "plain 4"
+    assert get_catalog_product(catalog, 20)["product_name"] == "featured 20"
+    assert get_catalog_product(catalog, 999) is None
+
+
+def test_catalog_works_without_a_featured_table(db):
+    # the shared test database has no featured_products table
+    db.execute(text("DELETE FROM products WHERE id = :id"), {"id": PRODUCT_ID})
+    db.execute(text("INSERT INTO products (id, product_name, current_price) VALUES (:id, 'lonely', 1.0)"), {"id": PRODUCT_ID})
+    db.commit()
+
+    assert get_catalog_product(db, PRODUCT_ID)["product_name"] == "lonely"
+    assert PRODUCT_ID in {r["id"] for r in list_products(db, limit=10_000)}
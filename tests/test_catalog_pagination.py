@@ -0,0 +1,89 @@
+"""Keyset cursors over the merged catalog (featured rows, then products)."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db.repositories.crud_product import list_products, list_products_page
+from app.db.repositories.pagination import decode_cursor, encode_cursor
+
+FEATURED_IDS = [2, 5, 9]
+T0 = datetime(2026, 1, 1)
+
+
+def _product(i, price=None, rating=None, created_at=None):
+    return {"id": i, "product_name": f"p{i}", "current_price": price, "rating": rating, "created_at": created_at}
+
+
+@pytest.fixture
+def catalog(catalog_db, seed_catalog):
+    prices = [10.0, None, 30.0, 10.0, 5.0, None, 20.0, 10.0, 40.0, 25.0, 5.0, 15.0]
+    products = [
+        _product(i, price=prices[i - 1], rating=(i % 4) or None, created_at=T0 + timedelta(days=i % 5))
+        for i in range(1, 13)
+    ]
+    featured = [dict(_product(i, price=99.0, rating=5, created_at=T0), product_name=f"featured {i}") for i in FEATURED_IDS]
+    seed_catalog(products=products, featured=featured)
+    return catalog_db
+
+
+def _walk(db, limit, **kwargs):
+    rows, cursor, pages = [], None, 0
+    while True:
+        page, cursor = list_products_page(db, limit=limit, cursor=cursor, **kwargs)
+        rows += page
+        pages += 1
+        assert pages < 50
+        if cursor is None:
+            return rows
+
+
+@pytest.mark.parametrize("limit", [1, 2, 5, 100])
+def test_pages_cross_from_featured_into_products(catalog, limit):
+    rows = _walk(catalog, limit)
+
+    ids = [r["id"] for r in rows]
+    assert ids == FEATURED_IDS + [i for i in range(1, 13) if i not in FEATURED_IDS]
+    assert [r["product_name"] for r in rows[:3]] == [f"featured {i}" for i in FEATURED_IDS]
+    assert rows == list_products(catalog, limit=100)
+
+
+@pytest.mark.parametrize("sort", ["price", "rating", "newest"])
+@pytest.mark.parametrize("limit", [1, 3, 4])
+def test_sorted_pages_match_the_unpaged_order(catalog, sort, limit):
+    # keys repeat and include NULLs, so the cursor must break ties on id
+    assert _walk(catalog, limit, sort=sort) == list_products(catalog, limit=100, sort=sort)
+
+
+def test_filters_apply_to_every_page(catalog):
+    filters = {"max_price": 20.0}
+    rows = _walk(catalog, 2, filters=filters, sort="price")
+    assert rows == list_products(catalog, limit=100, filters=filters, sort="price")
+    assert all(r["current_price"] <= 20.0 for r in rows)
+
+
+def test_last_full_page_is_followed_by_an_empty_one(catalog):
+    page, cursor = list_products_page(catalog, limit=12)
+    assert len(page) == 12 and cursor is not None
+    assert list_products_page(catalog, limit=12, cursor=cursor) == ([], None)
+
+
+@pytest.mark.parametrize("cursor", ["not base64 json!", encode_cursor(["a list"]), encode_cursor({"sort": None, "src": "x", "id": 1})])
+def test_malformed_cursors_are_rejected(catalog, cursor):
+    with pytest.raises(ValueError):
+        list_products_page(catalog, limit=2, cursor=cursor)
+
+
+def test_cursor_from_another_sort_is_rejected(catalog):
+    _, cursor = list_products_page(catalog, limit=2, sort="price")
+    assert decode_cursor(cursor)["sort"] == "price"
+    with pytest.raises(ValueError):
+        list_products_page(catalog, limit=2, cursor=cursor, sort="rating")
+
+
+def test_route_hands_out_the_next_cursor_and_rejects_bad_ones(catalog, catalog_client):
+    first = catalog_client.get("/api/products/", params={"limit": 4})
+    assert first.status_code == 200
+    second = catalog_client.get("/api/products/", params={"limit": 4, "cursor": first.headers["X-Next-Cursor"]})
+    assert [p["id"] for p in first.json() + second.json()] == [2, 5, 9, 1, 3, 4, 6, 7]
+
+    assert catalog_client.get("/api/products/", params={"cursor": "garbage"}).status_code == 400
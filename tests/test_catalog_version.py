@@ -0,0 +1,81 @@
+"""The catalog version behind catalog ETags is a trigger-maintained counter."""
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.supabase_auth import get_current_user
+from app.db.base import Base
+from app.db.catalog_version import postgres_catalog_version_ddl
+from app.db.repositories.crud_product import catalog_cache, catalog_version
+from app.main import app
+
+PRODUCT_ID = 7001
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def catalog_db(request, engine):
+    if request.param == "postgresql":
+        url = os.getenv("TEST_POSTGRES_URL")
+        if not url:
+            pytest.skip("TEST_POSTGRES_URL not set")
+        engine = create_engine(url)
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            for stmt in postgres_catalog_version_ddl(["products"]):
+                conn.execute(text(stmt))
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM products WHERE id = :id"), {"id": PRODUCT_ID})
+        conn.execute(text("INSERT INTO products (id, product_name, current_price, stock) VALUES (:id, 'lamp', 10.0, 5)"), {"id": PRODUCT_ID})
+    db = sessionmaker(bind=engine)()
+    yield db
+    db.close()
+    if request.param == "postgresql":
+        engine.dispose()
+
+
+def _write(db, sql):
+    db.execute(text(sql), {"id": PRODUCT_ID})
+    db.commit()
+
+
+def test_catalog_edits_change_the_version(catalog_db):
+    before = catalog_version(catalog_db)
+    _write(catalog_db, "UPDATE products SET current_price = 12.5 WHERE id = :id")
+    after_price = catalog_version(catalog_db)
+    _write(catalog_db, "DELETE FROM products WHERE id = :id")
+    after_delete = catalog_version(catalog_db)
+
+    assert len({before.tag, after_price.tag, after_delete.tag}) == 3
+    assert after_price.last_modified is not None
+
+
+def test_stock_updates_leave_the_version_alone(catalog_db):
+    before = catalog_version(catalog_db)
+    _write(catalog_db, "UPDATE products SET stock = stock - 1 WHERE id = :id")
+    assert catalog_version(catalog_db).tag == before.tag
+
+
+def test_conditional_get_sees_price_edits(db):
+    app.dependency_overrides[get_current_user] = lambda: None
+    try:
+        client = TestClient(app)
+        db.execute(text("DELETE FROM products WHERE id = :id"), {"id": PRODUCT_ID})
+        db.execute(text("INSERT INTO products (id, product_name, current_price) VALUES (:id, 'lamp', 10.0)"), {"id": PRODUCT_ID})
+        db.commit()
+        catalog_cache.invalidate()
+
+        first = client.get(f"/api/products/{PRODUCT_ID}")
+        etag = first.headers["ETag"]
+        assert "Last-Modified" in first.headers
+        assert client.get(f"/api/products/{PRODUCT_ID}", headers={"If-None-Match": etag}).status_code == 304
+
+        _write(db, "UPDATE products SET current_price = 9.0 WHERE id = :id")
+        catalog_cache.invalidate()
+        changed = client.get(f"/api/products/{PRODUCT_ID}", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.json()["current_price"] == 9.0
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
@@ -0,0 +1,155 @@
+"""Checkout under contention: no oversell, no deadlocks, bounded latency.
+
+Runs against the SQLite test database and, when TEST_POSTGRES_URL points at
+a scratch Postgres database, against Postgres too; only the latter exercises
+the row-locking reservation CTE used in production.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from conftest import CART_DDL
+
+from app.core.config import settings
+from app.db.base import Base
+from app.db.repositories.crud_order import OutOfStock, UnknownProducts, checkout_cart, get_prices
+
+CHECKOUTS = 200
+STOCK = 50
+WORKERS = 32
+USER_IDS = range(9001, 9001 + CHECKOUTS)
+SKU, OTHER_SKU = 9001, 9002
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def checkout_sessions(request, engine):
+    if request.param == "postgresql":
+        url = os.getenv("TEST_POSTGRES_URL")
+        if not url:
+            pytest.skip("TEST_POSTGRES_URL not set")
+        engine = create_engine(url, pool_size=WORKERS, max_overflow=0)
+        Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for stmt in CART_DDL[engine.dialect.name]:
+            conn.execute(text(stmt))
+        conn.execute(text("DELETE FROM order_items WHERE order_id IN (SELECT id FROM orders WHERE user_id >= 9001)"))
+        conn.execute(text("DELETE FROM orders WHERE user_id >= 9001"))
+        conn.execute(text("DELETE FROM cart_items WHERE cart_id >= 9001"))
+        conn.execute(text("DELETE FROM carts WHERE id >= 9001"))
+        conn.execute(text("DELETE FROM users WHERE id >= 9001"))
+        conn.execute(text("DELETE FROM products WHERE id >= 9001"))
+        conn.execute(
+            text("INSERT INTO users (id, email, hashed_password, is_active, is_superuser) VALUES (:id, :email, '', true, false)"),
+            [{"id": i, "email": f"checkout-{i}@example.com"} for i in USER_IDS],
+        )
+        conn.execute(
+            text("INSERT INTO products (id, product_name, current_price, stock) VALUES (:id, :name, 10.0, :stock)"),
+            [{"id": SKU, "name": "flash sale", "stock": STOCK}, {"id": OTHER_SKU, "name": "untracked", "stock": None}],
+        )
+    yield sessionmaker(bind=engine, autoflush=False)
+    if request.param == "postgresql":
+        engine.dispose()
+
+
+def _fill_carts(Session, lines_for_user):
+    with Session() as db:
+        for user_id in USER_IDS:
+            db.execute(text("INSERT INTO carts (id, owner_user_id, status) VALUES (:id, :id, 'active')"), {"id": user_id})
+            for product_id, quantity in lines_for_user(user_id):
+                db.execute(
+                    text("INSERT INTO cart_items (cart_id, product_id, quantity, price_at_add) VALUES (:cart, :product, :quantity, NULL)"),
+                    {"cart": user_id, "product": product_id, "quantity": quantity},
+                )
+        db.commit()
+
+
+def _checkout_all(Session):
+    def run(user_id):
+        db = Session()
+        started = time.perf_counter()
+        try:
+            order = checkout_cart(db, user_id)
+            outcome = "ok" if order is not None else "no-cart"
+        except OutOfStock:
+            outcome = "out-of-stock"
+        except Exception as e:  # anything else fails the test below
+            outcome = repr(e)
+        finally:
+            db.close()
+        return outcome, time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        return list(pool.map(run, USER_IDS))
+
+
+def _scalar(Session, sql, **params):
+    with Session() as db:
+        return db.execute(text(sql), params).scalar()
+
+
+def test_parallel_checkouts_never_oversell(checkout_sessions):
+    Session = checkout_sessions
+    _fill_carts(Session, lambda user_id: [(SKU, 1), (OTHER_SKU, 2)])
+
+    results = _checkout_all(Session)
+
+    outcomes = [outcome for outcome, _ in results]
+    assert outcomes.count("ok") == STOCK
+    assert outcomes.count("out-of-stock") == CHECKOUTS - STOCK
+    assert _scalar(Session, "SELECT stock FROM products WHERE id = :id", id=SKU) == 0
+    assert _scalar(Session, "SELECT stock FROM products WHERE id = :id", id=OTHER_SKU) is None
+    assert _scalar(Session, "SELECT sum(quantity) FROM order_items WHERE product_id = :id", id=SKU) == STOCK
+    # failed checkouts leave their cart active for another try
+    assert _scalar(Session, "SELECT count(*) FROM carts WHERE id >= 9001 AND status = 'active'") == CHECKOUTS - STOCK
+    # nobody waits longer than the lock timeout plus scheduling slack
+    assert max(elapsed for _, elapsed in results) < settings.CHECKOUT_LOCK_TIMEOUT_MS / 1000 + 5
+
+
+def test_opposite_line_order_does_not_deadlock(checkout_sessions):
+    Session = checkout_sessions
+    with Session() as db:
+        db.execute(text("UPDATE products SET stock = :stock WHERE id IN (:a, :b)"), {"stock": CHECKOUTS, "a": SKU, "b": OTHER_SKU})
+        db.commit()
+    # half the carts list the products in one order, half in the other
+    _fill_carts(Session, lambda user_id: [(SKU, 1), (OTHER_SKU, 1)] if user_id % 2 else [(OTHER_SKU, 1), (SKU, 1)])
+
+    results = _checkout_all(Session)
+
+    assert [outcome for outcome, _ in results] == ["ok"] * CHECKOUTS
+    assert _scalar(Session, "SELECT stock FROM products WHERE id = :id", id=SKU) == 0
+    assert _scalar(Session, "SELECT stock FROM products WHERE id = :id", id=OTHER_SKU) == 0
+
+
+def test_deleted_product_is_unknown_not_a_server_error(checkout_sessions):
+    Session = checkout_sessions
+    _fill_carts(Session, lambda user_id: [(SKU, 1)])
+    with Session() as db:
+        db.execute(text("INSERT INTO cart_items (cart_id, product_id, quantity, price_at_add) VALUES (9001, 424242, 1, 5.0)"))
+        db.commit()
+
+    with Session() as db:
+        with pytest.raises(UnknownProducts) as exc:
+            checkout_cart(db, 9001)
+    assert exc.value.product_ids == [424242]
+    assert _scalar(Session, "SELECT status FROM carts WHERE id = 9001") == "active"
+    assert _scalar(Session, "SELECT stock FROM products WHERE id = :id", id=SKU) == STOCK
+
+
+def test_checkout_charges_the_current_price_like_create_order(checkout_sessions):
+    Session = checkout_sessions
+    _fill_carts(Session, lambda user_id: [(SKU, 2)])
+    with Session() as db:
+        # the cart was priced before a price change
+        db.execute(text("UPDATE cart_items SET price_at_add = 7.0 WHERE cart_id = 9001"))
+        db.execute(text("UPDATE products SET current_price = 12.0 WHERE id = :id"), {"id": SKU})
+        db.commit()
+
+    with Session() as db:
+        order = checkout_cart(db, 9001)
+        current = get_prices(db, [SKU])[SKU]
+        assert [(i.product_id, i.quantity, float(i.unit_price)) for i in order.items] == [(SKU, 2, current)]
+    assert current == 12.0
+    assert float(order.total) == 24.0
@@ -0,0 +1,45 @@
+"""get_or_create_by_email under concurrent first logins."""
+import threading
+import uuid
+
+from app import models
+from app.db.repositories.crud_user import get_or_create_by_email
+from app.db.session import SessionLocal
+
+THREADS = 16
+
+
+def test_concurrent_get_or_create_creates_one_row(db):
+    email = f"race-{uuid.uuid4().hex}@example.com"
+    barrier = threading.Barrier(THREADS)
+    ids, errors = [], []
+
+    def worker():
+        session = SessionLocal()
+        try:
+            barrier.wait()
+            ids.append(get_or_create_by_email(session, email).id)
+        except Exception as e:  # collected and asserted below
+            errors.append(e)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert len(ids) == THREADS
+    assert len(set(ids)) == 1
+    rows = db.query(models.user.User).filter(models.user.User.email == email).all()
+    assert [u.id for u in rows] == ids[:1]
+
+
+def test_existing_user_is_returned(db):
+    email = f"known-{uuid.uuid4().hex}@example.com"
+    first = get_or_create_by_email(db, email)
+    again = get_or_create_by_email(db, email)
+    assert again.id == first.id
+    assert again.hashed_password == ""
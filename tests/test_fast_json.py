@@ -0,0 +1,60 @@
+"""trusted_response: the fast path serializes exactly what FastAPI would."""
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from fastapi import Response
+
+from app.core import responses
+from app.core.config import settings
+
+CREATED = datetime(2026, 3, 4, 5, 6, 7)
+
+
+@pytest.fixture
+def fast_json(monkeypatch):
+    def toggle(enabled):
+        monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", enabled)
+    return toggle
+
+
+def test_dumps_handles_datetimes_and_decimals():
+    payload = {"created_at": CREATED, "price": Decimal("9.50"), "name": "café"}
+    assert json.loads(responses.dumps(payload)) == {"created_at": "2026-03-04T05:06:07", "price": 9.5, "name": "café"}
+
+
+def test_disabled_returns_content_for_normal_validation(fast_json):
+    fast_json(False)
+    content = [{"id": 1}]
+    assert responses.trusted_response(content, Response()) is content
+
+
+def test_enabled_carries_headers_and_status(fast_json):
+    fast_json(True)
+    response = Response()
+    response.headers["ETag"] = '"v1"'
+    response.headers["X-Next-Cursor"] = "abc"
+
+    rendered = responses.trusted_response({"id": 1}, response, status_code=201)
+
+    assert rendered.status_code == 201
+    assert rendered.headers["etag"] == '"v1"'
+    assert rendered.headers["x-next-cursor"] == "abc"
+    assert json.loads(rendered.body) == {"id": 1}
+
+
+def test_catalog_route_body_is_identical_on_both_paths(fast_json, catalog_client, seed_catalog):
+    seed_catalog(
+        products=[{"id": i, "product_name": f"p{i}", "rating": 4.5, "current_price": 10.0 * i, "created_at": CREATED} for i in range(1, 6)],
+        featured=[{"id": 9, "product_name": "featured", "people_rated_count": 3, "created_at": CREATED}],
+    )
+
+    bodies = {}
+    for enabled in (False, True):
+        fast_json(enabled)
+        r = catalog_client.get("/api/products/", params={"limit": 3})
+        assert r.status_code == 200
+        bodies[enabled] = (r.json(), r.headers["X-Next-Cursor"], r.headers["ETag"])
+
+    assert bodies[True] == bodies[False]
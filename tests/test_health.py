@@ -0,0 +1,26 @@
+"""Health endpoints that operators poll."""
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_health():
+    assert client.get("/health").json() == {"status": "ok"}
+
+
+def test_health_cache_reports_every_tier():
+    response = client.get("/health/cache")
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body) == {"catalog", "users", "supabase_tokens", "cart", "idempotency"}
+    for counter in ("hits", "misses", "loads", "coalesced", "invalidations", "size"):
+        assert counter in body["catalog"]
+    assert body["cart"]["enabled"] is False
+
+
+def test_health_auth():
+    response = client.get("/health/auth")
+    assert response.status_code == 200
+    assert "password_hashing" in response.json()
@@ -0,0 +1,107 @@
+"""Idempotency-Key handling: the write and the stored response commit together."""
+import uuid
+
+import pytest
+from pydantic import BaseModel
+
+from app import models
+from app.core import idempotency
+from app.core.exceptions import HTTPException
+from app.db.repositories import crud_idempotency
+from app.db.session import SessionLocal
+
+SCOPE = "POST /tests"
+USER_ID = 4242
+
+
+class Created(BaseModel):
+    id: int
+    email: str
+
+
+@pytest.fixture(autouse=True)
+def no_memory_tier():
+    # replays must come from the database, not this worker's LRU
+    idempotency.clear()
+    yield
+    idempotency.clear()
+
+
+def _create_user(db, email, calls):
+    def handler():
+        calls.append(email)
+        user = models.user.User(email=email, hashed_password="", is_active=True, is_superuser=False)
+        db.add(user)
+        db.flush()
+        return {"id": user.id, "email": email}
+    return handler
+
+
+def _user_exists(email):
+    with SessionLocal() as db:
+        return db.query(models.user.User).filter(models.user.User.email == email).count() == 1
+
+
+def test_write_and_response_commit_together(db):
+    key, email, calls = uuid.uuid4().hex, f"idem-{uuid.uuid4().hex}@example.com", []
+    bumped = []
+
+    first = idempotency.idempotent(db, key, USER_ID, SCOPE, {"email": email}, _create_user(db, email, calls), Created, after_commit=lambda: bumped.append(True))
+    idempotency.clear()
+    replay = idempotency.idempotent(db, key, USER_ID, SCOPE, {"email": email}, _create_user(db, email, calls), Created)
+
+    assert calls == [email]
+    assert bumped == [True]
+    assert _user_exists(email)
+    assert replay.body == first.body
+    assert replay.headers[idempotency.REPLAYED_HEADER] == "true"
+    assert crud_idempotency.get_key(db, USER_ID, SCOPE, key).status_code == 200
+
+
+def test_failed_handler_writes_nothing_and_releases_the_key(db):
+    key, email, calls = uuid.uuid4().hex, f"idem-{uuid.uuid4().hex}@example.com", []
+
+    def failing():
+        _create_user(db, email, calls)()
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        idempotency.idempotent(db, key, USER_ID, SCOPE, {"email": email}, failing, Created)
+
+    assert not _user_exists(email)
+    assert crud_idempotency.get_key(db, USER_ID, SCOPE, key) is None
+    idempotency.idempotent(db, key, USER_ID, SCOPE, {"email": email}, _create_user(db, email, calls), Created)
+    assert _user_exists(email)
+
+
+def test_unfinished_key_blocks_retries(db):
+    key, email = uuid.uuid4().hex, f"idem-{uuid.uuid4().hex}@example.com"
+    payload = {"email": email}
+    assert crud_idempotency.claim_key(db, USER_ID, SCOPE, key, idempotency.request_fingerprint(payload), 60) is not None
+
+    with pytest.raises(HTTPException) as exc:
+        idempotency.idempotent(db, key, USER_ID, SCOPE, payload, _create_user(db, email, []), Created)
+
+    assert exc.value.status_code == 409
+    assert not _user_exists(email)
+
+
+def test_request_whose_key_was_taken_over_rolls_back(db):
+    key, email = uuid.uuid4().hex, f"idem-{uuid.uuid4().hex}@example.com"
+    payload = {"email": email}
+    write = _create_user(db, email, [])
+
+    def outlives_the_timeout():
+        # a retry reclaims the key while this request is still running
+        with SessionLocal() as other:
+            record = crud_idempotency.get_key(other, USER_ID, SCOPE, key)
+            assert crud_idempotency.reclaim_key(other, record.id, record.request_hash, 60, stale_after=0) is not None
+        return write()
+
+    with pytest.raises(HTTPException) as exc:
+        idempotency.idempotent(db, key, USER_ID, SCOPE, payload, outlives_the_timeout, Created)
+
+    assert exc.value.status_code == 409
+    assert not _user_exists(email)
+    # the retry's claim is left alone for it to complete
+    assert crud_idempotency.get_key(db, USER_ID, SCOPE, key).status_code is None
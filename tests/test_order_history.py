@@ -0,0 +1,93 @@
+"""GET /orders history: newest-first keyset pages of the caller's orders."""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app import models
+from app.db.repositories.crud_order import list_orders_page
+from app.db.repositories.pagination import encode_cursor
+from app.main import app
+
+PRODUCT_ID = 7701
+T0 = datetime(2026, 5, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def history(db, make_user):
+    """A user with 7 orders, three of them placed at the same instant."""
+    db.execute(text("DELETE FROM order_items WHERE product_id = :id"), {"id": PRODUCT_ID})
+    db.execute(text("DELETE FROM products WHERE id = :id"), {"id": PRODUCT_ID})
+    db.execute(text("INSERT INTO products (id, product_name, current_price) VALUES (:id, 'mug', 8.0)"), {"id": PRODUCT_ID})
+    user, headers = make_user()
+    offsets = [0, 1, 1, 1, 2, 3, 5]
+    for i, minutes in enumerate(offsets, 1):
+        order = models.order.Order(user_id=user.id, total=8.0 * i, created_at=T0 + timedelta(minutes=minutes))
+        order.items = [models.order.OrderItem(product_id=PRODUCT_ID, quantity=i, unit_price=8.0)]
+        db.add(order)
+    db.commit()
+    expected = db.query(models.order.Order.id).filter_by(user_id=user.id).order_by(models.order.Order.created_at.desc(), models.order.Order.id.desc())
+    return user, headers, [oid for (oid,) in expected]
+
+
+def _walk(db, user_id, limit, **kwargs):
+    orders, cursor = [], None
+    while True:
+        page, cursor = list_orders_page(db, user_id, limit=limit, cursor=cursor, **kwargs)
+        orders += page
+        if cursor is None:
+            return orders
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 7, 20])
+def test_pages_walk_newest_first_without_gaps(db, history, limit):
+    user, _, expected = history
+    orders = _walk(db, user.id, limit)
+
+    assert [o["id"] for o in orders] == expected
+    assert all("items" not in o for o in orders)
+    assert {o["user_id"] for o in orders} == {user.id}
+
+
+def test_include_items_loads_the_lines_of_the_page(db, history):
+    user, _, expected = history
+    orders, _ = list_orders_page(db, user.id, limit=3, include_items=True)
+
+    assert [o["id"] for o in orders] == expected[:3]
+    for o in orders:
+        assert o["items"] == [{"product_id": PRODUCT_ID, "quantity": int(o["total"] / 8.0), "unit_price": 8.0}]
+
+
+def test_other_users_see_nothing(db, history, make_user):
+    other, _ = make_user()
+    assert list_orders_page(db, other.id) == ([], None)
+
+
+@pytest.mark.parametrize("cursor", ["garbage", encode_cursor({"id": 1}), encode_cursor({"created_at": "yesterday", "id": 1})])
+def test_invalid_cursors_are_rejected(db, history, cursor):
+    with pytest.raises(ValueError):
+        list_orders_page(db, history[0].id, cursor=cursor)
+
+
+def test_route_pages_with_the_next_cursor_header(history):
+    _, headers, expected = history
+    client = TestClient(app)
+
+    first = client.get("/api/orders/", params={"limit": 4}, headers=headers)
+    second = client.get("/api/orders/", params={"limit": 4, "cursor": first.headers["X-Next-Cursor"], "include_items": True}, headers=headers)
+
+    assert [o["id"] for o in first.json() + second.json()] == expected
+    assert "items" not in first.json()[0]
+    assert len(second.json()[0]["items"]) == 1
+    assert "X-Next-Cursor" not in second.headers
+    assert client.get("/api/orders/", params={"cursor": "garbage"}, headers=headers).status_code == 400
+
+
+def test_orders_of_other_users_read_as_missing(history, make_user):
+    _, headers, expected = history
+    _, stranger = make_user()
+    client = TestClient(app)
+
+    assert client.get(f"/api/orders/{expected[0]}", headers=headers).status_code == 200
+    assert client.get(f"/api/orders/{expected[0]}", headers=stranger).status_code == 404
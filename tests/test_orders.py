@@ -0,0 +1,82 @@
+"""Order creation: server-side prices, merged lines, constant statement count."""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+
+from app import models
+from app.db.repositories.crud_order import UnknownProducts, create_order, fold_order_items
+from app.main import app
+from app.models.schemas.order import OrderItem
+
+PRODUCTS = {7601: (9.99, 12.0), 7602: (None, 4.5), 7603: (20.0, 25.0)}
+UNPRICED, MISSING = 7604, 7699
+
+
+@pytest.fixture
+def user_id(db, make_user):
+    # order lines of earlier runs still reference the products on Postgres
+    db.execute(text("DELETE FROM order_items WHERE product_id >= 7601 AND product_id <= 7604"))
+    db.execute(text("DELETE FROM products WHERE id >= 7601 AND id <= 7604"))
+    for pid, (current, real) in PRODUCTS.items():
+        db.execute(
+            text("INSERT INTO products (id, product_name, current_price, real_price) VALUES (:id, 'item', :current, :real)"),
+            {"id": pid, "current": current, "real": real},
+        )
+    db.execute(text("INSERT INTO products (id, product_name) VALUES (:id, 'unpriced')"), {"id": UNPRICED})
+    db.commit()
+    user, _ = make_user()
+    return user.id
+
+
+def items(*lines):
+    return [OrderItem(product_id=pid, quantity=qty) for pid, qty in lines]
+
+
+def test_fold_merges_repeated_lines_in_first_seen_order():
+    assert list(fold_order_items(items((7603, 1), (7601, 2), (7603, 4))).items()) == [(7603, 5), (7601, 2)]
+
+
+def test_lines_are_priced_from_the_products_table(db, user_id):
+    order = create_order(db, user_id, items((7601, 2), (7602, 1), (7601, 1)))
+
+    lines = {i.product_id: (i.quantity, i.unit_price) for i in order.items}
+    assert lines == {7601: (3, 9.99), 7602: (1, 4.5)}
+    assert order.total == pytest.approx(round(3 * 9.99 + 4.5, 2))
+    assert order.user_id == user_id
+
+
+@pytest.mark.parametrize("product_id", [MISSING, UNPRICED])
+def test_unknown_or_unpriced_products_write_nothing(db, user_id, product_id):
+    with pytest.raises(UnknownProducts) as exc:
+        create_order(db, user_id, items((7601, 1), (product_id, 1)))
+    assert exc.value.product_ids == [product_id]
+    db.rollback()
+    assert db.query(models.order.Order).filter_by(user_id=user_id).count() == 0
+
+
+def test_statement_count_does_not_grow_with_lines(db, user_id, engine):
+    def count_statements(lines):
+        statements = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            create_order(db, user_id, items(*lines))
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        return len(statements)
+
+    assert count_statements([(7601, 1)]) == count_statements([(7601, 1), (7602, 2), (7603, 3)])
+
+
+def test_route_ignores_client_prices_and_reports_unknown_products(db, user_id, make_user):
+    _, headers = make_user()
+    client = TestClient(app)
+
+    r = client.post("/api/orders/", json={"items": [{"product_id": 7603, "quantity": 2, "unit_price": 0.01}], "total": 0.02}, headers=headers)
+    assert r.status_code == 200
+    assert r.json()["total"] == 40.0
+    assert r.json()["items"] == [{"product_id": 7603, "quantity": 2, "unit_price": 20.0}]
+
+    r = client.post("/api/orders/", json={"items": [{"product_id": MISSING, "quantity": 1}]}, headers=headers)
+    assert r.status_code == 404
+    assert client.post("/api/orders/", json={"items": [{"product_id": 7601, "quantity": 0}]}, headers=headers).status_code == 422
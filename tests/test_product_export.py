@@ -0,0 +1,64 @@
+"""Streaming export of the merged catalog as NDJSON and CSV."""
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.api.routes import products as product_routes
+from app.db.repositories.crud_product import list_products
+from app.db.repositories.product_io import EXPORT_FIELDS, export_csv, export_ndjson, iter_catalog
+
+CREATED = datetime(2026, 2, 3, 4, 5, 6)
+
+
+@pytest.fixture
+def catalog(catalog_db, seed_catalog):
+    seed_catalog(
+        products=[{"id": i, "current_price": float(i), "created_at": CREATED} for i in range(1, 11)],
+        featured=[{"id": i, "product_name": f"featured {i}", "rating": 4.5} for i in (4, 7, 30)],
+    )
+    return catalog_db
+
+
+def test_batches_follow_the_listing_order(catalog):
+    batches = list(iter_catalog(catalog, batch_size=3))
+
+    assert all(0 < len(b) <= 3 for b in batches)
+    assert len(batches) >= 4
+    assert [row for batch in batches for row in batch] == list_products(catalog, limit=100)
+
+
+def test_ndjson_has_one_object_per_row(catalog):
+    chunks = list(export_ndjson(catalog, batch_size=4))
+    rows = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+
+    assert len(chunks) > 1
+    assert [r["id"] for r in rows] == [4, 7, 30, 1, 2, 3, 5, 6, 8, 9, 10]
+    assert rows[0]["product_name"] == "featured 4"
+    assert rows[3]["created_at"] == "2026-02-03T04:05:06"
+
+
+def test_csv_has_a_header_and_one_line_per_row(catalog):
+    chunks = list(export_csv(catalog, batch_size=4))
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+
+    assert len(chunks) > 1
+    assert list(rows[0]) == EXPORT_FIELDS
+    assert [int(r["id"]) for r in rows] == [4, 7, 30, 1, 2, 3, 5, 6, 8, 9, 10]
+    assert rows[3]["created_at"] == "2026-02-03T04:05:06"
+    assert rows[0]["current_price"] == ""
+
+
+@pytest.mark.parametrize("fmt,media_type", [("ndjson", "application/x-ndjson"), ("csv", "text/csv")])
+def test_route_streams_with_its_own_session(catalog, catalog_engine, catalog_client, monkeypatch, fmt, media_type):
+    monkeypatch.setattr(product_routes, "SessionLocal", sessionmaker(bind=catalog_engine))
+
+    r = catalog_client.get("/api/products/export", params={"format": fmt})
+
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith(media_type)
+    assert r.headers["content-disposition"] == f'attachment; filename="products.{fmt}"'
+    assert len(r.text.splitlines()) == 11 + (fmt == "csv")
@@ -0,0 +1,58 @@
+"""Category and price-bucket facets over the merged, filtered catalog."""
+import pytest
+
+from app.db.repositories.crud_product import product_facets
+
+
+@pytest.fixture
+def catalog(catalog_db, seed_catalog):
+    seed_catalog(
+        products=[
+            {"id": 1, "category": "mugs", "current_price": 10.0, "rating": 4.0},
+            {"id": 2, "category": "mugs", "current_price": 25.0, "rating": 2.0},
+            {"id": 3, "category": "cups", "current_price": 60.0, "rating": 5.0},
+            {"id": 4, "category": "cups", "current_price": None, "rating": 3.0},
+            {"id": 5, "category": None, "current_price": 500.0, "rating": 1.0},
+            # replaced by its featured row below
+            {"id": 6, "category": "mugs", "current_price": 1.0, "rating": 1.0},
+        ],
+        featured=[{"id": 6, "category": "teapots", "current_price": 150.0, "rating": 5.0}],
+    )
+    return catalog_db
+
+
+def test_counts_categories_and_price_buckets(catalog):
+    facets = product_facets(catalog)
+
+    assert facets["categories"] == [
+        {"value": "cups", "count": 2},
+        {"value": "mugs", "count": 2},
+        {"value": None, "count": 1},
+        {"value": "teapots", "count": 1},
+    ]
+    # buckets are half-open [min, max); products without a price are left out
+    assert facets["price_buckets"] == [
+        {"min": 0.0, "max": 25.0, "count": 1},
+        {"min": 25.0, "max": 50.0, "count": 1},
+        {"min": 50.0, "max": 100.0, "count": 1},
+        {"min": 100.0, "max": 200.0, "count": 1},
+        {"min": 200.0, "max": None, "count": 1},
+    ]
+
+
+def test_filters_narrow_both_facets(catalog):
+    facets = product_facets(catalog, {"min_rating": 4.0})
+
+    assert facets["categories"] == [{"value": "cups", "count": 1}, {"value": "mugs", "count": 1}, {"value": "teapots", "count": 1}]
+    assert [(b["min"], b["count"]) for b in facets["price_buckets"]] == [(0.0, 1), (50.0, 1), (100.0, 1)]
+
+
+def test_empty_catalog_has_no_facets(catalog):
+    assert product_facets(catalog, {"category": "nothing"}) == {"categories": [], "price_buckets": []}
+
+
+def test_route_applies_query_filters(catalog, catalog_client):
+    r = catalog_client.get("/api/products/facets", params={"category": "mugs"})
+    assert r.status_code == 200
+    assert r.json() == {"categories": [{"value": "mugs", "count": 2}], "price_buckets": [{"min": 0.0, "max": 25.0, "count": 1}, {"min": 25.0, "max": 50.0, "count": 1}]}
+    assert catalog_client.get("/api/products/facets", params={"min_price": -1}).status_code == 422
@@ -0,0 +1,97 @@
+"""Bulk import: valid rows land, invalid rows are reported by line number."""
+import io
+
+import pytest
+from sqlalchemy import text
+
+from app.db.repositories.product_io import import_products
+
+CSV = (
+    "title,price,description\n"
+    "Mug,8.5,ceramic\n"          # line 2
+    "Cup,not-a-price,\n"         # line 3
+    ",4,untitled\n"              # line 4: empty cell means missing
+    "Plate,12,\n"                # line 5
+    "Bowl,3,deep,extra\n"        # line 6
+    "Spoon,1.25,\n"              # line 7
+)
+
+NDJSON = (
+    '{"title": "Mug", "price": 8.5}\n'       # line 1
+    "\n"                                     # blank lines are skipped
+    "{not json\n"                            # line 3
+    '["a", "list"]\n'                        # line 4
+    '{"title": "Cup"}\n'                     # line 5
+    '{"title": "Plate", "price": "12"}\n'    # line 6
+)
+
+
+@pytest.fixture
+def products(catalog_db, seed_catalog):
+    seed_catalog()
+
+    def names():
+        return [r[0] for r in catalog_db.execute(text("SELECT product_name FROM products ORDER BY id"))]
+    return names
+
+
+def _lines(report):
+    return [e["line"] for e in report["errors"]]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 1000])
+def test_csv_reports_bad_rows_and_keeps_good_ones(catalog_db, products, chunk_size):
+    report = import_products(catalog_db, io.StringIO(CSV), "csv", chunk_size=chunk_size)
+
+    assert report["processed"] == 6
+    assert report["inserted"] == 3
+    assert report["failed"] == 3
+    assert _lines(report) == [3, 4, 6]
+    assert "price" in report["errors"][0]["error"]
+    assert "title" in report["errors"][1]["error"]
+    assert products() == ["Mug", "Plate", "Spoon"]
+
+
+def test_ndjson_reports_bad_rows_and_keeps_good_ones(catalog_db, products):
+    report = import_products(catalog_db, io.StringIO(NDJSON), "ndjson")
+
+    assert (report["processed"], report["inserted"], report["failed"]) == (5, 2, 3)
+    assert _lines(report) == [3, 4, 5]
+    assert report["errors"][1]["error"] == "expected a JSON object"
+    assert products() == ["Mug", "Plate"]
+
+
+def test_rejected_chunk_is_retried_row_by_row(catalog_db, products):
+    catalog_db.execute(text(
+        "CREATE TRIGGER reject_boom BEFORE INSERT ON products WHEN new.product_name = 'boom' "
+        "BEGIN SELECT RAISE(ABORT, 'boom rejected'); END"
+    ))
+    catalog_db.commit()
+    try:
+        stream = io.StringIO('{"title": "a", "price": 1}\n{"title": "boom", "price": 2}\n{"title": "c", "price": 3}\n')
+        report = import_products(catalog_db, stream, "ndjson", chunk_size=10)
+    finally:
+        catalog_db.execute(text("DROP TRIGGER reject_boom"))
+        catalog_db.commit()
+
+    assert report["inserted"] == 2
+    assert report["errors"] == [{"line": 2, "error": "boom rejected"}]
+    assert products() == ["a", "c"]
+
+
+def test_unknown_format_is_rejected(catalog_db):
+    with pytest.raises(ValueError):
+        import_products(catalog_db, io.StringIO(""), "xml")
+
+
+def test_route_imports_a_csv_body(catalog_db, products, catalog_client):
+    r = catalog_client.post("/api/products/import", content=CSV.encode(), headers={"Content-Type": "text/csv"})
+
+    assert r.status_code == 200
+    assert _lines(r.json()) == [3, 4, 6]
+    assert products() == ["Mug", "Plate", "Spoon"]
+
+
+def test_route_rejects_non_utf8_bodies(catalog_client, products):
+    r = catalog_client.post("/api/products/import?format=csv", content="title,price\ncafé,1\n".encode("latin-1"))
+    assert r.status_code == 400
@@ -0,0 +1,77 @@
+"""Ranked full-text search (SQLite FTS5 locally) and its cursors."""
+import pytest
+
+from app.db.repositories.crud_product import search_products
+from app.db.repositories.pagination import encode_cursor
+
+
+@pytest.fixture
+def catalog(catalog_db, seed_catalog):
+    products = [
+        {"id": 1, "product_name": "Blue mug", "category": "mugs", "description": "a mug"},
+        {"id": 2, "product_name": "Red mug", "category": "mugs", "description": "mug mug mug, the most mug of all"},
+        {"id": 3, "product_name": "Teapot", "category": "kitchen", "description": "pairs well with a blue mug"},
+        {"id": 4, "product_name": "Spoon", "category": "kitchen", "description": "stirs tea"},
+        {"id": 5, "product_name": "C++ primer", "category": "books", "description": 'the "definitive" guide'},
+    ]
+    products += [{"id": i, "product_name": f"mug {i}", "category": "mugs"} for i in range(6, 12)]
+    seed_catalog(products=products)
+    return catalog_db
+
+
+def _walk(db, q, limit):
+    rows, cursor = [], None
+    while True:
+        page, cursor = search_products(db, q, limit=limit, cursor=cursor)
+        rows += page
+        if cursor is None:
+            return rows
+
+
+def test_matches_are_ranked_by_relevance(catalog):
+    rows, _ = search_products(catalog, "mug", limit=100)
+
+    ids = [r["id"] for r in rows]
+    assert set(ids) == {1, 2, 3} | set(range(6, 12))
+    assert ids[0] == 2
+    assert 4 not in ids and 5 not in ids
+
+
+def test_terms_are_and_ed(catalog):
+    rows, _ = search_products(catalog, "blue mug", limit=100)
+    assert sorted(r["id"] for r in rows) == [1, 3]
+
+
+@pytest.mark.parametrize("limit", [1, 2, 4])
+def test_cursor_pages_match_a_single_page(catalog, limit):
+    everything, cursor = search_products(catalog, "mug", limit=100)
+    assert cursor is None
+    assert _walk(catalog, "mug", limit) == everything
+
+
+@pytest.mark.parametrize("q", ['"definitive"', "c++", "mug OR spoon", "NEAR(mug", "kitchen*", '"', "   "])
+def test_user_input_is_never_fts_syntax(catalog, q):
+    rows, _ = search_products(catalog, q, limit=100)
+    assert all(isinstance(r["id"], int) for r in rows)
+
+
+def test_operators_are_treated_as_words(catalog):
+    # "OR" is a plain term, and no product mentions it
+    assert search_products(catalog, "mug OR spoon", limit=100) == ([], None)
+    assert [r["id"] for r in search_products(catalog, '"definitive"', limit=100)[0]] == [5]
+
+
+@pytest.mark.parametrize("cursor", ["garbage", encode_cursor({"rank": "high", "id": 1}), encode_cursor({"id": 1})])
+def test_invalid_cursors_are_rejected(catalog, cursor):
+    with pytest.raises(ValueError):
+        search_products(catalog, "mug", limit=2, cursor=cursor)
+
+
+def test_route_pages_with_the_next_cursor_header(catalog, catalog_client):
+    first = catalog_client.get("/api/products/search", params={"q": "mug", "limit": 5})
+    assert first.status_code == 200
+    second = catalog_client.get("/api/products/search", params={"q": "mug", "limit": 5, "cursor": first.headers["X-Next-Cursor"]})
+    ids = [p["id"] for p in first.json() + second.json()]
+    assert len(ids) == len(set(ids)) == 9
+
+    assert catalog_client.get("/api/products/search", params={"q": "mug", "cursor": "garbage"}).status_code == 400
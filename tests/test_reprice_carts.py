@@ -0,0 +1,47 @@
+"""reprice_carts brings active cart lines in line with product prices."""
+import pytest
+from sqlalchemy import text
+
+from app.db.repositories.crud_cart import reprice_carts
+
+CHANGED, UNCHANGED = 7201, 7202
+ACTIVE_CART, CHECKED_OUT_CART = 7201, 7202
+
+
+@pytest.fixture
+def carts(cart_tables, db):
+    db.execute(text("DELETE FROM cart_items WHERE cart_id IN (:a, :b)"), {"a": ACTIVE_CART, "b": CHECKED_OUT_CART})
+    db.execute(text("DELETE FROM carts WHERE id IN (:a, :b)"), {"a": ACTIVE_CART, "b": CHECKED_OUT_CART})
+    db.execute(text("DELETE FROM products WHERE id IN (:a, :b)"), {"a": CHANGED, "b": UNCHANGED})
+    db.execute(text("INSERT INTO products (id, product_name, current_price) VALUES (:a, 'kettle', 30.0), (:b, 'tray', 5.0)"), {"a": CHANGED, "b": UNCHANGED})
+    db.execute(
+        text("INSERT INTO carts (id, owner_user_id, status) VALUES (:a, :a, 'active'), (:b, :b, 'checked_out')"),
+        {"a": ACTIVE_CART, "b": CHECKED_OUT_CART},
+    )
+    for cart_id in (ACTIVE_CART, CHECKED_OUT_CART):
+        # both lines were added at prices that have since changed / stayed
+        db.execute(
+            text("INSERT INTO cart_items (cart_id, product_id, quantity, price_at_add) VALUES (:c, :a, 1, 25.0), (:c, :b, 1, 5.0)"),
+            {"c": cart_id, "a": CHANGED, "b": UNCHANGED},
+        )
+    db.commit()
+    return db
+
+
+def _prices(db, cart_id):
+    rows = db.execute(text("SELECT product_id, price_at_add FROM cart_items WHERE cart_id = :c ORDER BY product_id"), {"c": cart_id}).all()
+    return {pid: price for pid, price in rows}
+
+
+def test_reprices_only_stale_lines_of_active_carts(carts):
+    report = reprice_carts(carts, product_ids=[CHANGED, UNCHANGED], batch_size=1)
+
+    assert report == {"batches": 1, "lines_repriced": 1, "carts_affected": 1}
+    assert _prices(carts, ACTIVE_CART) == {CHANGED: 30.0, UNCHANGED: 5.0}
+    assert _prices(carts, CHECKED_OUT_CART) == {CHANGED: 25.0, UNCHANGED: 5.0}
+    assert reprice_carts(carts, product_ids=[CHANGED])["lines_repriced"] == 0
+
+
+def test_product_filter_limits_the_run(carts):
+    assert reprice_carts(carts, product_ids=[UNCHANGED])["lines_repriced"] == 0
+    assert _prices(carts, ACTIVE_CART)[CHANGED] == 25.0
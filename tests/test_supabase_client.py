@@ -0,0 +1,87 @@
+"""The shared Supabase client keeps connections alive across calls."""
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.core.supabase_client import SupabaseClient
+
+
+class _AuthStub(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        self.server.connections.add(self.client_address)
+        self.server.requests += 1
+        body = json.dumps({"id": "u1", "email": "user@example.com"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _AuthStub)
+    server.connections = set()
+    server.requests = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _client(server) -> SupabaseClient:
+    host, port = server.server_address
+    return SupabaseClient(url=f"http://{host}:{port}", anon_key="anon")
+
+
+def test_sequential_calls_reuse_one_connection(stub_server):
+    async def run():
+        client = _client(stub_server)
+        try:
+            for _ in range(20):
+                user = await client.get_user("token")
+                assert user["email"] == "user@example.com"
+        finally:
+            await client.aclose()
+
+    asyncio.run(run())
+    assert stub_server.requests == 20
+    assert len(stub_server.connections) == 1
+
+
+def test_concurrent_calls_stay_within_the_pool(stub_server):
+    async def run():
+        client = _client(stub_server)
+        try:
+            for _ in range(3):
+                await asyncio.gather(*(client.get_user("token") for _ in range(10)))
+        finally:
+            await client.aclose()
+
+    asyncio.run(run())
+    assert stub_server.requests == 30
+    # later bursts reuse the connections opened by the first one
+    assert len(stub_server.connections) <= 10
+
+
+def test_client_is_reopened_after_close(stub_server):
+    async def run():
+        client = _client(stub_server)
+        await client.get_user("token")
+        await client.aclose()
+        await client.get_user("token")
+        await client.aclose()
+
+    asyncio.run(run())
+    assert len(stub_server.connections) == 2
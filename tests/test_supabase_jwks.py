@@ -0,0 +1,171 @@
+"""Local verification of Supabase access tokens against a cached JWKS."""
+import asyncio
+import base64
+import json
+import time
+import uuid
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import JWTError, jwk, jwt
+
+from app.core import supabase_auth
+from app.core.config import settings
+from app.core.exceptions import HTTPException
+from app.core.supabase_jwks import MIN_REFRESH_INTERVAL, JWKSCache, UnknownSigningKey, user_from_claims
+
+
+def _keypair(kid, alg="RS256"):
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048) if alg == "RS256" else ec.generate_private_key(ec.SECP256R1())
+    private_pem = private.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    public_pem = private.public_key().public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+    public = jwk.construct(public_pem, alg).to_dict()
+    public.pop("alg")  # Supabase publishes some keys without "alg"
+    return private_pem, dict(public, kid=kid)
+
+
+RSA_PRIVATE, RSA_PUBLIC = _keypair("rsa-1")
+EC_PRIVATE, EC_PUBLIC = _keypair("ec-1", "ES256")
+
+
+class FakeSupabase:
+    def __init__(self, *keys):
+        self.keys = list(keys)
+        self.jwks_calls = 0
+        self.user_calls = 0
+
+    async def get_jwks(self):
+        self.jwks_calls += 1
+        return {"keys": self.keys}
+
+    async def get_user(self, token):
+        self.user_calls += 1
+        return {"id": "remote", "email": jwt.get_unverified_claims(token)["email"]}
+
+
+def _token(private=RSA_PRIVATE, kid="rsa-1", alg="RS256", **claims):
+    claims = {"sub": "user-1", "email": "jwks@example.com", "aud": "authenticated", "exp": int(time.time()) + 300, "role": "authenticated", **claims}
+    return jwt.encode(claims, private, algorithm=alg, headers={"kid": kid})
+
+
+@pytest.fixture
+def audience(monkeypatch):
+    monkeypatch.setattr(settings, "SUPABASE_JWT_AUDIENCE", "authenticated")
+
+
+def _cache(*keys):
+    client = FakeSupabase(*keys)
+    cache = JWKSCache(client, refresh_interval=600)
+    asyncio.run(cache.refresh())
+    return cache, client
+
+
+@pytest.mark.parametrize("private,kid,alg", [(RSA_PRIVATE, "rsa-1", "RS256"), (EC_PRIVATE, "ec-1", "ES256")])
+def test_valid_tokens_verify_without_a_remote_call(audience, private, kid, alg):
+    cache, client = _cache(RSA_PUBLIC, EC_PUBLIC)
+
+    claims = asyncio.run(cache.verify(_token(private, kid, alg)))
+
+    assert user_from_claims(claims) == {"id": "user-1", "email": "jwks@example.com", "role": "authenticated", "app_metadata": {}, "user_metadata": {}}
+    assert client.jwks_calls == 1
+
+
+def test_symmetric_keys_in_the_jwks_are_ignored():
+    cache, _ = _cache(RSA_PUBLIC, {"kty": "oct", "kid": "hs", "k": "c2VjcmV0", "alg": "HS256"})
+    assert asyncio.run(cache.get_key("rsa-1")) is not None
+    assert "hs" not in cache._keys
+
+
+def _unsigned(header, claims):
+    def b64(obj):
+        return base64.urlsafe_b64encode(json.dumps(obj).encode()).decode().rstrip("=")
+    return f"{b64(header)}.{b64(claims)}."
+
+
+@pytest.mark.parametrize("token", [
+    lambda: jwt.encode({"sub": "x"}, "shared secret", algorithm="HS256", headers={"kid": "rsa-1"}),
+    lambda: _unsigned({"alg": "none", "kid": "rsa-1"}, {"sub": "x"}),
+])
+def test_non_asymmetric_algorithms_are_not_ours(audience, token):
+    cache, client = _cache(RSA_PUBLIC)
+    with pytest.raises(UnknownSigningKey):
+        asyncio.run(cache.verify(token()))
+    assert client.jwks_calls == 1
+
+
+def test_unknown_kid_refreshes_once_then_is_rate_limited(audience):
+    cache, client = _cache(RSA_PUBLIC)
+    rotated_private, rotated_public = _keypair("rsa-2")
+
+    with pytest.raises(UnknownSigningKey):
+        asyncio.run(cache.verify(_token(rotated_private, "rsa-2")))
+    # just refreshed at startup: no refetch within MIN_REFRESH_INTERVAL
+    assert client.jwks_calls == 1
+
+    client.keys.append(rotated_public)
+    cache._fetched_at -= MIN_REFRESH_INTERVAL
+    assert asyncio.run(cache.verify(_token(rotated_private, "rsa-2")))["sub"] == "user-1"
+    assert client.jwks_calls == 2
+
+    with pytest.raises(UnknownSigningKey):
+        asyncio.run(cache.verify(_token(rotated_private, "rsa-3")))
+    assert client.jwks_calls == 2
+
+
+def _tampered(token):
+    header, _, signature = token.split(".")
+    return ".".join([header, _unsigned({}, {"sub": "admin", "aud": "authenticated"}).split(".")[1], signature])
+
+
+@pytest.mark.parametrize("token", [
+    lambda: _tampered(_token()),
+    lambda: _token(_keypair("rsa-1")[0]),
+    lambda: _token(exp=int(time.time()) - 10),
+    lambda: _token(aud="someone-else"),
+    lambda: "not.a.jwt",
+])
+def test_bad_tokens_raise_jwt_errors(audience, token):
+    cache, _ = _cache(RSA_PUBLIC)
+    with pytest.raises(JWTError):
+        asyncio.run(cache.verify(token()))
+
+
+@pytest.fixture
+def local_mode(engine, monkeypatch, audience):
+    fake = FakeSupabase(RSA_PUBLIC)
+    cache = JWKSCache(fake, refresh_interval=600)
+    asyncio.run(cache.refresh())
+    monkeypatch.setattr(settings, "SUPABASE_JWT_VERIFY_MODE", "local")
+    monkeypatch.setattr(settings, "SUPABASE_URL", "https://project.supabase.co")
+    monkeypatch.setattr(supabase_auth, "jwks_cache", cache)
+    monkeypatch.setattr(supabase_auth, "supabase_client", fake)
+    return fake
+
+
+def _authenticate(token):
+    creds = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    return asyncio.run(supabase_auth.get_current_user_from_supabase(creds))
+
+
+def test_dependency_verifies_locally(local_mode):
+    email = f"jwks-{uuid.uuid4().hex}@example.com"
+    user = _authenticate(_token(email=email))
+    assert user["supabase_user"]["id"] == "user-1"
+    assert user["local_user"]["email"] == email
+    assert local_mode.user_calls == 0
+
+
+def test_dependency_falls_back_to_supabase_for_foreign_keys(local_mode):
+    email = f"jwks-{uuid.uuid4().hex}@example.com"
+    user = _authenticate(jwt.encode({"email": email}, "legacy secret", algorithm="HS256"))
+    assert user["supabase_user"]["id"] == "remote"
+    assert local_mode.user_calls == 1
+
+
+def test_dependency_rejects_bad_signatures_without_a_remote_call(local_mode):
+    with pytest.raises(HTTPException) as exc:
+        _authenticate(_token(_keypair("rsa-1")[0], email=f"jwks-{uuid.uuid4().hex}@example.com"))
+    assert exc.value.status_code == 401
+    assert local_mode.user_calls == 0
@@ -0,0 +1,119 @@
+"""TieredCache: single-flight loads, generation invalidation, shared tier."""
+import threading
+import time
+
+import pytest
+
+from app.core.cache import InMemoryBackend, SingleFlight, TieredCache
+
+THREADS = 16
+
+
+def _slow_loader(delay=0.05):
+    calls = []
+
+    def load():
+        calls.append(1)
+        time.sleep(delay)
+        return {"n": len(calls)}
+
+    return calls, load
+
+
+def _concurrently(fn):
+    barrier = threading.Barrier(THREADS)
+    results, errors = [], []
+
+    def worker():
+        barrier.wait()
+        try:
+            results.append(fn())
+        except Exception as e:  # collected and asserted by the caller
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_concurrent_misses_load_once():
+    cache = TieredCache("t")
+    calls, load = _slow_loader()
+
+    results, errors = _concurrently(lambda: cache.get_or_load("page", load))
+
+    assert errors == []
+    assert len(calls) == 1
+    assert results == [{"n": 1}] * THREADS
+    stats = cache.stats()
+    assert stats["loads"] == 1
+    assert stats["coalesced"] + stats["hits"] == THREADS - 1
+
+
+def test_single_flight_shares_the_leaders_error():
+    flight = SingleFlight()
+
+    def fail():
+        time.sleep(0.05)
+        raise RuntimeError("db down")
+
+    results, errors = _concurrently(lambda: flight.do("k", fail))
+
+    assert results == []
+    assert len(errors) == THREADS
+    assert all(isinstance(e, RuntimeError) for e in errors)
+
+
+def test_invalidate_forces_a_reload():
+    cache = TieredCache("t")
+    calls, load = _slow_loader(0)
+
+    assert cache.get_or_load("page", load) == {"n": 1}
+    assert cache.get_or_load("page", load) == {"n": 1}
+    cache.invalidate()
+    assert cache.get_or_load("page", load) == {"n": 2}
+    assert len(calls) == 2
+
+
+def test_failed_load_is_not_cached():
+    cache = TieredCache("t")
+
+    def fail():
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("page", fail)
+    assert cache.get_or_load("page", lambda: "ok") == "ok"
+    assert cache.stats()["load_errors"] == 1
+
+
+def test_shared_tier_serves_and_invalidates_other_workers():
+    backend = InMemoryBackend()
+    # two instances sharing a backend stand in for two web workers
+    first = TieredCache("t", backend=backend, generation_check_interval=0)
+    second = TieredCache("t", backend=backend, generation_check_interval=0)
+    calls, load = _slow_loader(0)
+
+    assert first.get_or_load("page", load) == {"n": 1}
+    assert second.get_or_load("page", load) == {"n": 1}
+    assert second.stats()["shared_hits"] == 1
+
+    first.invalidate()
+    assert second.get_or_load("page", load) == {"n": 2}
+    assert len(calls) == 2
+
+
+def test_local_invalidation_does_not_reach_other_workers():
+    first, second = TieredCache("t"), TieredCache("t")
+    calls, load = _slow_loader(0)
+    first.get_or_load("page", load)
+    second.get_or_load("page", load)
+
+    first.invalidate()
+
+    # documented: without a shared backend the other worker waits out the TTL
+    assert second.get_or_load("page", load) == {"n": 2}
+    assert first.get_or_load("page", load) == {"n": 3}
@@ -0,0 +1,33 @@
+"""VersionedCache only caches when its versions are shared."""
+from app.core.cache import InMemoryBackend, VersionedCache
+
+
+def _counting_loader():
+    calls = []
+
+    def load():
+        calls.append(1)
+        return {"n": len(calls)}
+
+    return calls, load
+
+
+def test_disabled_without_shared_backend():
+    cache = VersionedCache("t", backend=None)
+    calls, load = _counting_loader()
+    cache.get_or_load(1, load)
+    cache.get_or_load(1, load)
+    assert len(calls) == 2
+    assert cache.stats()["enabled"] is False
+
+
+def test_bump_from_another_instance_invalidates():
+    backend = InMemoryBackend()
+    # two instances sharing a backend stand in for a web worker and the CLI
+    worker, cli = VersionedCache("t", backend=backend), VersionedCache("t", backend=backend)
+    calls, load = _counting_loader()
+    assert worker.get_or_load(1, load) == {"n": 1}
+    assert worker.get_or_load(1, load) == {"n": 1}
+    cli.bump(1)
+    assert worker.get_or_load(1, load) == {"n": 2}
+    assert len(calls) == 2